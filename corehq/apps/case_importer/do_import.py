@@ -1,7 +1,10 @@
 import time
 import uuid
 from collections import Counter, defaultdict, namedtuple
+from concurrent.futures import ThreadPoolExecutor
 
+from django.conf import settings
+from django.db import connections
 from django.utils.functional import cached_property
 from django.utils.translation import ugettext_lazy as _
 
@@ -12,6 +15,7 @@ from casexml.apps.case.mock import CaseBlock, CaseBlockError
 from corehq.apps.receiverwrapper.rate_limiter import rate_limit_submission
 from corehq.util.timer import TimingContext
 from couchexport.export import SCALAR_NEVER_WAS
+from dimagi.utils.chunked import chunked
 from dimagi.utils.logging import notify_exception
 from soil.progress import set_task_progress
 
@@ -30,9 +34,11 @@ from corehq.util.metrics import metrics_counter, metrics_histogram
 
 from . import exceptions
 from .const import LookupErrors
-from .util import EXTERNAL_ID, RESERVED_FIELDS, lookup_case
+from .util import EXTERNAL_ID, RESERVED_FIELDS, lookup_case, lookup_cases
 
 CASEBLOCK_CHUNKSIZE = 100
+# The number of rows whose cases are looked up together
+ROW_BLOCK_SIZE = 500
 RowAndCase = namedtuple('RowAndCase', ['row', 'case'])
 ALL_LOCATIONS = 'ALL_LOCATIONS'
 
@@ -52,38 +58,77 @@ class _Importer(object):
         self.results = _ImportResults()
 
         self.owner_accessor = _OwnerAccessor(domain, self.user)
+        self.case_lookup = _CaseLookup(domain)
         self.uncreated_external_ids = set()
         self._unsubmitted_caseblocks = []
 
+        self._submission_executor = None
+        self._submissions = []
+        self._submitting_case_ids = set()
+
     def do_import(self, spreadsheet):
-        for row_num, row in enumerate(spreadsheet.iter_row_dicts(), start=1):
-            set_task_progress(self.task, row_num - 1, spreadsheet.max_row)
+        threads = settings.CASE_IMPORTER_SUBMISSION_THREADS
+        if threads > 1:
+            self._submission_executor = ThreadPoolExecutor(max_workers=threads)
+
+        try:
+            for block in chunked(enumerate(spreadsheet.iter_row_dicts(), start=1), ROW_BLOCK_SIZE):
+                self.import_rows(block, spreadsheet.max_row)
+            self.commit_caseblocks()
+        finally:
+            if self._submission_executor:
+                self._submission_executor.shutdown()
+
+        return self.results.to_json()
+
+    def import_rows(self, numbered_rows, max_row):
+        rows = []
+        for row_num, raw_row in numbered_rows:
             if row_num == 1:
-                continue  # skip first row (header row)
+                rows.append((row_num, None))  # skip first row (header row)
+                continue
 
             try:
+                rows.append((row_num, self.parse_row(raw_row)))
+            except exceptions.CaseRowError as error:
+                rows.append((row_num, error))
+
+        # look up the cases of all rows in the block at once
+        self.case_lookup.prefetch([row for row_num, row in rows if isinstance(row, _CaseImportRow)])
+
+        for row_num, row in rows:
+            set_task_progress(self.task, row_num - 1, max_row)
+            if row is None:
+                continue
+
+            try:
+                if isinstance(row, exceptions.CaseRowError):
+                    raise row
                 self.import_row(row_num, row)
             except exceptions.CaseRowError as error:
                 self.results.add_error(row_num, error)
 
-        self.commit_caseblocks()
-        return self.results.to_json()
-
-    def import_row(self, row_num, raw_row):
+    def parse_row(self, raw_row):
+        """
+        :return: The _CaseImportRow, or None if the row is blank
+        """
         search_id = _parse_search_id(self.config, raw_row)
         fields_to_update = _populate_updated_fields(self.config, raw_row)
         if not any(fields_to_update.values()):
             # if the row was blank, just skip it, no errors
-            return
+            return None
 
-        row = _CaseImportRow(
+        return _CaseImportRow(
             search_id=search_id,
             fields_to_update=fields_to_update,
             config=self.config,
             domain=self.domain,
             user_id=self.user.user_id,
             owner_accessor=self.owner_accessor,
+            case_lookup=self.case_lookup,
         )
+
+    def import_row(self, row_num, row):
         if row.relies_on_uncreated_case(self.uncreated_external_ids):
             self.commit_caseblocks()
         if row.is_new_case and not self.config.create_new_cases:
@@ -111,21 +156,74 @@ class _Importer(object):
         self._unsubmitted_caseblocks.append(caseblock)
         # check if we've reached a reasonable chunksize and if so, submit
         if len(self._unsubmitted_caseblocks) >= CASEBLOCK_CHUNKSIZE:
-            self.commit_caseblocks()
+            self.commit_caseblocks(wait=False)
 
-    def commit_caseblocks(self):
-        if self._unsubmitted_caseblocks:
-            self.submit_and_process_caseblocks(self._unsubmitted_caseblocks)
+    def commit_caseblocks(self, wait=True):
+        """
+        Submits the unsubmitted caseblocks.
+
+        With ``wait=False`` and more than one submission thread, the chunk is
+        submitted in the background unless it updates a case that is still
+        being submitted. Cases created by chunks in the background only count
+        as created once all submissions have finished.
+        """
+        caseblocks = self._unsubmitted_caseblocks
+        self._unsubmitted_caseblocks = []
+        if caseblocks:
             self.results.num_chunks += 1
-            self._unsubmitted_caseblocks = []
-            self.uncreated_external_ids = set()
+            if not wait and self._can_submit_in_background(caseblocks):
+                self._submit_in_background(caseblocks)
+                return
+
+        self.wait_for_submissions()
+        if caseblocks:
+            self.submit_and_process_caseblocks(caseblocks)
+        self.case_lookup.discard(self.uncreated_external_ids)
+        self.uncreated_external_ids = set()
+
+    def _can_submit_in_background(self, caseblocks):
+        return (
+            self._submission_executor is not None
+            and not any(cb.case.case_id in self._submitting_case_ids for cb in caseblocks)
+        )
+
+    def _submit_in_background(self, caseblocks):
+        while len(self._submissions) >= settings.CASE_IMPORTER_SUBMISSION_THREADS:
+            self._finish_submission(*self._submissions.pop(0))
+
+        self.pre_submit_hook()
+        future = self._submission_executor.submit(self._submit_case_blocks_in_thread, caseblocks)
+        self._submissions.append((future, caseblocks))
+        self._submitting_case_ids.update(cb.case.case_id for cb in caseblocks)
+
+    def _submit_case_blocks_in_thread(self, caseblocks):
+        try:
+            return self.submit_case_blocks(caseblocks)
+        finally:
+            # close the database connections opened by this thread
+            connections.close_all()
+
+    def _finish_submission(self, future, caseblocks):
+        self._submitting_case_ids.difference_update(cb.case.case_id for cb in caseblocks)
+        self.process_submission(future.result, caseblocks)
+
+    def wait_for_submissions(self):
+        while self._submissions:
+            self._finish_submission(*self._submissions.pop(0))
 
     def submit_and_process_caseblocks(self, caseblocks):
         if not caseblocks:
             return
         self.pre_submit_hook()
+        self.process_submission(lambda: self.submit_case_blocks(caseblocks), caseblocks)
+
+    def process_submission(self, submit, caseblocks):
+        """
+        :param submit: A function which submits the caseblocks and returns
+        the form and cases
+        """
         try:
-            form, cases = self.submit_case_blocks(caseblocks)
+            form, cases = submit()
             if form.is_error:
                 raise Exception("Form error during case import: {}".format(form.problem))
         except Exception:
@@ -230,13 +328,14 @@ class _TimedAndThrottledImporter(_Importer):
 
 
 class _CaseImportRow(object):
-    def __init__(self, search_id, fields_to_update, config, domain, user_id, owner_accessor):
+    def __init__(self, search_id, fields_to_update, config, domain, user_id, owner_accessor, case_lookup):
         self.search_id = search_id
         self.fields_to_update = fields_to_update
         self.config = config
         self.domain = domain
         self.user_id = user_id
         self.owner_accessor = owner_accessor
+        self.case_lookup = case_lookup
 
         self.case_name = fields_to_update.pop('name', None)
         self.external_id = fields_to_update.pop('external_id', None)
@@ -259,15 +358,24 @@ class _CaseImportRow(object):
         return any(lookup_id and lookup_id in uncreated_external_ids
                    for lookup_id in [self.search_id, self.parent_id, self.parent_external_id])
 
+    def get_case_lookups(self):
+        """
+        :return: (search_field, search_id, case_type) tuples of the cases this
+        row may look up
+        """
+        return [
+            (self.config.search_field, self.search_id, self.config.case_type),
+            ('case_id', self.parent_id, self.parent_type),
+            ('external_id', self.parent_external_id, self.parent_type),
+        ]
+
     @cached_property
     def existing_case(self):
-        case, error = lookup_case(
+        case, error = self.case_lookup.lookup_case(
             self.config.search_field,
             self.search_id,
-            self.domain,
             self.config.case_type
         )
-        _log_case_lookup(self.domain)
         if error == LookupErrors.MultipleResults:
             raise exceptions.TooManyMatches()
         return case
@@ -292,9 +400,7 @@ class _CaseImportRow(object):
                 ('parent_external_id', 'external_id', self.parent_external_id),
         ]:
             if search_id:
-                parent_case, error = lookup_case(
-                    search_field, search_id, self.domain, self.parent_type)
-                _log_case_lookup(self.domain)
+                parent_case, error = self.case_lookup.lookup_case(search_field, search_id, self.parent_type)
                 if parent_case:
                     return {self.parent_ref: (parent_case.type, parent_case.case_id)}
                 raise exceptions.InvalidParentId(column)
@@ -341,6 +447,51 @@ class _CaseImportRow(object):
         )
 
 
+class _CaseLookup(object):
+    """
+    Looks up the cases of the rows being imported. The cases of a block of
+    rows are looked up with one query per search field and case type (see
+    ``prefetch``), other lookups are done one by one.
+    """
+
+    def __init__(self, domain):
+        self.domain = domain
+        self._results = {}
+
+    def prefetch(self, rows):
+        """Looks up the cases of the given rows, replacing the previous results"""
+        self._results = {}
+        search_ids = defaultdict(set)
+        for row in rows:
+            for search_field, search_id, case_type in row.get_case_lookups():
+                if search_id:
+                    search_ids[(search_field, case_type)].add(search_id)
+
+        for (search_field, case_type), ids in search_ids.items():
+            results = lookup_cases(search_field, ids, self.domain, case_type)
+            _log_case_lookup(self.domain)
+            for search_id, result in results.items():
+                self._results[(search_field, search_id, case_type)] = result
+
+    def lookup_case(self, search_field, search_id, case_type):
+        """
+        :return: The (case, error) tuple from ``lookup_case``
+        """
+        key = (search_field, search_id, case_type)
+        if key not in self._results:
+            self._results[key] = lookup_case(search_field, search_id, self.domain, case_type)
+            _log_case_lookup(self.domain)
+        return self._results[key]
+
+    def discard(self, search_ids):
+        """Forgets the results for the given search ids, e.g. once their cases are created"""
+        if search_ids:
+            self._results = {
+                key: result for key, result in self._results.items()
+                if key[1] not in search_ids
+            }
+
+
 def _log_case_lookup(domain):
     case_load_counter("case_importer", domain)
 
@@ -1,6 +1,6 @@
 from contextlib import contextmanager
 
-from django.test import TestCase
+from django.test import TestCase, override_settings
 from django.utils.dateparse import parse_datetime
 
 from celery import states
@@ -19,6 +19,7 @@ from corehq.apps.commtrack.tests.util import make_loc
 from corehq.apps.domain.shortcuts import create_domain
 from corehq.apps.groups.models import Group
 from corehq.apps.hqcase.dbaccessors import get_case_ids_in_domain
+from corehq.apps.hqcase.utils import submit_case_blocks
 from corehq.apps.locations.models import LocationType
 from corehq.apps.locations.tests.util import restrict_user_by_location
 from corehq.apps.users.models import CommCareUser, WebUser
@@ -167,6 +168,28 @@ class ImporterTest(TestCase):
         # shouldn't touch existing properties
         self.assertEqual('foo', case.get_case_property('importer_test_prop'))
 
+    @run_with_all_backends
+    def test_case_lookups_are_batched(self):
+        cases = [
+            case for i in range(3)
+            for case in self.factory.create_or_update_case(CaseStructure(attrs={'create': True}))
+        ]
+
+        config = self._config(['case_id', 'age'])
+        file = make_worksheet_wrapper(
+            ['case_id', 'age'],
+            *[[case.case_id, 'age-{}'.format(i)] for i, case in enumerate(cases)]
+        )
+        with patch('corehq.apps.case_importer.do_import.lookup_case') as lookup_case:
+            res = do_import(file, config, self.domain)
+        self.assertFalse(lookup_case.called)
+        self.assertEqual(0, res['created_count'])
+        self.assertEqual(3, res['match_count'])
+        self.assertFalse(res['errors'])
+
+        for i, case in enumerate(self.accessor.get_cases([case.case_id for case in cases], ordered=True)):
+            self.assertEqual('age-{}'.format(i), case.get_case_property('age'))
+
     @run_with_all_backends
     def testCaseLookupTypeCheck(self):
         [case] = self.factory.create_or_update_case(CaseStructure(attrs={
@@ -334,6 +357,84 @@ class ImporterTest(TestCase):
         for prop in ['age', 'sex', 'location']:
             self.assertTrue(prop in case.get_case_property(prop))
 
+    @run_with_all_backends
+    @override_settings(CASE_IMPORTER_SUBMISSION_THREADS=2)
+    @patch('corehq.apps.case_importer.do_import.CASEBLOCK_CHUNKSIZE', 2)
+    def test_concurrent_chunks_updating_same_case(self):
+        [case] = self.factory.create_or_update_case(CaseStructure(attrs={'create': True}))
+        config = self._config(['case_id', 'age'])
+        file = make_worksheet_wrapper(
+            ['case_id', 'age'],
+            [case.case_id, 'age-0'],
+            ['', 'age-new-0'],
+            [case.case_id, 'age-1'],
+            ['', 'age-new-1'],
+        )
+        with deferred_submissions() as executor:
+            res = do_import(file, config, self.domain)
+        self.assertFalse(res['errors'])
+        self.assertEqual(2, res['created_count'])
+        self.assertEqual(2, res['match_count'])
+        self.assertEqual(2, res['num_chunks'])
+        # the second chunk waits for the first as they update the same case
+        self.assertEqual(1, executor.num_submitted)
+        self.assertEqual('age-1', self.accessor.get_case(case.case_id).get_case_property('age'))
+
+    @run_with_all_backends
+    @override_settings(CASE_IMPORTER_SUBMISSION_THREADS=2)
+    @patch('corehq.apps.case_importer.do_import.CASEBLOCK_CHUNKSIZE', 2)
+    def test_concurrent_chunks_external_id_in_flight(self):
+        config = self._config(['external_id', 'age'], search_field='external_id')
+        file = make_worksheet_wrapper(
+            ['external_id', 'age'],
+            ['ext-1', 'age-0'],
+            ['ext-2', 'age-0'],
+            ['ext-1', 'age-1'],
+        )
+        with deferred_submissions() as executor:
+            res = do_import(file, config, self.domain)
+        self.assertFalse(res['errors'])
+        self.assertEqual(2, res['created_count'])
+        self.assertEqual(1, res['match_count'])
+        self.assertEqual(1, executor.num_submitted)
+
+        case_ids = self.accessor.get_case_ids_in_domain()
+        self.assertEqual(2, len(case_ids))
+        [case] = self.accessor.get_cases_by_external_id('ext-1')
+        self.assertEqual('age-1', case.get_case_property('age'))
+
+    @run_with_all_backends
+    @override_settings(CASE_IMPORTER_SUBMISSION_THREADS=2)
+    @patch('corehq.apps.case_importer.do_import.CASEBLOCK_CHUNKSIZE', 2)
+    @patch('corehq.apps.case_importer.do_import.notify_exception')
+    def test_concurrent_chunk_failure(self, notify_exception):
+        config = self._config(['case_id', 'age'])
+        file = make_worksheet_wrapper(
+            ['case_id', 'age'],
+            *[['', 'age-{}'.format(i)] for i in range(5)]
+        )
+
+        def fail_first_chunk(case_blocks, *args, **kwargs):
+            if any('age-0' in case_block for case_block in case_blocks):
+                raise Exception("submission failed")
+            return submit_case_blocks(case_blocks, *args, **kwargs)
+
+        with deferred_submissions() as executor, \
+                patch('corehq.apps.case_importer.do_import.submit_case_blocks', fail_first_chunk):
+            res = do_import(file, config, self.domain)
+        self.assertEqual(2, executor.num_submitted)
+        self.assertTrue(notify_exception.called)
+        self.assertEqual(3, res['created_count'])
+        self.assertEqual(2, res['failed_count'])
+        error = exceptions.ImportErrorMessage()
+        self.assertEqual([2, 3], res['errors'][error.title][error.column_name]['rows'])
+
+        case_ids = self.accessor.get_case_ids_in_domain()
+        self.assertEqual(
+            {'age-2', 'age-3', 'age-4'},
+            {case.get_case_property('age') for case in self.accessor.get_cases(case_ids)}
+        )
+
     @run_with_all_backends
     def testParentCase(self):
         headers = ['parent_id', 'name', 'case_id']
@@ -500,6 +601,40 @@ def make_worksheet_wrapper(*rows):
     return WorksheetWrapper(make_worksheet(rows))
 
 
+class _DeferredFuture(object):
+    def __init__(self, fn, args):
+        self.fn = fn
+        self.args = args
+
+    def result(self):
+        return self.fn(*self.args)
+
+
+class _DeferredExecutor(object):
+    """
+    Stands in for the importer's ThreadPoolExecutor. A submission only runs
+    when the importer waits for its result, so its cases can't be looked up
+    while it is in flight, and it runs in the test's transaction.
+    """
+    def __init__(self):
+        self.num_submitted = 0
+
+    def submit(self, fn, *args):
+        self.num_submitted += 1
+        return _DeferredFuture(fn, args)
+
+    def shutdown(self):
+        pass
+
+
+@contextmanager
+def deferred_submissions():
+    executor = _DeferredExecutor()
+    with patch('corehq.apps.case_importer.do_import.ThreadPoolExecutor', lambda max_workers: executor), \
+            patch('corehq.apps.case_importer.do_import.connections'):
+        yield executor
+
+
 @contextmanager
 def restrict_user_to_location(test_case, location):
     orig_user = test_case.couch_user
@@ -1,10 +1,15 @@
 import re
+from concurrent.futures import ThreadPoolExecutor
+from itertools import chain
 
 from django.utils.translation import ugettext as _
 
 from eulxml.xpath import parse as parse_xpath
 from eulxml.xpath.ast import FunctionCall, Step, UnaryExpression, serialize
 
+from dimagi.utils.chunked import chunked
+
+from corehq.apps.case_search.const import IDENTIFIER, INDICES_PATH, REFERENCED_ID
 from corehq.apps.case_search.xpath_functions import (
     XPATH_FUNCTIONS,
     XPathFunctionException,
@@ -17,6 +22,7 @@ from corehq.apps.es.case_search import (
     exact_case_property_text_query,
     reverse_index_case_query,
 )
+from corehq.util.metrics import metrics_counter
 
 
 class CaseFilterError(Exception):
@@ -49,6 +55,101 @@ def print_ast(node):
 
 
 MAX_RELATED_CASES = 500000  # Limit each related case lookup to return 500,000 cases to prevent timeouts
+RELATED_CASE_CHUNK_SIZE = 10000  # Max number of case ids in each query looking up related cases
+RELATED_CASE_LOOKUP_THREADS = 4
+
+
+class RelatedCaseLookup(object):
+    """Looks up the ids of cases for related case filters
+
+    A filter like `parent/grandparent/property = 'value'` is resolved in
+    stages. First the grandparent cases that match the property are found.
+    That is done from whichever side is expected to match fewer cases:
+
+    - the cases where `property = 'value'`, or
+    - the cases referenced by a `grandparent` index, filtered by the
+      property.
+
+    Then the case hierarchy is walked down, finding the cases that
+    reference the previous level's cases with the right identifier.
+    Lookups on many case ids are split into chunks queried in parallel.
+
+    Results are cached on the instance, which lives for one search, so
+    filters sharing a related case path are only looked up once.
+    """
+
+    def __init__(self, domain):
+        self.domain = domain
+        self._cache = {}
+
+    def get_related_case_ids(self, query, identifiers):
+        """Get the ids of the cases reached through `identifiers[0]`
+
+        :param query: XPath expression on the furthest related case,
+        e.g. `property = 'value'`
+        :param identifiers: Index identifiers of the related case path,
+        nearest first, e.g. `['parent', 'grandparent']`
+        """
+        key = (query, tuple(identifiers))
+        if key not in self._cache:
+            if len(identifiers) == 1:
+                ids = self._lookup_matching_cases(query, identifiers[0])
+            else:
+                # this has the potential of being a very large list
+                ids = self._scroll_ids_in_chunks(
+                    lambda chunk: self._case_search().get_child_cases(chunk, identifiers[1]),
+                    self.get_related_case_ids(query, identifiers[1:]),
+                )
+            self._cache[key] = ids
+        return self._cache[key]
+
+    def _lookup_matching_cases(self, query, identifier):
+        """Get the ids of cases referenced by `identifier` indices where `query` matches
+        """
+        property_query = self._case_search().xpath_query(self.domain, query)
+        property_count = property_query.count()
+        if property_count <= RELATED_CASE_CHUNK_SIZE:
+            return sorted(property_query.scroll_ids())
+
+        index_query = self._case_search().filter(filters.nested(
+            INDICES_PATH,
+            filters.term("{}.{}".format(INDICES_PATH, IDENTIFIER), identifier),
+        ))
+        index_count = index_query.count()
+        if min(property_count, index_count) > MAX_RELATED_CASES:
+            raise CaseFilterError(
+                _("The related case lookup you are trying to perform would return too many cases"),
+                query
+            )
+
+        if property_count <= index_count:
+            metrics_counter('commcare.case_search.related_case_lookup', tags={'direction': 'property'})
+            return sorted(property_query.scroll_ids())
+
+        metrics_counter('commcare.case_search.related_case_lookup', tags={'direction': 'index'})
+        referenced_ids = {
+            index[REFERENCED_ID]
+            for case in index_query.source([INDICES_PATH]).scroll()
+            for index in case.get(INDICES_PATH, [])
+            if index.get(IDENTIFIER) == identifier
+        }
+        return self._scroll_ids_in_chunks(property_query.doc_id, referenced_ids)
+
+    def _scroll_ids_in_chunks(self, get_query, case_ids):
+        """Get the ids matched by `get_query(chunk)` for chunks of `case_ids`
+        """
+        chunks = [list(chunk) for chunk in chunked(sorted(case_ids), RELATED_CASE_CHUNK_SIZE)]
+        if len(chunks) <= 1:
+            return sorted(chain.from_iterable(get_query(chunk).scroll_ids() for chunk in chunks))
+
+        def scroll_ids(chunk):
+            return list(get_query(chunk).scroll_ids())
+
+        with ThreadPoolExecutor(max_workers=RELATED_CASE_LOOKUP_THREADS) as executor:
+            return sorted(set(chain.from_iterable(executor.map(scroll_ids, chunks))))
+
+    def _case_search(self):
+        return CaseSearchES().domain(self.domain)
 
 
 OPERATOR_MAPPING = {
@@ -73,62 +174,31 @@ def build_filter_from_ast(domain, node):
     """Builds an ES filter from an AST provided by eulxml.xpath.parse
     """
 
+    related_case_lookup = RelatedCaseLookup(domain)
+
     def _walk_related_cases(node):
         """Return a query that will fulfill the filter on the related case.
 
         :param node: a node returned from eulxml.xpath.parse of the form `parent/grandparent/property = 'value'`
 
-        Since ES has no way of performing joins, we filter down in stages:
-        1. Find the ids of all cases where the condition is met
-        2. Walk down the case hierarchy, finding all related cases with the right identifier to the ids
-        found in (1).
-        3. Return the lowest of these ids as an related case query filter
+        Since ES has no way of performing joins, the ids of the related cases
+        are looked up first (see `RelatedCaseLookup`) and the lowest of these
+        ids are returned as a related case query filter.
         """
+        if isinstance(node.right, Step):
+            _raise_step_RHS(node)
+        query = "{} {} '{}'".format(serialize(node.left.right), node.op, node.right)
 
-        # fetch the ids of the highest level cases that match the case_property
-        # i.e. all the cases which have `property = 'value'`
-        ids = _parent_property_lookup(node)
-
-        # get the related case path we need to walk, i.e. `parent/grandparent/property`
+        # get the related case path, i.e. `parent/grandparent/property` -> ['parent', 'grandparent']
+        identifiers = []
         n = node.left
         while _is_related_case_lookup(n):
-            # This walks down the tree and finds case ids that match each identifier
-            # This is basically performing multiple "joins" to find related cases since ES
-            # doesn't have a way to relate models together
-
-            # Get the path to the related case, e.g. `parent/grandparent`
-            # On subsequent run throughs, it walks down the tree (e.g. n = [parent, /, grandparent])
             n = n.left
-            identifier = serialize(n.right)  # the identifier at this step, e.g. `grandparent`
-
-            # get the ids of the cases that point at the previous level's cases
-            # this has the potential of being a very large list
-            ids = _child_case_lookup(ids, identifier=identifier)
-            if not ids:
-                break
+            identifiers.insert(0, serialize(n.right))
+        identifiers.insert(0, serialize(n.left))
 
-        # after walking the full tree, get the final level we are interested in, i.e. `parent`
-        final_identifier = serialize(n.left)
-        return reverse_index_case_query(ids, final_identifier)
-
-    def _parent_property_lookup(node):
-        """given a node of the form `parent/foo = 'thing'`, return all case_ids where `foo = thing`
-        """
-        if isinstance(node.right, Step):
-            _raise_step_RHS(node)
-        new_query = "{} {} '{}'".format(serialize(node.left.right), node.op, node.right)
-        es_query = CaseSearchES().domain(domain).xpath_query(domain, new_query)
-        if es_query.count() > MAX_RELATED_CASES:
-            raise CaseFilterError(
-                _("The related case lookup you are trying to perform would return too many cases"),
-                new_query
-            )
-        return es_query.scroll_ids()
-
-    def _child_case_lookup(case_ids, identifier):
-        """returns a list of all case_ids who have parents `case_id` with the relationship `identifier`
-        """
-        return CaseSearchES().domain(domain).get_child_cases(case_ids, identifier).scroll_ids()
+        ids = related_case_lookup.get_related_case_ids(query, identifiers)
+        return reverse_index_case_query(ids, identifiers[0])
 
     def _is_related_case_lookup(node):
         """Returns whether a particular AST node is a related case lookup
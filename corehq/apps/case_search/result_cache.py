@@ -0,0 +1,76 @@
+import hashlib
+import json
+import uuid
+
+from django.conf import settings
+from django.core.cache import caches
+
+from corehq.util.metrics import metrics_counter
+
+
+class CaseSearchResultCache(object):
+    """
+    Case search results shared between identical searches, e.g. mobile
+    workers opening the same search screen with the same defaults.
+
+    Entries are keyed on the domain, case type and the ES query. Each
+    domain and case type has a freshness token that is part of the key and
+    is replaced by the case search pillow when a case of that type changes
+    (see ``invalidate``). Results of searches filtering on related cases of
+    other types, and changes that reach ES after a search has cached its
+    result, are only bounded by the timeout, so it should be short.
+
+    Uses the Django cache configured by ``settings.CASE_SEARCH_RESULT_CACHE``.
+    See ``get_case_search_result_cache``.
+    """
+
+    def __init__(self, cache, timeout):
+        self.cache = cache
+        self.timeout = timeout
+
+    @staticmethod
+    def _get_token_key(domain, case_type):
+        hashable_key = ','.join([domain, case_type])
+        return 'case-search-token-{}'.format(hashlib.md5(hashable_key.encode('utf-8')).hexdigest())
+
+    def _get_token(self, domain, case_type):
+        key = self._get_token_key(domain, case_type)
+        token = self.cache.get(key)
+        if token is None:
+            self.cache.add(key, uuid.uuid4().hex, timeout=None)
+            token = self.cache.get(key)
+        return token
+
+    def get_cache_key(self, domain, case_type, query):
+        hashable_key = ','.join([
+            domain,
+            case_type,
+            self._get_token(domain, case_type),
+            json.dumps(query, sort_keys=True),
+        ])
+        return 'case-search-result-{}'.format(hashlib.md5(hashable_key.encode('utf-8')).hexdigest())
+
+    def get(self, cache_key, domain):
+        hits = self.cache.get(cache_key)
+        tags = {'domain': domain}
+        if hits is None:
+            metrics_counter('commcare.case_search.result_cache.misses', tags=tags)
+        else:
+            metrics_counter('commcare.case_search.result_cache.hits', tags=tags)
+        return hits
+
+    def set(self, cache_key, hits):
+        self.cache.set(cache_key, hits, timeout=self.timeout)
+
+    def invalidate(self, domain, case_type):
+        self.cache.set(self._get_token_key(domain, case_type), uuid.uuid4().hex, timeout=None)
+
+
+def get_case_search_result_cache():
+    """Return the ``CaseSearchResultCache`` or ``None`` if it is not configured"""
+    if not settings.CASE_SEARCH_RESULT_CACHE:
+        return None
+    return CaseSearchResultCache(
+        caches[settings.CASE_SEARCH_RESULT_CACHE],
+        settings.CASE_SEARCH_RESULT_CACHE_TIMEOUT,
+    )
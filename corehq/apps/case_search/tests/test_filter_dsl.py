@@ -2,6 +2,7 @@ from django.test import SimpleTestCase, TestCase
 
 from corehq.util.es.elasticsearch import ConnectionError
 from eulxml.xpath import parse as parse_xpath
+from mock import patch
 
 from casexml.apps.case.mock import CaseFactory, CaseIndex, CaseStructure
 from pillowtop.es_utils import initialize_index_and_mapping
@@ -453,6 +454,20 @@ class TestFilterDslLookups(TestCase):
         self.assertEqual(expected_filter, built_filter)
         self.assertEqual([self.child_case_id], CaseSearchES().filter(built_filter).values_list('_id', flat=True))
 
+    @patch('corehq.apps.case_search.filter_dsl.RELATED_CASE_CHUNK_SIZE', 1)
+    def test_parent_lookups_from_index(self):
+        # 'house' matches more cases than there are 'mother' indices, so the
+        # lookup starts from the cases referenced by 'mother' indices
+        parsed = parse_xpath("mother/house = 'Tyrell'")
+        built_filter = build_filter_from_ast(self.domain, parsed)
+        self.assertEqual([self.parent_case_id], CaseSearchES().filter(built_filter).values_list('_id', flat=True))
+
+    @patch('corehq.apps.case_search.filter_dsl.RELATED_CASE_CHUNK_SIZE', 1)
+    def test_nested_parent_lookups_in_chunks(self):
+        parsed = parse_xpath("father/mother/house = 'Tyrell' or father/mother/house = 'Tyrell'")
+        built_filter = build_filter_from_ast(self.domain, parsed)
+        self.assertEqual([self.child_case_id], CaseSearchES().filter(built_filter).values_list('_id', flat=True))
+
 
 class TestGetProperties(SimpleTestCase):
     pass
@@ -0,0 +1,42 @@
+from django.core.cache import caches
+from django.test import SimpleTestCase
+
+from corehq.apps.case_search.result_cache import CaseSearchResultCache
+from corehq.util.metrics.tests.utils import capture_metrics
+
+
+class CaseSearchResultCacheTest(SimpleTestCase):
+
+    def setUp(self):
+        self.cache = caches['locmem']
+        self.cache.clear()
+        self.result_cache = CaseSearchResultCache(self.cache, 60)
+        self.query = {'query': {'filtered': {'filter': {'and': [{'term': {'domain.exact': 'search'}}]}}}}
+
+    def test_get_cached_hits(self):
+        key = self.result_cache.get_cache_key('search', 'person', self.query)
+        with capture_metrics() as metrics:
+            self.assertIsNone(self.result_cache.get(key, 'search'))
+            self.result_cache.set(key, [{'_id': 'case1'}])
+            self.assertEqual([{'_id': 'case1'}], self.result_cache.get(key, 'search'))
+        self.assertEqual(metrics.sum('commcare.case_search.result_cache.misses', domain='search'), 1)
+        self.assertEqual(metrics.sum('commcare.case_search.result_cache.hits', domain='search'), 1)
+
+    def test_key_is_normalized(self):
+        query = {'size': 10, 'query': {'match_all': {}}}
+        reordered = {'query': {'match_all': {}}, 'size': 10}
+        self.assertEqual(
+            self.result_cache.get_cache_key('search', 'person', query),
+            self.result_cache.get_cache_key('search', 'person', reordered),
+        )
+        self.assertNotEqual(
+            self.result_cache.get_cache_key('search', 'person', query),
+            self.result_cache.get_cache_key('search', 'household', query),
+        )
+
+    def test_invalidate(self):
+        key = self.result_cache.get_cache_key('search', 'person', self.query)
+        other_key = self.result_cache.get_cache_key('search', 'household', self.query)
+        self.result_cache.invalidate('search', 'person')
+        self.assertNotEqual(key, self.result_cache.get_cache_key('search', 'person', self.query))
+        self.assertEqual(other_key, self.result_cache.get_cache_key('search', 'household', self.query))
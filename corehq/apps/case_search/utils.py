@@ -90,7 +90,8 @@ class CaseSearchCriteria(object):
         except FuzzyProperties.DoesNotExist:
             fuzzies = []
 
-        for key, value in self.criteria.items():
+        # sorted so the same criteria always build the same query
+        for key, value in sorted(self.criteria.items()):
             if key in UNSEARCHABLE_KEYS or key.startswith(SEARCH_QUERY_CUSTOM_VALUE):
                 continue
             remove_char_regexs = self.config.ignore_patterns.filter(
@@ -0,0 +1,310 @@
+"""
+Measure pillow throughput offline by running the processors of a pillow
+against a synthetic in-process change feed instead of Kafka.
+
+The changes carry their documents so no document store is needed to read
+them, but the processors write to whatever databases and Elasticsearch
+the local settings point at, so run this against local stand-ins.
+
+    pillow = get_pillow_by_name('case-pillow')
+    results = PillowBenchmark(pillow, 'case', num_changes=10000, domain='bench').run()
+
+See the ``benchmark_pillow`` management command.
+"""
+import random
+import resource
+import uuid
+from collections import defaultdict, namedtuple
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+from pillowtop.feed.interface import Change, ChangeFeed, ChangeMeta
+from pillowtop.pillow.interface import ConstructedPillow
+
+from corehq.apps.change_feed import data_sources, topics
+from corehq.util import metrics
+from corehq.util.metrics import DebugMetrics
+from corehq.util.timer import TimingContext
+
+BENCHMARK_XMLNS = 'http://openrosa.org/formdesigner/pillow-benchmark'
+BENCHMARK_CASE_TYPE = 'pillow-benchmark'
+
+StageResult = namedtuple(
+    'StageResult', 'name changes seconds fetch_seconds transform_seconds load_seconds peak_rss_kb'
+)
+
+PROCESSOR_TIMING_METRIC = 'commcare.change_feed.processor.timing'
+
+# Outermost steps that chunked processors time with ``PROCESSOR_TIMING_METRIC``
+# by the stage they belong to. Nested steps are left out so time isn't counted twice.
+STAGES_BY_PROCESSOR_STEP = {
+    'bulk_extract': 'fetch',
+    'bulk_transform': 'transform',
+    'bulk_load': 'load',
+    'extract': 'fetch',
+    'single_batch_transform': 'transform',
+    'single_batch_delete': 'load',
+    'single_batch_load': 'load',
+    'async_config_load': 'load',
+}
+
+
+class SyntheticChangeFeed(ChangeFeed):
+    """
+    Change feed that yields a fixed list of changes as if they were read
+    from partition 0 of a Kafka topic. Offsets are indexes into the list.
+    """
+
+    def __init__(self, topic, changes):
+        self._topic = topic
+        self._changes = changes
+        self._since = 0
+
+    @property
+    def topics(self):
+        return [self._topic]
+
+    def iter_changes(self, since, forever=False):
+        if forever:
+            raise ValueError('Forever option not supported for synthetic feed!')
+        self._since = since or 0
+        for change in self._changes[self._since:]:
+            yield change
+            self._since += 1
+
+    def get_latest_offsets(self):
+        return {(self._topic, 0): len(self._changes)}
+
+    def get_latest_offsets_as_checkpoint_value(self):
+        return self.get_latest_offsets()
+
+    def get_processed_offsets(self):
+        return {(self._topic, 0): self._since}
+
+
+def _iso(value):
+    return value.isoformat() + 'Z'
+
+
+def _get_change(topic, data_source_name, doc, document_type, document_subtype, sequence_id):
+    return Change(
+        id=doc['_id'],
+        sequence_id=sequence_id,
+        document=doc,
+        metadata=ChangeMeta(
+            document_id=doc['_id'],
+            data_source_type=data_sources.SOURCE_SQL,
+            data_source_name=data_source_name,
+            document_type=document_type,
+            document_subtype=document_subtype,
+            domain=doc['domain'],
+            is_deletion=False,
+        ),
+        topic=topic,
+        partition=0,
+    )
+
+
+def get_form_change(domain, sequence_id, rand):
+    """A form submission with a case block, a repeat group and form metadata"""
+    form_id = uuid.uuid4().hex
+    user_id = 'user{}'.format(rand.randrange(100))
+    time_end = datetime(2020, 1, 1) + timedelta(minutes=sequence_id)
+    form = {
+        '@xmlns': BENCHMARK_XMLNS,
+        '@name': 'Pillow Benchmark',
+        'name': 'Name {}'.format(sequence_id),
+        'age': str(rand.randrange(100)),
+        'color': rand.choice(['red', 'green', 'blue']),
+        'visits': [
+            {'date': _iso(time_end - timedelta(days=i)), 'notes': 'visit {}'.format(i)}
+            for i in range(rand.randrange(1, 5))
+        ],
+        'case': {
+            '@case_id': uuid.uuid4().hex,
+            '@date_modified': _iso(time_end),
+            '@user_id': user_id,
+            '@xmlns': 'http://commcarehq.org/case/transaction/v2',
+            'update': {'age': str(rand.randrange(100))},
+        },
+        'meta': {
+            'instanceID': form_id,
+            'userID': user_id,
+            'username': user_id,
+            'deviceID': 'benchmark-device',
+            'timeStart': _iso(time_end - timedelta(minutes=5)),
+            'timeEnd': _iso(time_end),
+            'appVersion': 'CommCare Android, version "2.48"',
+        },
+    }
+    doc = {
+        '_id': form_id,
+        'doc_type': 'XFormInstance',
+        'domain': domain,
+        'xmlns': BENCHMARK_XMLNS,
+        'app_id': 'benchmark-app',
+        'build_id': 'benchmark-build',
+        'received_on': _iso(time_end),
+        'server_modified_on': _iso(time_end),
+        'form': form,
+        'auth_context': {'doc_type': 'AuthContext', 'user_id': user_id, 'domain': domain},
+        'history': [],
+        'partial_submission': False,
+        'initial_processing_complete': True,
+    }
+    return _get_change(topics.FORM_SQL, data_sources.FORM_SQL, doc, 'XFormInstance', BENCHMARK_XMLNS, sequence_id)
+
+
+def get_case_change(domain, sequence_id, rand):
+    """An open case with a parent index and a handful of case properties"""
+    case_id = uuid.uuid4().hex
+    user_id = 'user{}'.format(rand.randrange(100))
+    modified_on = _iso(datetime(2020, 1, 1) + timedelta(minutes=sequence_id))
+    doc = {
+        '_id': case_id,
+        'doc_type': 'CommCareCase',
+        'domain': domain,
+        'type': BENCHMARK_CASE_TYPE,
+        'name': 'Case {}'.format(sequence_id),
+        'owner_id': 'owner{}'.format(rand.randrange(20)),
+        'user_id': user_id,
+        'opened_by': user_id,
+        'opened_on': modified_on,
+        'modified_on': modified_on,
+        'server_modified_on': modified_on,
+        'closed': False,
+        'closed_on': None,
+        'closed_by': None,
+        'external_id': str(sequence_id),
+        'xform_ids': [uuid.uuid4().hex],
+        'actions': [],
+        'indices': [{
+            'doc_type': 'CommCareCaseIndex',
+            'identifier': 'parent',
+            'referenced_type': 'household',
+            'referenced_id': uuid.uuid4().hex,
+            'relationship': 'child',
+        }],
+        'age': str(rand.randrange(100)),
+        'color': rand.choice(['red', 'green', 'blue']),
+        'visit_count': str(rand.randrange(10)),
+    }
+    return _get_change(
+        topics.CASE_SQL, data_sources.CASE_SQL, doc, 'CommCareCase', BENCHMARK_CASE_TYPE, sequence_id
+    )
+
+
+def get_ledger_change(domain, sequence_id, rand):
+    """A stock ledger value"""
+    case_id = 'supply-point{}'.format(rand.randrange(50))
+    entry_id = 'product{}'.format(rand.randrange(20))
+    doc = {
+        '_id': '{}/stock/{}'.format(case_id, entry_id),
+        'domain': domain,
+        'case_id': case_id,
+        'section_id': 'stock',
+        'entry_id': entry_id,
+        'balance': rand.randrange(1000),
+        'last_modified': _iso(datetime(2020, 1, 1) + timedelta(minutes=sequence_id)),
+        'location_id': None,
+        'daily_consumption': None,
+    }
+    return _get_change(topics.LEDGER, data_sources.LEDGER_V2, doc, topics.LEDGER, None, sequence_id)
+
+
+CHANGE_GENERATORS = {
+    'form': (topics.FORM_SQL, get_form_change),
+    'case': (topics.CASE_SQL, get_case_change),
+    'ledger': (topics.LEDGER, get_ledger_change),
+}
+
+
+def get_peak_rss_kb():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+@contextmanager
+def capture_stage_seconds():
+    """
+    Capture the step timings processors report instead of sending them to
+    the metrics providers, and add them up by stage.
+
+    :yields: dict of seconds by stage, filled in on exit
+    """
+    capture = DebugMetrics(capture=True)
+    seconds_by_stage = defaultdict(float)
+    metrics._metrics.append(capture)
+    try:
+        yield seconds_by_stage
+    finally:
+        assert metrics._metrics[-1] is capture, metrics._metrics
+        metrics._metrics.pop()
+        for sample in capture.metrics:
+            stage = STAGES_BY_PROCESSOR_STEP.get(sample.tags.get('action'))
+            if sample.name == PROCESSOR_TIMING_METRIC and stage:
+                seconds_by_stage[stage] += sample.value
+
+
+class PillowBenchmark(object):
+    """
+    Run a pillow's processors over synthetic changes and time them.
+
+    Each processor is run on its own with the pillow's chunked processing so
+    its time and the peak RSS after it ran can be reported separately. The
+    checkpoint is never updated.
+
+    Fetch, transform and load times come from the steps that processors
+    time for ``PROCESSOR_TIMING_METRIC`` when processing chunks. They are
+    ``None`` for processors that don't time their steps, e.g. processors
+    without batch support or when the chunk size is 0.
+
+    :param pillow: A ``ConstructedPillow``
+    :param doc_type: Key of ``CHANGE_GENERATORS`` for the changes to generate
+    :param chunk_size: Override the pillow's ``processor_chunk_size``
+    :param pipeline_depth: Override the pillow's ``processor_pipeline_depth``
+    :param seed: Seed for the document contents so runs are comparable
+    """
+
+    def __init__(self, pillow, doc_type, num_changes, domain, chunk_size=None, pipeline_depth=None, seed=0):
+        self.pillow = pillow
+        self.topic, self.change_generator = CHANGE_GENERATORS[doc_type]
+        self.num_changes = num_changes
+        self.domain = domain
+        self.chunk_size = pillow.processor_chunk_size if chunk_size is None else chunk_size
+        self.pipeline_depth = pillow.processor_pipeline_depth if pipeline_depth is None else pipeline_depth
+        self.seed = seed
+
+    def get_changes(self):
+        rand = random.Random(self.seed)
+        return [self.change_generator(self.domain, i, rand) for i in range(self.num_changes)]
+
+    def run(self):
+        """
+        :returns: list of ``StageResult``, one per processor
+        """
+        results = []
+        for processor in self.pillow.processors:
+            # generate new changes each time so documents cached on changes aren't reused
+            change_feed = SyntheticChangeFeed(self.topic, self.get_changes())
+            stage_pillow = ConstructedPillow(
+                name=self.pillow.get_name(),
+                checkpoint=self.pillow.checkpoint,
+                change_feed=change_feed,
+                processor=processor,
+                processor_chunk_size=self.chunk_size,
+                processor_pipeline_depth=self.pipeline_depth,
+            )
+            timer = TimingContext()
+            with capture_stage_seconds() as seconds_by_stage, timer:
+                stage_pillow.process_changes(since=0, forever=False)
+            timed = bool(seconds_by_stage)
+            results.append(StageResult(
+                processor.__class__.__name__,
+                self.num_changes,
+                timer.duration,
+                seconds_by_stage['fetch'] if timed else None,
+                seconds_by_stage['transform'] if timed else None,
+                seconds_by_stage['load'] if timed else None,
+                get_peak_rss_kb(),
+            ))
+        return results
@@ -17,6 +17,8 @@ from corehq.apps.change_feed.exceptions import UnknownDocumentStore
 from corehq.apps.change_feed.topics import validate_offsets
 
 MIN_TIMEOUT = 500
+# how long to wait for a message before yielding None when iterating forever
+IDLE_TIMEOUT = 1000
 
 
 class KafkaChangeFeed(ChangeFeed):
@@ -58,8 +60,12 @@ class KafkaChangeFeed(ChangeFeed):
     ) -> Iterator[Change]:
         """
         ``since`` must be a dictionary of topic partition offsets, or None
+
+        When iterating forever ``None`` is yielded each time no messages have
+        been received for ``IDLE_TIMEOUT`` ms so that the caller can process
+        changes it is holding while the feed is idle.
         """
-        timeout = float('inf') if forever else MIN_TIMEOUT
+        timeout = IDLE_TIMEOUT if forever else MIN_TIMEOUT
         start_from_latest = since is None
         reset = 'largest' if start_from_latest else 'smallest'
         self._init_consumer(timeout, auto_offset_reset=reset)
@@ -87,19 +93,29 @@ class KafkaChangeFeed(ChangeFeed):
                 self.consumer.seek(TopicPartition(topic_partition[0], topic_partition[1]), int(offset))
 
         try:
-            for message in self.consumer:
-                self._processed_topic_offsets[(message.topic, message.partition)] = message.offset
-                yield change_from_kafka_message(message)
+            while True:
+                for message in self.consumer:
+                    self._processed_topic_offsets[(message.topic, message.partition)] = message.offset
+                    yield change_from_kafka_message(message)
+                if not forever:
+                    break
+                yield None
         except StopIteration:
             assert not forever, 'Kafka pillow should not timeout when waiting forever!'
             # no need to do anything since this is just telling us we've reached the end of the feed
 
-    def get_current_checkpoint_offsets(self):
+    def get_current_checkpoint_offsets(self, processed_offsets=None):
+        """
+        :param processed_offsets: offsets to checkpoint instead of the offsets
+                                  of the last changes read from the feed
+        """
         # the way kafka works, the checkpoint should increment by 1 because
         # querying the feed is inclusive of the value passed in.
         latest_offsets = self.get_latest_offsets()
+        if processed_offsets is None:
+            processed_offsets = self.get_processed_offsets()
         ret = {}
-        for topic_partition, sequence in self.get_processed_offsets().items():
+        for topic_partition, sequence in processed_offsets.items():
             if sequence == latest_offsets[topic_partition]:
                 # this topic and partition is totally up to date and if we add 1
                 # then kafka will give us an offset out of range error.
@@ -179,8 +195,9 @@ class KafkaCheckpointEventHandler(PillowCheckpointEventHandler):
         assert isinstance(change_feed, KafkaChangeFeed)
         self.change_feed = change_feed
 
-    def get_new_seq(self, change):
-        return self.change_feed.get_current_checkpoint_offsets()
+    def get_new_seq(self, change, context=None):
+        processed_offsets = context.processed_offsets if context else None
+        return self.change_feed.get_current_checkpoint_offsets(processed_offsets)
 
 
 def change_from_kafka_message(message):
@@ -0,0 +1,68 @@
+from django.core.management import BaseCommand, CommandError
+
+from pillowtop.exceptions import PillowNotFoundError
+from pillowtop.utils import get_pillow_by_name
+
+from corehq.apps.change_feed.benchmark import CHANGE_GENERATORS, PillowBenchmark
+from corehq.util.markup import CSVRowFormatter, SimpleTableWriter, TableRowFormatter
+
+
+class Command(BaseCommand):
+    help = (
+        'Measure the throughput of the processors of a pillow using synthetic '
+        'form, case or ledger changes instead of Kafka. Processors write to the '
+        'configured databases so only run this in a local or test environment.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('pillow_name', help='Name of pillow e.g. case-pillow')
+        parser.add_argument('doc_type', choices=sorted(CHANGE_GENERATORS), help='Type of changes to generate')
+        parser.add_argument('--changes', type=int, default=1000, help='Number of changes to process')
+        parser.add_argument('--domain', default='pillow-benchmark', help='Domain of the generated documents')
+        parser.add_argument('--chunk-size', type=int, help="Override the pillow's processor chunk size")
+        parser.add_argument('--pipeline-depth', type=int, help="Override the pillow's processor pipeline depth")
+        parser.add_argument('--seed', type=int, default=0, help='Seed for the generated documents')
+        parser.add_argument('--csv', action='store_true', help="Write output as CSV")
+
+    def handle(self, pillow_name, doc_type, **options):
+        try:
+            pillow = get_pillow_by_name(pillow_name)
+        except PillowNotFoundError as e:
+            raise CommandError(str(e))
+
+        benchmark = PillowBenchmark(
+            pillow,
+            doc_type,
+            options['changes'],
+            options['domain'],
+            chunk_size=options['chunk_size'],
+            pipeline_depth=options['pipeline_depth'],
+            seed=options['seed'],
+        )
+        results = benchmark.run()
+
+        if options['csv']:
+            row_formatter = CSVRowFormatter()
+        else:
+            row_formatter = TableRowFormatter([40, 10, 10, 10, 10, 10, 12, 14])
+
+        writer = SimpleTableWriter(self.stdout, row_formatter)
+        writer.write_table([
+            'Processor', 'Changes', 'Seconds', 'Fetch', 'Transform', 'Load', 'Changes/sec', 'Peak RSS (KB)'
+        ], [
+            [
+                result.name,
+                result.changes,
+                _format_seconds(result.seconds),
+                _format_seconds(result.fetch_seconds),
+                _format_seconds(result.transform_seconds),
+                _format_seconds(result.load_seconds),
+                '{:.1f}'.format(result.changes / result.seconds) if result.seconds else '-',
+                result.peak_rss_kb,
+            ]
+            for result in results
+        ])
+
+
+def _format_seconds(seconds):
+    return '-' if seconds is None else '{:.2f}'.format(seconds)
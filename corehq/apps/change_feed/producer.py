@@ -8,6 +8,7 @@ from django.conf import settings
 from kafka import KafkaProducer
 
 from corehq.form_processor.exceptions import KafkaPublishingError
+from corehq.util.metrics import metrics_histogram_timer
 from dimagi.utils.logging import notify_exception
 
 CHANGE_PRE_SEND = 'PRE-SEND'
@@ -40,18 +41,8 @@ class ChangeProducer(object):
         return self._producer
 
     def send_change(self, topic, change_meta):
-        if settings.USE_KAFKA_SHORTEST_BACKLOG_PARTITIONER:
-            from corehq.apps.change_feed.partitioners import choose_best_partition_for_topic
-            partition = choose_best_partition_for_topic(topic)
-        else:
-            partition = None
-
-        message = change_meta.to_json()
-        message_json_dump = json.dumps(message).encode('utf-8')
-        change_meta._transaction_id = uuid.uuid4().hex
         try:
-            _audit_log(CHANGE_PRE_SEND, change_meta)
-            future = self.producer.send(topic, message_json_dump, key=change_meta.document_id, partition=partition)
+            future = self._send(topic, change_meta)
             if self.auto_flush:
                 future.get()
                 _audit_log(CHANGE_SENT, change_meta)
@@ -60,14 +51,82 @@ class ChangeProducer(object):
             raise KafkaPublishingError(e)
 
         if not self.auto_flush:
-            on_success = partial(_on_success, change_meta)
-            on_error = partial(_on_error, change_meta)
-            future.add_callback(on_success).add_errback(on_error)
+            self._add_callbacks(future, change_meta)
+
+    def send_changes(self, changes):
+        """Send a batch of changes with a single flush
+
+        All changes are queued with the producer before waiting for any of
+        them to be delivered. Raises ``KafkaPublishingError`` if any of the
+        changes could not be sent.
+
+        :param changes: list of ``(topic, change_meta)`` tuples
+        """
+        if not changes:
+            return
+
+        with metrics_histogram_timer(
+            'commcare.change_feed.producer.batch.duration',
+            timing_buckets=(.01, .05, .1, .5, 1, 5),
+            tags={'batch_size': _get_batch_size_tag(len(changes))},
+        ):
+            sent = []
+            for topic, change_meta in changes:
+                try:
+                    future = self._send(topic, change_meta)
+                except Exception as e:
+                    _audit_log(CHANGE_ERROR, change_meta)
+                    raise KafkaPublishingError(e)
+                sent.append((future, change_meta))
+
+            if not self.auto_flush:
+                for future, change_meta in sent:
+                    self._add_callbacks(future, change_meta)
+                return
+
+            self.flush()
+            error = None
+            for future, change_meta in sent:
+                try:
+                    future.get()
+                except Exception as e:
+                    _audit_log(CHANGE_ERROR, change_meta)
+                    error = error or e
+                else:
+                    _audit_log(CHANGE_SENT, change_meta)
+            if error is not None:
+                raise KafkaPublishingError(error)
+
+    def _send(self, topic, change_meta):
+        change_meta._transaction_id = uuid.uuid4().hex
+        if settings.USE_KAFKA_SHORTEST_BACKLOG_PARTITIONER:
+            from corehq.apps.change_feed.partitioners import choose_best_partition_for_topic
+            partition = choose_best_partition_for_topic(topic)
+        else:
+            partition = None
+
+        message = change_meta.to_json()
+        message_json_dump = json.dumps(message).encode('utf-8')
+        _audit_log(CHANGE_PRE_SEND, change_meta)
+        return self.producer.send(topic, message_json_dump, key=change_meta.document_id, partition=partition)
+
+    @staticmethod
+    def _add_callbacks(future, change_meta):
+        on_success = partial(_on_success, change_meta)
+        on_error = partial(_on_error, change_meta)
+        future.add_callback(on_success).add_errback(on_error)
 
     def flush(self, timeout=None):
         self.producer.flush(timeout=timeout)
 
 
+def _get_batch_size_tag(batch_size):
+    for limit in (1, 10, 100):
+        if batch_size <= limit:
+            return 'lte_{}'.format(limit)
+    return 'gt_100'
+
+
 def _on_success(change_meta, record_metadata):
     _audit_log(CHANGE_SENT, change_meta)
 
@@ -0,0 +1,88 @@
+from django.test import SimpleTestCase
+
+from mock import MagicMock
+
+from pillowtop.pillow.interface import ConstructedPillow
+from pillowtop.processors import BulkPillowProcessor, PillowProcessor
+
+from corehq.apps.change_feed.benchmark import (
+    CHANGE_GENERATORS,
+    PROCESSOR_TIMING_METRIC,
+    PillowBenchmark,
+    SyntheticChangeFeed,
+)
+from corehq.util.metrics import metrics_histogram_timer
+
+
+class CountingProcessor(PillowProcessor):
+
+    def __init__(self):
+        self.doc_ids = []
+
+    def process_change(self, change):
+        self.doc_ids.append(change.get_document()['_id'])
+
+
+class TimedBulkProcessor(BulkPillowProcessor):
+
+    def __init__(self):
+        self.doc_ids = []
+
+    def _timer(self, step):
+        return metrics_histogram_timer(PROCESSOR_TIMING_METRIC, timing_buckets=(1,), tags={'action': step})
+
+    def process_change(self, change):
+        self.doc_ids.append(change.get_document()['_id'])
+
+    def process_changes_chunk(self, changes_chunk):
+        with self._timer('bulk_extract'):
+            docs = [change.get_document() for change in changes_chunk]
+        with self._timer('bulk_transform'):
+            doc_ids = [doc['_id'] for doc in docs]
+        with self._timer('bulk_load'):
+            self.doc_ids.extend(doc_ids)
+        return [], []
+
+
+class SyntheticChangeFeedTest(SimpleTestCase):
+
+    def test_changes(self):
+        for doc_type, (topic, generator) in CHANGE_GENERATORS.items():
+            benchmark = PillowBenchmark(MagicMock(), doc_type, 5, 'bench')
+            changes = benchmark.get_changes()
+            self.assertEqual(5, len(changes))
+            for change in changes:
+                self.assertEqual(topic, change.topic)
+                self.assertEqual('bench', change.metadata.domain)
+                self.assertEqual(change.id, change.get_document()['_id'])
+
+    def test_offsets(self):
+        topic, generator = CHANGE_GENERATORS['case']
+        benchmark = PillowBenchmark(MagicMock(), 'case', 5, 'bench')
+        feed = SyntheticChangeFeed(topic, benchmark.get_changes())
+        self.assertEqual(3, len(list(feed.iter_changes(since=2))))
+        self.assertEqual({(topic, 0): 5}, feed.get_processed_offsets())
+        self.assertEqual({(topic, 0): 5}, feed.get_latest_offsets())
+
+
+class PillowBenchmarkTest(SimpleTestCase):
+
+    def test_run(self):
+        processors = [CountingProcessor(), CountingProcessor()]
+        pillow = ConstructedPillow('benchmark', MagicMock(), MagicMock(), processors)
+        results = PillowBenchmark(pillow, 'form', 10, 'bench').run()
+        self.assertEqual(['CountingProcessor', 'CountingProcessor'], [result.name for result in results])
+        for processor, result in zip(processors, results):
+            self.assertEqual(10, result.changes)
+            self.assertEqual(10, len(processor.doc_ids))
+            self.assertIsNone(result.fetch_seconds)
+        pillow.checkpoint.update_to.assert_not_called()
+
+    def test_run_stage_timings(self):
+        processor = TimedBulkProcessor()
+        pillow = ConstructedPillow('benchmark', MagicMock(), MagicMock(), processor, processor_chunk_size=3)
+        [result] = PillowBenchmark(pillow, 'case', 10, 'bench').run()
+        self.assertEqual(10, len(processor.doc_ids))
+        for seconds in [result.fetch_seconds, result.transform_seconds, result.load_seconds]:
+            self.assertIsNotNone(seconds)
+            self.assertLessEqual(seconds, result.seconds)
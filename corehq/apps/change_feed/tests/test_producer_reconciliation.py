@@ -19,6 +19,7 @@ from corehq.apps.change_feed.producer import (
     KAFKA_AUDIT_LOGGER,
     ChangeProducer,
 )
+from corehq.form_processor.exceptions import KafkaPublishingError
 from corehq.util.test_utils import capture_log_output
 
 
@@ -60,6 +61,53 @@ class TestKafkaAuditLogging(SimpleTestCase):
 
         self._check_logs(logs, meta.document_id, [CHANGE_PRE_SEND, CHANGE_ERROR])
 
+    def test_batch(self):
+        kafka_producer = ChangeProducer()
+        futures = [Future(), Future()]
+        kafka_producer.producer.send = Mock(side_effect=futures)
+        kafka_producer.producer.flush = Mock(side_effect=lambda timeout=None: [
+            future.success(None) for future in futures
+        ])
+        metas = [
+            ChangeMeta(document_id=uuid.uuid4().hex, data_source_type='dummy-type', data_source_name='dummy-name')
+            for i in range(2)
+        ]
+
+        with capture_log_output(KAFKA_AUDIT_LOGGER) as logs:
+            kafka_producer.send_changes([(topics.CASE, meta) for meta in metas])
+
+        kafka_producer.producer.flush.assert_called_once_with(timeout=None)
+        lines = logs.get_output().splitlines()
+        self.assertEqual(4, len(lines))
+        self._check_logs_for_doc(lines, metas[0].document_id, [CHANGE_PRE_SEND, CHANGE_SENT])
+        self._check_logs_for_doc(lines, metas[1].document_id, [CHANGE_PRE_SEND, CHANGE_SENT])
+
+    def test_batch_error(self):
+        kafka_producer = ChangeProducer()
+        futures = [Future(), Future()]
+        kafka_producer.producer.send = Mock(side_effect=futures)
+        kafka_producer.producer.flush = Mock(side_effect=lambda timeout=None: [
+            futures[0].success(None), futures[1].failure(Exception())
+        ])
+        metas = [
+            ChangeMeta(document_id=uuid.uuid4().hex, data_source_type='dummy-type', data_source_name='dummy-name')
+            for i in range(2)
+        ]
+
+        with capture_log_output(KAFKA_AUDIT_LOGGER) as logs:
+            with self.assertRaises(KafkaPublishingError):
+                kafka_producer.send_changes([(topics.CASE, meta) for meta in metas])
+
+        lines = logs.get_output().splitlines()
+        self._check_logs_for_doc(lines, metas[0].document_id, [CHANGE_PRE_SEND, CHANGE_SENT])
+        self._check_logs_for_doc(lines, metas[1].document_id, [CHANGE_PRE_SEND, CHANGE_ERROR])
+
+    def _check_logs_for_doc(self, lines, doc_id, events):
+        doc_lines = [line for line in lines if doc_id in line]
+        self.assertEqual(len(events), len(doc_lines))
+        for event, line in zip(events, doc_lines):
+            self.assertIn(event, line)
+
     def _test_success(self, auto_flush):
         kafka_producer = ChangeProducer(auto_flush=auto_flush)
         with capture_log_output(KAFKA_AUDIT_LOGGER) as logs:
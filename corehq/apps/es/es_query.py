@@ -227,15 +227,25 @@ class ESQuery(object):
             query = query.size(0)
         return query
 
-    def scroll(self):
+    def scroll(self, slice_id=None, max_slices=None):
         """
         Run the query against the scroll api. Returns an iterator yielding each
         document that matches the query.
+
+        Pass ``slice_id`` and ``max_slices`` to only scroll one of
+        ``max_slices`` disjoint slices of the matching documents. Each slice
+        can be scrolled concurrently by a separate process.
         """
         query = deepcopy(self)
         if query._size is None:
             query._size = SCROLL_PAGE_SIZE_LIMIT
-        result = scroll_query(query.index, query.raw_query, es_instance_alias=self.es_instance_alias)
+        result = scroll_query(
+            query.index,
+            query.raw_query,
+            es_instance_alias=self.es_instance_alias,
+            slice_id=slice_id,
+            max_slices=max_slices,
+        )
         return ScanResult(
             result.count,
             (ESQuerySet.normalize_result(query, r) for r in result)
@@ -478,9 +488,9 @@ class ESQuery(object):
         For very large sets of IDs, use ``scroll_ids`` instead"""
         return self.exclude_source().run().doc_ids
 
-    def scroll_ids(self):
+    def scroll_ids(self, slice_id=None, max_slices=None):
         """Returns a generator of all matching ids"""
-        return self.exclude_source().size(5000).scroll()
+        return self.exclude_source().size(5000).scroll(slice_id=slice_id, max_slices=max_slices)
 
 
 class ESQuerySet(object):
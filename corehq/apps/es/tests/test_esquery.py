@@ -1,12 +1,12 @@
 from copy import deepcopy
 from unittest import TestCase
 
-from mock import patch
+from mock import MagicMock, patch
 
 from corehq.apps.es import filters, forms, users
 from corehq.apps.es.es_query import HQESQuery
 from corehq.apps.es.tests.utils import ElasticTestMixin
-from corehq.elastic import SIZE_LIMIT
+from corehq.elastic import SIZE_LIMIT, _get_slice_preference
 
 
 class TestESQuery(ElasticTestMixin, TestCase):
@@ -312,3 +312,21 @@ class TestESQuery(ElasticTestMixin, TestCase):
         }
         query = HQESQuery('forms').domain('test-exclude').exclude_source()
         self.checkQuery(query, json_output)
+
+
+class TestSlicePreference(TestCase):
+
+    def _client(self, num_shards):
+        client = MagicMock()
+        client.search_shards.return_value = {'shards': [[{'shard': i}] for i in range(num_shards)]}
+        return client
+
+    def test_slices_cover_all_shards(self):
+        client = self._client(5)
+        preferences = [_get_slice_preference(client, 'forms', slice_id, 2) for slice_id in range(2)]
+        self.assertEqual(preferences, ['_shards:0,2,4', '_shards:1,3'])
+
+    def test_more_slices_than_shards(self):
+        client = self._client(2)
+        self.assertEqual(_get_slice_preference(client, 'forms', 1, 3), '_shards:1')
+        self.assertIsNone(_get_slice_preference(client, 'forms', 2, 3))
@@ -30,6 +30,9 @@ from corehq.util.datadog.gauges import datadog_track_errors
 from corehq.util.datadog.utils import DAY_SCALE_TIME_BUCKETS, load_counter
 from corehq.util.files import TransientTempfile, safe_filename
 
+# number of rows buffered per table before they are written
+EXPORT_WRITE_BATCH_SIZE = 1000
+
 
 class ExportFile(object):
     # This is essentially coppied from couchexport.files.ExportFiles
@@ -108,14 +111,18 @@ class _ExportWriter(object):
         :param row: An ExportRow
         """
         return self.writer.write([
-            (table, [FormattedRow(
-                data=row.data,
-                hyperlink_column_indices=row.hyperlink_column_indices,
-                skip_excel_formatting=row.skip_excel_formatting
-                if hasattr(row, 'skip_excel_formatting') else ()
-            )])
+            (table, [_get_formatted_row(row)])
         ])
 
+    def write_rows(self, table, rows):
+        """
+        Write a block of rows to the given table of the export.
+        _Writer must be opened first.
+        :param table: A TableConfiguration
+        :param rows: A list of ExportRows
+        """
+        return self.writer.write_rows(table, [_get_formatted_row(row) for row in rows])
+
     def get_preview(self):
         return self.writer.get_preview()
 
@@ -256,6 +263,31 @@ class _PaginatedExportWriter(object):
         :param table: A TableConfiguration
         :param row: An ExportRow
         """
+        self._rows_left_on_page(table)
+        self.writer.write([(self._paged_table_index(table), [FormattedRow(data=row.data)])])
+        self.rows_written[table] += 1
+
+    def write_rows(self, table, rows):
+        """
+        Write a block of rows to the given table of the export, splitting
+        them across pages like write().
+        :param table: A TableConfiguration
+        :param rows: A list of ExportRows
+        """
+        while rows:
+            page_rows = rows[:self._rows_left_on_page(table)]
+            rows = rows[len(page_rows):]
+            self.writer.write_rows(
+                self._paged_table_index(table),
+                [FormattedRow(data=row.data) for row in page_rows]
+            )
+            self.rows_written[table] += len(page_rows)
+
+    def _rows_left_on_page(self, table):
+        """
+        Return the number of rows that can still be written to the current
+        page of the table, starting a new page if the current one is full.
+        """
         if self.rows_written[table] >= MAX_EXPORTABLE_ROWS * (self.pages[table] + 1):
             self.pages[table] += 1
             self.writer.add_table(
@@ -263,9 +295,16 @@ class _PaginatedExportWriter(object):
                 self._get_paginated_headers()[self._paged_table_index(table)][0],
                 table_title=self._get_paginated_table_titles()[self._paged_table_index(table)],
             )
+        return MAX_EXPORTABLE_ROWS * (self.pages[table] + 1) - self.rows_written[table]
 
-        self.writer.write([(self._paged_table_index(table), [FormattedRow(data=row.data)])])
-        self.rows_written[table] += 1
+
+def _get_formatted_row(row):
+    return FormattedRow(
+        data=row.data,
+        hyperlink_column_indices=row.hyperlink_column_indices,
+        skip_excel_formatting=row.skip_excel_formatting
+        if hasattr(row, 'skip_excel_formatting') else ()
+    )
 
 
 def get_export_writer(export_instances, temp_path, allow_pagination=True):
@@ -318,10 +357,10 @@ def get_export_file(export_instances, filters, temp_path, progress_tracker=None)
     return ExportFile(writer.path, writer.format)
 
 
-def get_export_documents(export_instance, filters):
+def get_export_documents(export_instance, filters, slice_id=None, max_slices=None):
     # Pull doc ids from elasticsearch and stream to disk
     query = _get_export_query(export_instance, filters)
-    return iter_es_docs_from_query(query)
+    return iter_es_docs_from_query(query, slice_id=slice_id, max_slices=max_slices)
 
 
 def _get_export_query(export_instance, filters):
@@ -353,16 +392,21 @@ def write_export_instance(writer, export_instance, documents, progress_tracker=N
     total_bytes = 0
     total_rows = 0
     track_load = load_counter(export_instance.type, "export", export_instance.domain)
+    tables = export_instance.selected_tables
+    split_columns = export_instance.split_multiselects
+    transform_dates = export_instance.transform_dates
+    # rows are buffered per table and handed to the writer in blocks
+    rows_by_table = {table: [] for table in tables}
 
     for row_number, doc in enumerate(documents):
         total_bytes += sys.getsizeof(doc)
-        for table in export_instance.selected_tables:
+        for table in tables:
             try:
                 rows = table.get_rows(
                     doc,
                     row_number,
-                    split_columns=export_instance.split_multiselects,
-                    transform_dates=export_instance.transform_dates,
+                    split_columns=split_columns,
+                    transform_dates=transform_dates,
                 )
             except Exception as e:
                 notify_exception(None, "Error exporting doc", details={
@@ -374,10 +418,11 @@ def write_export_instance(writer, export_instance, documents, progress_tracker=N
                 e.sentry_capture = False
                 raise
 
-            for row in rows:
-                # It might be bad to write one row at a time when you can do more (from a performance perspective)
-                # Regardless, we should handle the batching of rows in the _Writer class, not here.
-                writer.write(table, row)
+            table_rows = rows_by_table[table]
+            table_rows.extend(rows)
+            if len(table_rows) >= EXPORT_WRITE_BATCH_SIZE:
+                writer.write_rows(table, table_rows)
+                rows_by_table[table] = []
 
             total_rows += len(rows)
 
@@ -385,6 +430,10 @@ def write_export_instance(writer, export_instance, documents, progress_tracker=N
         if progress_tracker:
             DownloadBase.set_progress(progress_tracker, row_number + 1, documents.count)
 
+    for table, table_rows in rows_by_table.items():
+        if table_rows:
+            writer.write_rows(table, table_rows)
+
     end = _time_in_milliseconds()
     tags = {'format': writer.format}
     _record_datadog_export_duration(end - start, total_bytes, total_rows, tags)
@@ -26,6 +26,13 @@ class Command(BaseCommand):
             default=multiprocessing.cpu_count() - 1,
             help='Number of parallel processes to run.'
         )
+        parser.add_argument(
+            '--slices',
+            type=int,
+            dest='num_slices',
+            default=1,
+            help='Number of slices of the export docs to dump from Elasticsearch concurrently.'
+        )
 
     def handle(self, **options):
         if __debug__:
@@ -34,7 +41,8 @@ class Command(BaseCommand):
         export_id = options.pop('export_id')
         page_size = options.pop('page_size')
         processes = options.pop('processes')
+        num_slices = options.pop('num_slices')
 
-        rebuild_export_mutiprocess(export_id, processes, page_size)
+        rebuild_export_mutiprocess(export_id, processes, page_size, num_slices)
 
         self.stdout.write(self.style.SUCCESS('Rebuild Complete'))
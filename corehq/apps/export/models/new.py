@@ -502,6 +502,9 @@ class TableConfiguration(DocumentSchema, ReadablePathMixin):
         assert domain is not None, 'Form or Case must be associated with domain'
         assert document_id is not None, 'Form or Case must have an id'
 
+        # resolve the columns once rather than for every repeat group row
+        selected_columns = self.selected_columns
+        hyperlink_column_indices = None if as_json else self.get_hyperlink_column_indices(split_columns)
         rows = []
         for doc_row in sub_documents:
             doc, row_index = doc_row.doc, doc_row.row
@@ -509,7 +512,7 @@ class TableConfiguration(DocumentSchema, ReadablePathMixin):
             row_data = {} if as_json else []
             col_index = 0
             skip_excel_formatting = []
-            for col in self.selected_columns:
+            for col in selected_columns:
                 val = col.get_value(
                     domain,
                     document_id,
@@ -549,7 +552,7 @@ class TableConfiguration(DocumentSchema, ReadablePathMixin):
             else:
                 rows.append(ExportRow(
                     data=row_data,
-                    hyperlink_column_indices=self.get_hyperlink_column_indices(split_columns),
+                    hyperlink_column_indices=hyperlink_column_indices,
                     skip_excel_formatting=skip_excel_formatting
                 ))
         return rows
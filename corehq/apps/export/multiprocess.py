@@ -11,6 +11,8 @@ See the 'process_skipped_pages' management command for an example.
 
 The export works as follows:
   * Dump raw docs from ES into files of size N docs
+    * With num_slices > 1 each slice of the docs is dumped concurrently
+      by a separate process
   * Once each file is complete add it to a multiprocessing Queue
   * Pool of X processes listen to queue and process the dump file
   * Results returned back to the main process
@@ -81,45 +83,57 @@ class QueuedResult(RetryResult):
 
 
 class OutputPaginator(object):
-    """Helper class to paginate raw export output"""
-    def __init__(self, export_id, start_page_count=0):
+    """Helper class to paginate raw export output
+
+    :param page_step: Increment between page numbers. Used to give the
+    paginators of concurrently dumped slices distinct page numbers.
+    """
+    def __init__(self, export_id, start_page_count=0, page_step=1):
         self.export_id = export_id
         self.page = start_page_count
+        self.page_step = page_step
         self.page_size = 0
         self.file = None
+        self._fileobj = None
 
     def __enter__(self):
         self._new_file()
 
     def _new_file(self):
         if self.file:
-            self.file.close()
+            self._close_file()
         prefix = '{}{}_'.format(TEMP_FILE_PREFIX, self.export_id)
-        fileobj = tempfile.NamedTemporaryFile(prefix=prefix, mode='wb', delete=False)
-        self.path = fileobj.name
-        self.file = gzip.GzipFile(fileobj=fileobj)
+        self._fileobj = tempfile.NamedTemporaryFile(prefix=prefix, mode='wb', delete=False)
+        self.path = self._fileobj.name
+        self.file = gzip.GzipFile(fileobj=self._fileobj, mode='wb')
 
-    def __exit__(self, exc_type, exc_val, exc_tb):
+    def _close_file(self):
+        # GzipFile does not close a file object that is passed to it
         self.file.close()
+        self._fileobj.close()
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self._close_file()
         if exc_type is not None:
             os.remove(self.path)
         self.file = None
+        self._fileobj = None
         self.path = None
 
     def next_page(self):
-        self.page += 1
+        self.page += self.page_step
         self.page_size = 0
         self._new_file()
 
     def write(self, doc):
         self.page_size += 1
-        self.file.write('{}\n'.format(json.dumps(doc)))
+        self.file.write('{}\n'.format(json.dumps(doc)).encode('utf-8'))
 
     def get_result(self):
         return RetryResult(self.page, self.path, self.page_size, 0)
 
 
-def rebuild_export_mutiprocess(export_id, num_processes, page_size=100000):
+def rebuild_export_mutiprocess(export_id, num_processes, page_size=100000, num_slices=1):
     assert num_processes > 0
 
     export_instance = get_properly_wrapped_export_instance(export_id)
@@ -129,12 +143,17 @@ def rebuild_export_mutiprocess(export_id, num_processes, page_size=100000):
     paginator = OutputPaginator(export_id)
 
     logger.info('Starting data dump of {} docs'.format(total_docs))
-    run_multiprocess_exporter(exporter, filters, paginator, page_size)
+    run_multiprocess_exporter(exporter, filters, paginator, page_size, num_slices)
+
 
+def _log_page_dumped(paginator):
+    logger.info('  Dump page {} complete: {} docs'.format(paginator.page, paginator.page_size))
 
-def run_multiprocess_exporter(exporter, filters, paginator, page_size):
-    def _log_page_dumped(paginator):
-        logger.info('  Dump page {} complete: {} docs'.format(paginator.page, paginator.page_size))
+
+def run_multiprocess_exporter(exporter, filters, paginator, page_size, num_slices=1):
+    if num_slices > 1:
+        _run_sliced_multiprocess_exporter(exporter, filters, paginator, page_size, num_slices)
+        return
 
     with exporter, paginator:
         for doc in get_export_documents(exporter.export_instance, filters):
@@ -150,6 +169,96 @@ def run_multiprocess_exporter(exporter, filters, paginator, page_size):
     exporter.wait_till_completion()
 
 
+class SliceDumpError(Exception):
+    pass
+
+
+SliceDumpComplete = namedtuple('SliceDumpComplete', 'slice_id success')
+
+# Seconds to wait for a page from the slice dumpers before checking
+# whether any of them has died without reporting back
+SLICE_DUMP_POLL_TIMEOUT = 5
+
+
+def _run_sliced_multiprocess_exporter(exporter, filters, paginator, page_size, num_slices):
+    """Dump each slice of the export docs in its own process
+
+    Pages are passed to the exporter as soon as any slice has dumped them
+    so processing is not held up by a single serial ES scroll.
+    """
+    page_queue = multiprocessing.Queue()
+    dumpers = [
+        multiprocessing.Process(target=_dump_export_slice, args=(
+            exporter.export_instance,
+            filters,
+            OutputPaginator(paginator.export_id, paginator.page + slice_id, page_step=num_slices),
+            page_size,
+            slice_id,
+            num_slices,
+            page_queue,
+        ))
+        for slice_id in range(num_slices)
+    ]
+    with exporter:
+        for dumper in dumpers:
+            dumper.start()
+        failed_slices = []
+        running_slices = set(range(num_slices))
+        while running_slices:
+            try:
+                result = page_queue.get(timeout=SLICE_DUMP_POLL_TIMEOUT)
+            except Empty:
+                # A dumper that was killed (e.g. by the OOM killer) never
+                # reports back, so treat it as a failed slice
+                for slice_id in sorted(running_slices):
+                    if dumpers[slice_id].exitcode:
+                        logger.error('Dump process for slice {} exited with code {}'.format(
+                            slice_id, dumpers[slice_id].exitcode))
+                        running_slices.discard(slice_id)
+                        failed_slices.append(slice_id)
+                continue
+
+            if isinstance(result, SliceDumpComplete):
+                if result.slice_id in running_slices:
+                    running_slices.discard(result.slice_id)
+                    if not result.success:
+                        failed_slices.append(result.slice_id)
+            else:
+                exporter.process_page(result)
+        for dumper in dumpers:
+            dumper.join()
+        if failed_slices:
+            raise SliceDumpError('Dump failed for slices {}'.format(sorted(failed_slices)))
+
+    exporter.wait_till_completion()
+
+
+def _dump_export_slice(export_instance, filters, paginator, page_size, slice_id, num_slices, page_queue):
+    success = False
+    try:
+        docs = get_export_documents(export_instance, filters, slice_id=slice_id, max_slices=num_slices)
+        last_page = None
+        with paginator:
+            for doc in docs:
+                paginator.write(doc)
+                if paginator.page_size == page_size:
+                    _log_page_dumped(paginator)
+                    page = paginator.get_result()
+                    # pages are only queued once the paginator has closed their file
+                    paginator.next_page()
+                    page_queue.put(page)
+            if paginator.page_size:
+                _log_page_dumped(paginator)
+                last_page = paginator.get_result()
+        if last_page is not None:
+            page_queue.put(last_page)
+        success = True
+    except Exception:
+        logger.exception('Error dumping export slice {} of {}'.format(slice_id, num_slices))
+    finally:
+        page_queue.put(SliceDumpComplete(slice_id, success))
+
+
 def run_export_with_logging(export_instance, page_number, dump_path, doc_count, attempts):
     """Log any exceptions here since logging on the other side of the process queue
     won't show the traceback
@@ -0,0 +1,103 @@
+import gzip
+import json
+import os
+
+from django.test import SimpleTestCase
+
+from mock import patch
+
+from corehq.apps.export.multiprocess import (
+    OutputPaginator,
+    SliceDumpError,
+    run_multiprocess_exporter,
+)
+
+DOCS_PER_SLICE = 5
+
+
+def _get_slice_documents(export_instance, filters, slice_id=None, max_slices=None):
+    for i in range(DOCS_PER_SLICE):
+        yield {'slice': slice_id, 'doc': i}
+
+
+def _get_documents_failing_slice(export_instance, filters, slice_id=None, max_slices=None):
+    if slice_id == 1:
+        raise Exception('ES is down')
+    return _get_slice_documents(export_instance, filters, slice_id, max_slices)
+
+
+def _get_documents_killed_slice(export_instance, filters, slice_id=None, max_slices=None):
+    if slice_id == 1:
+        # exit without reporting back, as if the process was killed
+        os._exit(1)
+    return _get_slice_documents(export_instance, filters, slice_id, max_slices)
+
+
+class StubExporter(object):
+    """Reads the dumped pages instead of processing them in a pool"""
+
+    export_instance = None
+
+    def __init__(self):
+        self.pages = {}
+        self.completed = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        pass
+
+    def process_page(self, page_info):
+        with gzip.open(page_info.path) as file:
+            docs = [json.loads(line.decode()) for line in file]
+        os.remove(page_info.path)
+        self.pages[page_info.page] = (page_info.page_size, docs)
+
+    def wait_till_completion(self):
+        self.completed = True
+
+
+@patch('corehq.apps.export.multiprocess.SLICE_DUMP_POLL_TIMEOUT', 0.1)
+class SlicedMultiprocessExporterTest(SimpleTestCase):
+
+    def _run_export(self, exporter):
+        run_multiprocess_exporter(exporter, None, OutputPaginator('export-id'), page_size=2, num_slices=2)
+
+    @patch('corehq.apps.export.multiprocess.get_export_documents', _get_slice_documents)
+    def test_slices(self):
+        exporter = StubExporter()
+        self._run_export(exporter)
+
+        self.assertTrue(exporter.completed)
+        # slices are paginated with distinct, interleaved page numbers
+        self.assertEqual(sorted(exporter.pages), [0, 1, 2, 3, 4, 5])
+        self.assertEqual(
+            [exporter.pages[page][0] for page in range(6)],
+            [2, 2, 2, 2, 1, 1]
+        )
+        docs = [doc for page in range(6) for doc in exporter.pages[page][1]]
+        self.assertEqual(
+            sorted((doc['slice'], doc['doc']) for doc in docs),
+            [(slice_id, i) for slice_id in range(2) for i in range(DOCS_PER_SLICE)]
+        )
+        self.assertEqual(
+            {doc['slice'] for page in range(0, 6, 2) for doc in exporter.pages[page][1]},
+            {0}
+        )
+
+    @patch('corehq.apps.export.multiprocess.get_export_documents', _get_documents_failing_slice)
+    def test_failed_slice(self):
+        exporter = StubExporter()
+        with self.assertRaisesRegex(SliceDumpError, r'\[1\]'):
+            self._run_export(exporter)
+        self.assertFalse(exporter.completed)
+        self.assertEqual(sorted(exporter.pages), [0, 2, 4])
+
+    @patch('corehq.apps.export.multiprocess.get_export_documents', _get_documents_killed_slice)
+    def test_killed_slice(self):
+        exporter = StubExporter()
+        with self.assertRaisesRegex(SliceDumpError, r'\[1\]'):
+            self._run_export(exporter)
+        self.assertFalse(exporter.completed)
+        self.assertEqual(sorted(exporter.pages), [0, 2, 4])
@@ -6,8 +6,11 @@ from django.core.management.base import BaseCommand, CommandError
 import jsonobject
 
 from dimagi.ext.jsonobject import JsonObject
+from dimagi.utils.chunked import chunked
 
+from corehq.form_processor.backends.sql.dbaccessors import FormAccessorSQL
 from corehq.form_processor.interfaces.dbaccessors import FormAccessors
+from corehq.form_processor.utils.general import should_use_sql_backend
 
 
 class FormMetadata(JsonObject):
@@ -36,28 +39,44 @@ class Command(BaseCommand):
 
         form_accessors = FormAccessors(domain)
         form_ids = form_accessors.get_all_form_ids_in_domain()
-        for form in form_accessors.iter_forms(form_ids):
-            form_path = os.path.join(folder_path, form.form_id)
-            if not os.path.exists(form_path):
-                os.mkdir(form_path)
-
-            form_meta = FormMetadata(
-                user_id=form.user_id,
-                received_on=form.received_on,
-                app_id=form.app_id,
-                build_id=form.build_id,
-                attachments=list(form.attachments.keys()),
-                auth_context=form.auth_context,
-            )
-
-            with open(os.path.join(form_path, 'metadata.json'), 'w', encoding='utf-8') as meta:
-                form_meta_data = json.dumps(form_meta.to_json())
-                meta.write(form_meta_data)
-
-            xml = form.get_xml()
-            with open(os.path.join(form_path, 'form.xml'), 'wb') as f:
-                f.write(xml)
-
-            for name, meta in form.attachments.items():
-                with open(os.path.join(form_path, name), 'wb') as f:
-                    f.write(form.get_attachment(name))
+        for form_ids_chunk in chunked(form_ids, 100):
+            form_ids_chunk = list(form_ids_chunk)
+            xml_by_form_id = _get_xml_by_form_id(domain, form_ids_chunk)
+            for form in form_accessors.get_forms(form_ids_chunk):
+                xml = xml_by_form_id.get(form.form_id)
+                if xml is None:
+                    xml = form.get_xml()
+                _write_form(folder_path, form, xml)
+
+
+def _get_xml_by_form_id(domain, form_ids):
+    if not should_use_sql_backend(domain):
+        return {}
+    # read the XML of the whole chunk from the blob db at once
+    return dict(FormAccessorSQL.iter_form_xml(form_ids))
+
+
+def _write_form(folder_path, form, xml):
+    form_path = os.path.join(folder_path, form.form_id)
+    if not os.path.exists(form_path):
+        os.mkdir(form_path)
+
+    form_meta = FormMetadata(
+        user_id=form.user_id,
+        received_on=form.received_on,
+        app_id=form.app_id,
+        build_id=form.build_id,
+        attachments=list(form.attachments.keys()),
+        auth_context=form.auth_context,
+    )
+
+    with open(os.path.join(form_path, 'metadata.json'), 'w', encoding='utf-8') as meta:
+        form_meta_data = json.dumps(form_meta.to_json())
+        meta.write(form_meta_data)
+
+    with open(os.path.join(form_path, 'form.xml'), 'wb') as f:
+        f.write(xml)
+
+    for name, meta in form.attachments.items():
+        with open(os.path.join(form_path, name), 'wb') as f:
+            f.write(form.get_attachment(name))
@@ -20,8 +20,10 @@ from corehq.apps.hqcase.dbaccessors import (
     get_case_ids_in_domain,
     get_case_ids_in_domain_by_owner,
     get_cases_in_domain,
+    get_cases_in_domain_by_external_ids,
 )
 from corehq.elastic import EsMeta, get_es_new
+from corehq.form_processor.backends.couch.dbaccessors import CaseAccessorCouch
 from corehq.form_processor.tests.utils import FormProcessorTestUtils
 from corehq.pillows.mappings.case_mapping import CASE_INDEX_INFO
 from corehq.pillows.mappings.domain_mapping import DOMAIN_INDEX_INFO
@@ -38,13 +40,14 @@ class DBAccessorsTest(TestCase):
         cls.domain = 'lalksdjflakjsdf'
         cases = [
             CommCareCase(domain=cls.domain, type='type1', name='Alice', user_id='XXX',
-                         prop_a=True, prop_b=True),
+                         external_id='ext-a', prop_a=True, prop_b=True),
             CommCareCase(domain=cls.domain, type='type2', name='Bob', user_id='XXX',
-                         prop_a=True, prop_c=True),
-            CommCareCase(domain=cls.domain, type='type1', name='Candice', user_id='ZZZ'),
+                         external_id='ext-a', prop_a=True, prop_c=True),
+            CommCareCase(domain=cls.domain, type='type1', name='Candice', user_id='ZZZ',
+                         external_id='ext-c'),
             CommCareCase(domain=cls.domain, type='type1', name='Derek', user_id='XXX', closed=True),
             CommCareCase(domain='maleficent', type='type1', name='Mallory', user_id='YYY',
-                         prop_y=True)
+                         external_id='ext-a', prop_y=True)
         ]
         cls.forms, cls.cases = create_real_cases_from_dummy_cases(cases)
         assert len(cls.cases) == len(cases)
@@ -96,6 +99,21 @@ class DBAccessorsTest(TestCase):
              if case.domain == self.domain and case.type == 'type1'],
         )
 
+    def test_get_cases_in_domain_by_external_ids(self):
+        self.assert_doc_list_equal(
+            get_cases_in_domain_by_external_ids(self.domain, ['ext-a', 'ext-c', 'ext-missing']),
+            [case for case in self.cases
+             if case.domain == self.domain and case.external_id in ('ext-a', 'ext-c')]
+        )
+
+    def test_get_cases_by_external_ids__type(self):
+        self.assert_doc_list_equal(
+            CaseAccessorCouch.get_cases_by_external_ids(self.domain, ['ext-a', 'ext-c'], case_type='type1'),
+            [case for case in self.cases
+             if case.domain == self.domain and case.type == 'type1'
+                and case.external_id in ('ext-a', 'ext-c')]
+        )
+
     def test_get_open_case_ids_in_domain(self):
         # this is actually in the 'case' app, but testing here
         self.assertEqual(
@@ -37,6 +37,7 @@ from corehq.apps.app_manager.dbaccessors import (
 from corehq.apps.app_manager.util import LatestAppInfo
 from corehq.apps.builds.utils import get_default_build_spec
 from corehq.apps.case_search.models import QueryMergeException
+from corehq.apps.case_search.result_cache import get_case_search_result_cache
 from corehq.apps.case_search.utils import CaseSearchCriteria
 from corehq.apps.domain.decorators import (
     check_domain_migration,
@@ -107,10 +108,19 @@ def search(request, domain):
         search_es = case_search_criteria.search_es
     except QueryMergeException as e:
         return _handle_query_merge_exception(request, e)
-    try:
-        hits = search_es.run().raw_hits
-    except Exception as e:
-        return _handle_es_exception(request, e, case_search_criteria.query_addition_debug_details)
+    result_cache = get_case_search_result_cache()
+    if result_cache is not None:
+        cache_key = result_cache.get_cache_key(domain, case_type, search_es.raw_query)
+        hits = result_cache.get(cache_key, domain)
+    else:
+        hits = None
+    if hits is None:
+        try:
+            hits = search_es.run().raw_hits
+        except Exception as e:
+            return _handle_es_exception(request, e, case_search_criteria.query_addition_debug_details)
+        if result_cache is not None:
+            result_cache.set(cache_key, hits)
 
     # Even if it's a SQL domain, we just need to render the hits as cases, so CommCareCase.wrap will be fine
     cases = [CommCareCase.wrap(flatten_result(result, include_score=True)) for result in hits]
@@ -1,8 +1,13 @@
+import base64
 import json
 import os
+import uuid
+from datetime import datetime
 from io import BytesIO
 
 from django.conf import settings
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.template.loader import render_to_string
 from django.test import TestCase
 from django.test.client import Client
 from django.test.utils import override_settings
@@ -10,16 +15,29 @@ from django.urls import reverse
 
 from mock import patch
 
+from casexml.apps.case.mock import CaseBlock
+from couchforms import openrosa_response
+from dimagi.utils.parsing import json_format_datetime
+
 from corehq.apps.domain.shortcuts import create_domain
-from corehq.apps.receiverwrapper.util import submit_form_locally
+from corehq.apps.hqcase.utils import SYSTEM_FORM_XMLNS
+from corehq.apps.receiverwrapper.util import (
+    DEMO_SUBMIT_MODE,
+    submit_form_locally,
+    submit_forms_locally,
+)
 from corehq.apps.users.models import CommCareUser
-from corehq.form_processor.interfaces.dbaccessors import FormAccessors
+from corehq.apps.users.util import DEMO_USER_ID
+from corehq.form_processor.interfaces.dbaccessors import (
+    CaseAccessors,
+    FormAccessors,
+)
 from corehq.form_processor.tests.utils import (
     FormProcessorTestUtils,
     use_sql_backend,
 )
 from corehq.util.json import CommCareJSONEncoder
-from corehq.util.test_utils import TestFileMixin, softer_assert
+from corehq.util.test_utils import TestFileMixin, flag_enabled, softer_assert
 
 
 class BaseSubmissionTest(TestCase):
@@ -296,3 +314,153 @@ class SubmissionSQLTransactionsTest(TestCase, TestFileMixin):
 
         transaction = result.cases[0].get_transaction_by_form_id(result.xform.form_id)
         self.assertTrue(transaction.is_form_transaction)
+
+
+@use_sql_backend
+class SubmitFormsLocallyTest(TestCase):
+    domain = 'test-bulk-submission'
+
+    def tearDown(self):
+        FormProcessorTestUtils.delete_all_xforms(self.domain)
+        FormProcessorTestUtils.delete_all_cases(self.domain)
+        super(SubmitFormsLocallyTest, self).tearDown()
+
+    def _get_form_xml(self, case_block):
+        return render_to_string('hqcase/xml/case_block.xml', {
+            'xmlns': SYSTEM_FORM_XMLNS,
+            'case_block': case_block.as_text(),
+            'time': json_format_datetime(datetime.utcnow()),
+            'uid': uuid.uuid4().hex,
+            'username': 'system',
+            'user_id': '',
+            'device_id': '',
+        })
+
+    def test_forms_updating_same_case(self):
+        case_id = uuid.uuid4().hex
+        results = submit_forms_locally([
+            self._get_form_xml(CaseBlock(case_id, create=True, case_type='person', update={'age': '1'})),
+            self._get_form_xml(CaseBlock(case_id, update={'age': '2'})),
+            self._get_form_xml(CaseBlock(case_id, update={'age': '3'})),
+        ], self.domain)
+
+        self.assertEqual(['normal'] * 3, [result.submission_type for result in results])
+        case = CaseAccessors(self.domain).get_case(case_id)
+        self.assertEqual('3', case.get_case_property('age'))
+        self.assertEqual([result.xform.form_id for result in results], case.xform_ids)
+
+    def test_form_error_in_batch(self):
+        case_id = uuid.uuid4().hex
+        results = submit_forms_locally([
+            self._get_form_xml(CaseBlock(case_id, create=True, case_type='person')),
+            self._get_form_xml(CaseBlock(uuid.uuid4().hex, index={'parent': ('person', 'missing')})),
+            self._get_form_xml(CaseBlock(case_id, update={'age': '2'})),
+        ], self.domain)
+
+        self.assertEqual(['normal', 'error', 'normal'], [result.submission_type for result in results])
+        case = CaseAccessors(self.domain).get_case(case_id)
+        self.assertEqual('2', case.get_case_property('age'))
+
+    def test_form_error_changes_not_saved(self):
+        case_id = uuid.uuid4().hex
+        results = submit_forms_locally([
+            self._get_form_xml(CaseBlock(case_id, create=True, case_type='person', update={'age': '1'})),
+            self._get_form_xml(CaseBlock(
+                case_id,
+                update={'age': 'bad', 'color': 'bad'},
+                index={'parent': ('person', 'missing')},
+            )),
+            self._get_form_xml(CaseBlock(case_id, update={'age': '3'})),
+        ], self.domain)
+
+        self.assertEqual(['normal', 'error', 'normal'], [result.submission_type for result in results])
+        case = CaseAccessors(self.domain).get_case(case_id)
+        self.assertEqual('3', case.get_case_property('age'))
+        self.assertIsNone(case.get_case_property('color'))
+        self.assertEqual([], case.indices)
+        self.assertEqual([results[0].xform.form_id, results[2].xform.form_id], case.xform_ids)
+
+
+@use_sql_backend
+@flag_enabled('BULK_FORM_SUBMISSION')
+class BulkPostTest(TestCase):
+    domain = 'test-bulk-post'
+
+    @classmethod
+    def setUpClass(cls):
+        super(BulkPostTest, cls).setUpClass()
+        cls.domain_obj = create_domain(cls.domain)
+        cls.user = CommCareUser.create(cls.domain, 'bulk-post-user', 'secret')
+        cls.demo_user = CommCareUser.create(cls.domain, 'bulk-post-demo-user', 'secret')
+        cls.demo_user.is_demo_user = True
+        cls.demo_user.save()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.user.delete()
+        cls.demo_user.delete()
+        cls.domain_obj.delete()
+        super(BulkPostTest, cls).tearDownClass()
+
+    def tearDown(self):
+        FormProcessorTestUtils.delete_all_xforms(self.domain)
+        super(BulkPostTest, self).tearDown()
+
+    def _get_form_xml(self, user_id):
+        return render_to_string('hqcase/xml/case_block.xml', {
+            'xmlns': 'http://commcarehq.org/test/submit',
+            'case_block': '',
+            'time': json_format_datetime(datetime.utcnow()),
+            'uid': uuid.uuid4().hex,
+            'username': 'test',
+            'user_id': user_id,
+            'device_id': '',
+        })
+
+    def _bulk_post(self, forms, url_params=''):
+        auth = base64.b64encode(b'bulk-post-user:secret').decode('utf-8')
+        client = Client(HTTP_AUTHORIZATION='Basic ' + auth)
+        url = reverse('receiver_bulk_post', args=[self.domain]) + url_params
+        files = [SimpleUploadedFile('form.xml', form.encode('utf-8')) for form in forms]
+        response = client.post(url, {'xml_submission_file': files})
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def _assert_results(self, results, expected_responses):
+        self.assertEqual(
+            [(result['status'], result['response']) for result in results],
+            [(response.status_code, response.content.decode('utf-8')) for response in expected_responses]
+        )
+        form_ids = [result['form_id'] for result in results if result['form_id']]
+        self.assertEqual(
+            sorted(form_ids),
+            sorted(FormAccessors(self.domain).get_all_form_ids_in_domain())
+        )
+
+    def test_submit_mode_demo(self):
+        results = self._bulk_post([
+            self._get_form_xml(self.user.user_id),
+            self._get_form_xml(DEMO_USER_ID),
+            self._get_form_xml(self.user.user_id),
+        ], '?submit_mode={}'.format(DEMO_SUBMIT_MODE))
+
+        ignored = openrosa_response.SUBMISSION_IGNORED_RESPONSE
+        self._assert_results(results, [
+            ignored, openrosa_response.get_openarosa_success_response(), ignored
+        ])
+        self.assertEqual([None, None], [results[0]['form_id'], results[2]['form_id']])
+        self.assertIsNotNone(results[1]['form_id'])
+
+    @patch('corehq.apps.receiverwrapper.util.IGNORE_ALL_DEMO_USER_SUBMISSIONS', True)
+    def test_ignore_all_demo_user_submissions(self):
+        results = self._bulk_post([
+            self._get_form_xml(self.demo_user.user_id),
+            self._get_form_xml(self.user.user_id),
+        ])
+
+        self._assert_results(results, [
+            openrosa_response.SUBMISSION_IGNORED_RESPONSE,
+            openrosa_response.get_openarosa_success_response(),
+        ])
+        self.assertIsNone(results[0]['form_id'])
+        self.assertIsNotNone(results[1]['form_id'])
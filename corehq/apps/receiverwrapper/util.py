@@ -14,7 +14,7 @@ from corehq.apps.app_manager.dbaccessors import get_app
 from corehq.apps.app_manager.models import ApplicationBase
 from corehq.apps.receiverwrapper.exceptions import LocalSubmissionError
 from corehq.apps.users.models import CommCareUser
-from corehq.form_processor.submission_post import SubmissionPost
+from corehq.form_processor.submission_post import SubmissionPost, process_submission_batch
 from corehq.form_processor.utils import convert_xform_to_json
 from corehq.util.quickcache import quickcache
 from corehq.util.soft_assert import soft_assert
@@ -43,6 +43,29 @@ def submit_form_locally(instance, domain, **kwargs):
     return result
 
 
+def submit_forms_locally(instances, domain, **kwargs):
+    """Submit an ordered list of form XML instances as one batch
+
+    See ``process_submission_batch``. Raises ``LocalSubmissionError`` for the
+    first form that was not processed successfully, after all forms have
+    been processed.
+
+    :returns: list of ``FormProcessingResult``
+    """
+    kwargs['auth_context'] = kwargs.get('auth_context') or DefaultAuthContext()
+    results = process_submission_batch(domain, [
+        SubmissionPost(domain=domain, instance=instance, **kwargs)
+        for instance in instances
+    ])
+    for result in results:
+        if not 200 <= result.response.status_code < 300:
+            raise LocalSubmissionError('Error submitting (status code %s): %s' % (
+                result.response.status_code,
+                result.response.content,
+            ))
+    return results
+
+
 def get_meta_appversion_text(form_metadata):
     try:
         text = form_metadata['appVersion']
@@ -229,16 +252,20 @@ def _notify_ignored_form_submission(request, form_meta):
     })
 
 
-def should_ignore_submission(request):
+def should_ignore_submission(request, instance=None):
     """
     If IGNORE_ALL_DEMO_USER_SUBMISSIONS is True then ignore submission if from demo user.
     Else
     If submission request.GET has `submit_mode=demo` and submitting user is not demo_user,
     the submissions should be ignored
+
+    :param instance: The form XML to check, for requests that submit more
+    than one form. Defaults to the form submitted with the request.
     """
     form_json = None
     if IGNORE_ALL_DEMO_USER_SUBMISSIONS:
-        instance, _ = couchforms.get_instance_and_attachment(request)
+        if instance is None:
+            instance, _ = couchforms.get_instance_and_attachment(request)
         try:
             form_json = convert_xform_to_json(instance)
         except couchforms.XMLSyntaxError:
@@ -254,7 +281,8 @@ def should_ignore_submission(request):
         return False
 
     if form_json is None:
-        instance, _ = couchforms.get_instance_and_attachment(request)
+        if instance is None:
+            instance, _ = couchforms.get_instance_and_attachment(request)
         form_json = convert_xform_to_json(instance)
     return False if from_demo_user(form_json) else True
 
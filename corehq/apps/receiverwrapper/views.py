@@ -1,6 +1,6 @@
 import os
 
-from django.http import HttpResponseBadRequest, HttpResponseForbidden
+from django.http import HttpResponseBadRequest, HttpResponseForbidden, JsonResponse
 from django.views.decorators.csrf import csrf_exempt
 from django.views.decorators.http import require_POST
 
@@ -41,7 +41,7 @@ from corehq.apps.receiverwrapper.util import (
 )
 from corehq.form_processor.exceptions import XFormLockError
 from corehq.form_processor.interfaces.dbaccessors import CaseAccessors
-from corehq.form_processor.submission_post import SubmissionPost
+from corehq.form_processor.submission_post import SubmissionPost, process_submission_batch
 from corehq.form_processor.utils import (
     convert_xform_to_json,
     should_use_sql_backend,
@@ -55,6 +55,8 @@ PROFILE_PROBABILITY = float(os.getenv('COMMCARE_PROFILE_SUBMISSION_PROBABILITY',
 PROFILE_LIMIT = os.getenv('COMMCARE_PROFILE_SUBMISSION_LIMIT')
 PROFILE_LIMIT = int(PROFILE_LIMIT) if PROFILE_LIMIT is not None else 1
 
+MAX_BULK_SUBMISSION_FORMS = 100
+
 
 @profile_prod('commcare_receiverwapper_process_form.prof', probability=PROFILE_PROBABILITY, limit=PROFILE_LIMIT)
 def _process_form(request, domain, app_id, user_id, authenticated,
@@ -332,3 +334,95 @@ def secure_post(request, domain, app_id=None):
         )
 
     return decorated_view(request, domain, app_id=app_id)
+
+
+@location_safe
+@csrf_exempt
+@require_POST
+@check_domain_migration
+@handle_401_response
+@login_or_basic_ex(allow_cc_users=True)
+@two_factor_exempt
+@toggles.BULK_FORM_SUBMISSION.required_decorator()
+def bulk_post(request, domain, app_id=None):
+    """Process an ordered batch of forms in one request
+
+    Each form is a separate ``xml_submission_file`` part of a multipart
+    request. Form attachments are not supported. The response is a JSON
+    list with the status code, form ID and OpenRosa response of each form,
+    in the order the forms were posted. Forms which a single submission
+    would ignore (see ``should_ignore_submission``) are not processed.
+    """
+    if rate_limit_submission(domain):
+        return HttpTooManyRequests()
+
+    if toggles.FORM_SUBMISSION_BLACKLIST.enabled(domain):
+        return openrosa_response.BLACKLISTED_RESPONSE
+
+    instances = [item.read() for item in request.FILES.getlist(MAGIC_PROPERTY)]
+    if not instances:
+        return HttpResponseBadRequest('No forms submitted')
+    if len(instances) > MAX_BULK_SUBMISSION_FORMS:
+        return HttpResponseBadRequest(
+            'At most {} forms can be submitted at once'.format(MAX_BULK_SUBMISSION_FORMS))
+
+    metric_tags = {
+        'backend': 'sql' if should_use_sql_backend(domain) else 'couch',
+        'domain': domain
+    }
+    ignored = [should_ignore_submission(request, instance) for instance in instances]
+    app_id, build_id = get_app_and_build_ids(domain, app_id)
+    user_id = request.couch_user.get_id
+    submissions = [
+        SubmissionPost(
+            instance=instance,
+            domain=domain,
+            app_id=app_id,
+            build_id=build_id,
+            auth_context=AuthContext(
+                domain=domain,
+                user_id=user_id,
+                authenticated=True,
+            ),
+            location=couchforms.get_location(request),
+            received_on=couchforms.get_received_on(request),
+            date_header=couchforms.get_date_header(request),
+            path=couchforms.get_path(request),
+            submit_ip=couchforms.get_submit_ip(request),
+            last_sync_token=couchforms.get_last_sync_token(request),
+            openrosa_headers=couchforms.get_openrosa_headers(request),
+        )
+        for instance, ignore in zip(instances, ignored) if not ignore
+    ]
+
+    try:
+        results = iter(process_submission_batch(domain, submissions) if submissions else [])
+    except XFormLockError as err:
+        metrics_counter('commcare.xformlocked.count', tags={
+            'domain': domain, 'authenticated': True
+        })
+        return _submission_error(
+            request, "XFormLockError: %s" % err,
+            metric_tags, domain, app_id, user_id, True, status=423,
+            notify=False,
+        )
+
+    form_results = []
+    for ignore in ignored:
+        if ignore:
+            response = openrosa_response.SUBMISSION_IGNORED_RESPONSE
+            _record_metrics(dict(metric_tags), 'ignored', response)
+            form_results.append((response, None))
+        else:
+            result = next(results)
+            _record_metrics(dict(metric_tags), result.submission_type, result.response, xform=result.xform)
+            form_results.append((result.response, result.xform))
+
+    return JsonResponse([
+        {
+            'status': response.status_code,
+            'form_id': xform.form_id if xform else None,
+            'response': response.content.decode('utf-8'),
+        }
+        for response, xform in form_results
+    ], safe=False)
@@ -1,15 +1,29 @@
+from collections import defaultdict
+from datetime import datetime, timedelta
 from time import sleep
 
+from django.conf import settings
 from django.core.management.base import BaseCommand
 
-from dimagi.utils.couch import get_redis_lock
+from dimagi.utils.chunked import chunked
 from dimagi.utils.logging import notify_exception
 
 from corehq.apps.domain_migration_flags.api import any_migrations_in_progress
-from corehq.apps.sms.models import QueuedSMS
-from corehq.apps.sms.tasks import send_to_sms_queue
+from corehq.apps.sms.models import OUTGOING, QueuedSMS
+from corehq.apps.sms.tasks import (
+    notify_sms_queue,
+    process_outgoing_sms_batch,
+    send_to_sms_queue,
+    wait_for_sms_queue_notification,
+)
 from corehq.sql_db.util import handle_connection_failure
 
+# The number of due messages claimed per query
+CLAIM_SIZE = 1000
+
+# Claimed messages that were not processed by then are claimed again
+CLAIM_TIMEOUT = timedelta(hours=3)
+
 
 def skip_domain(domain):
     return any_migrations_in_progress(domain)
@@ -19,36 +33,48 @@ class SMSEnqueuingOperation(BaseCommand):
     """
     Based on our commcare-cloud code, there will be one instance of this
     command running on every machine that has a celery worker which
-    consumes from the sms_queue. This is ok because this process uses
-    locks to ensure items are only enqueued once, and it's what is desired
-    in order to more efficiently spawn the needed celery tasks.
+    consumes from the sms_queue. This is ok because each process claims
+    distinct due messages (see QueuedSMS.claim_queued_sms) to ensure items
+    are only enqueued once, and it's what is desired in order to more
+    efficiently spawn the needed celery tasks.
+
+    Between runs the process waits for a notification of new messages
+    (see enqueue), or 10 seconds for messages which become due later.
     """
     help = "Spawns tasks to process queued SMS"
 
-    def get_enqueue_lock(self, queued_sms):
-        key = "create-task-for-sms-%s-%s" % (
-            queued_sms.pk,
-            queued_sms.datetime_to_process.strftime('%Y-%m-%d %H:%M:%S')
-        )
-        return get_redis_lock(
-            key,
-            timeout=3 * 60 * 60,
-            name="sms_task",
-            track_unreleased=False,
-        )
-
     @handle_connection_failure()
     def create_tasks(self):
-        for queued_sms in QueuedSMS.get_queued_sms():
-            if queued_sms.domain and skip_domain(queued_sms.domain):
-                continue
+        batch_size = settings.SMS_QUEUE_OUTBOUND_BATCH_SIZE
+        claimed_until = datetime.utcnow() + CLAIM_TIMEOUT
+        skipped_pks = []
+        while True:
+            claimed = QueuedSMS.claim_queued_sms(claimed_until, CLAIM_SIZE)
+            outgoing = defaultdict(list)
+            for queued_sms in claimed:
+                if queued_sms.domain and skip_domain(queued_sms.domain):
+                    skipped_pks.append(queued_sms.pk)
+                elif batch_size and queued_sms.direction == OUTGOING:
+                    outgoing[(queued_sms.domain, queued_sms.backend_id)].append(queued_sms)
+                else:
+                    send_to_sms_queue(queued_sms)
 
-            self.enqueue(queued_sms)
+            for messages in outgoing.values():
+                for batch in chunked(messages, batch_size):
+                    process_outgoing_sms_batch.delay([queued_sms.pk for queued_sms in batch])
+
+            if len(claimed) < CLAIM_SIZE:
+                break
+
+        if skipped_pks:
+            # Skipped domains are retried on the next run
+            QueuedSMS.release_claims(skipped_pks)
 
     def enqueue(self, queued_sms):
-        enqueue_lock = self.get_enqueue_lock(queued_sms)
-        if enqueue_lock.acquire(blocking=False):
-            send_to_sms_queue(queued_sms)
+        """
+        Called for new messages so that they are processed right away
+        """
+        notify_sms_queue()
 
     def handle(self, **options):
         while True:
@@ -56,7 +82,12 @@ class SMSEnqueuingOperation(BaseCommand):
                 self.create_tasks()
             except:
                 notify_exception(None, message="Could not fetch due survey actions")
-            sleep(10)
+
+            try:
+                wait_for_sms_queue_notification(timeout=10)
+            except Exception:
+                notify_exception(None, message="Could not wait for SMS queue notifications")
+                sleep(10)
 
 
 class Command(SMSEnqueuingOperation):
@@ -0,0 +1,16 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sms', '0037_app_id'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='queuedsms',
+            name='claimed_until',
+            field=models.DateTimeField(null=True),
+        ),
+    ]
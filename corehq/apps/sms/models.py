@@ -10,6 +10,7 @@ from django.http import Http404
 from django.utils.translation import ugettext_lazy, ugettext_noop
 
 import jsonfield
+import requests
 from memoized import memoized
 
 from dimagi.ext.couchdbkit import Document, StringProperty
@@ -337,6 +338,10 @@ class SMS(SMSBase):
 
 
 class QueuedSMS(SMSBase):
+    # Set when run_sms_queue claims the message to spawn a task for it, and
+    # cleared when processing is delayed. The message is not claimed again
+    # before then unless processing it did not finish in time.
+    claimed_until = models.DateTimeField(null=True)
 
     class Meta(object):
         db_table = 'sms_queued'
@@ -347,6 +352,39 @@ class QueuedSMS(SMSBase):
             datetime_to_process__lte=datetime.utcnow(),
         )
 
+    @classmethod
+    def claim_queued_sms(cls, claimed_until, limit):
+        """
+        Claims up to `limit` due messages which are not claimed yet, in order
+        of datetime_to_process, by setting their claimed_until. Rows locked
+        by a concurrent claim are skipped, so concurrent callers claim
+        distinct messages.
+
+        :return: The list of claimed QueuedSMS
+        """
+        utcnow = datetime.utcnow()
+        with transaction.atomic():
+            claimed = list(
+                cls.objects
+                .select_for_update(skip_locked=True)
+                .filter(
+                    models.Q(claimed_until__isnull=True) | models.Q(claimed_until__lt=utcnow),
+                    datetime_to_process__lte=utcnow,
+                )
+                .order_by('datetime_to_process')[:limit]
+            )
+            cls.objects.filter(pk__in=[queued_sms.pk for queued_sms in claimed]).update(
+                claimed_until=claimed_until
+            )
+
+        for queued_sms in claimed:
+            queued_sms.claimed_until = claimed_until
+        return claimed
+
+    @classmethod
+    def release_claims(cls, queued_sms_pks):
+        cls.objects.filter(pk__in=queued_sms_pks).update(claimed_until=None)
+
 
 class SQLLastReadMessage(UUIDGeneratorMixin, models.Model):
 
@@ -2349,12 +2387,29 @@ class SQLMobileBackend(UUIDGeneratorMixin, models.Model):
         return super(SQLMobileBackend, self).delete(*args, **kwargs)
 
 
+# requests Sessions used to send outbound SMS, by backend pk. See
+# SQLSMSBackend.get_http_session.
+_backend_http_sessions = {}
+
+
 class SQLSMSBackend(SQLMobileBackend):
 
     class Meta(object):
         proxy = True
         app_label = 'sms'
 
+    def get_http_session(self):
+        """
+        Returns the requests Session that HTTP gateway backends should use
+        to send outbound SMS. The session is shared by all messages sent
+        through this backend in the current process, so connections to the
+        gateway are kept alive between messages.
+        """
+        session = _backend_http_sessions.get(self.pk)
+        if session is None:
+            session = _backend_http_sessions.setdefault(self.pk, requests.Session())
+        return session
+
     def get_max_simultaneous_connections(self):
         """
         Return None to ignore.
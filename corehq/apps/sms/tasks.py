@@ -14,6 +14,7 @@ from dimagi.utils.couch import (
     get_redis_lock,
     release_lock,
 )
+from dimagi.utils.logging import notify_exception
 from dimagi.utils.rate_limit import rate_limit
 
 from corehq import privileges
@@ -98,6 +99,8 @@ def handle_successful_processing_attempt(msg):
 
 def delay_processing(msg, minutes):
     msg.datetime_to_process += timedelta(minutes=minutes)
+    # Let run_sms_queue claim the message again once it is due
+    msg.claimed_until = None
     msg.save()
 
 
@@ -132,23 +135,35 @@ def handle_domain_specific_delays(msg, domain_object, utcnow):
     """
     domain_now = ServerTime(utcnow).user_time(domain_object.get_default_timezone()).done()
 
-    if len(domain_object.restricted_sms_times) > 0:
-        if not time_within_windows(domain_now, domain_object.restricted_sms_times):
-            delay_processing(msg, settings.SMS_QUEUE_DOMAIN_RESTRICTED_RETRY_INTERVAL)
-            return True
+    if domain_sms_time_is_restricted(domain_object, domain_now):
+        delay_processing(msg, settings.SMS_QUEUE_DOMAIN_RESTRICTED_RETRY_INTERVAL)
+        return True
+
+    if recipient_is_in_sms_conversation(msg, domain_object, domain_now, utcnow):
+        delay_processing(msg, 1)
+        return True
+
+    return False
+
+
+def domain_sms_time_is_restricted(domain_object, domain_now):
+    return (
+        len(domain_object.restricted_sms_times) > 0 and
+        not time_within_windows(domain_now, domain_object.restricted_sms_times)
+    )
+
 
+def recipient_is_in_sms_conversation(msg, domain_object, domain_now, utcnow):
     if msg.chat_user_id is None and len(domain_object.sms_conversation_times) > 0:
         if time_within_windows(domain_now, domain_object.sms_conversation_times):
             sms_conversation_length = domain_object.sms_conversation_length
             conversation_start_timestamp = utcnow - timedelta(minutes=sms_conversation_length)
-            if SMS.inbound_entry_exists(
+            return SMS.inbound_entry_exists(
                 msg.couch_recipient_doc_type,
                 msg.couch_recipient,
                 conversation_start_timestamp,
                 to_timestamp=utcnow
-            ):
-                delay_processing(msg, 1)
-                return True
+            )
 
     return False
 
@@ -199,13 +214,15 @@ def passes_trial_check(msg):
     return True
 
 
-def handle_outgoing(msg):
+def handle_outgoing(msg, backend=None):
     """
     Should return a requeue flag, so if it returns True, the message will be
     requeued and processed again immediately, and if it returns False, it will
     not be queued again.
+
+    backend - the msg.outbound_backend, if it was already loaded
     """
-    backend = msg.outbound_backend
+    backend = backend or msg.outbound_backend
     sms_rate_limit = backend.get_sms_rate_limit()
     use_rate_limit = sms_rate_limit is not None
     use_load_balancing = isinstance(backend, PhoneLoadBalancingMixin)
@@ -326,16 +343,40 @@ class OutboundDailyCounter(object):
             # processing the backlog right away.
             self.decrement()
             delay_processing(queued_sms, 60)
-
-            # Log the fact that we reached this limit
-            DailyOutboundSMSLimitReached.create_for_domain_and_date(
-                self.domain_object.name if self.domain_object else '',
-                self.date
-            )
+            self.log_limit_reached()
             return False
 
         return True
 
+    def get_sendable_outbound_sms(self, queued_sms_list):
+        """
+        Counts all of the given messages against the outbound daily limit
+        at once, and returns the ones that can be sent. The messages past
+        the limit are delayed like in can_send_outbound_sms.
+        """
+        if not queued_sms_list:
+            return []
+
+        count = len(queued_sms_list)
+        value = self.client.incrby(self.key, count)
+        if value == count:
+            self.client.expire(self.key, 24 * 60 * 60)
+
+        allowed = max(0, min(count, self.daily_limit - (value - count)))
+        if allowed < count:
+            self.client.decrby(self.key, count - allowed)
+            for queued_sms in queued_sms_list[allowed:]:
+                delay_processing(queued_sms, 60)
+            self.log_limit_reached()
+
+        return queued_sms_list[:allowed]
+
+    def log_limit_reached(self):
+        DailyOutboundSMSLimitReached.create_for_domain_and_date(
+            self.domain_object.name if self.domain_object else '',
+            self.date
+        )
+
 
 @no_result_task(serializer='pickle', queue="sms_queue", acks_late=True)
 def process_sms(queued_sms_pk):
@@ -378,16 +419,7 @@ def process_sms(queued_sms_pk):
         # Process inbound SMS from a single contact one at a time
         recipient_block = msg.direction == INCOMING
 
-        # We check datetime_to_process against utcnow plus a small amount
-        # of time because timestamps can differ between machines which
-        # can cause us to miss sending the message the first time and
-        # result in an unnecessary delay.
-        if (
-            isinstance(msg.processed, bool) and
-            not msg.processed and
-            not msg.error and
-            msg.datetime_to_process < (utcnow + timedelta(seconds=10))
-        ):
+        if sms_is_due(msg, utcnow):
             if recipient_block:
                 recipient_lock = get_lock(
                     "sms-queue-recipient-phone-%s" % msg.phone_number)
@@ -430,6 +462,143 @@ def send_to_sms_queue(queued_sms):
     process_sms.apply_async([queued_sms.pk])
 
 
+SMS_QUEUE_NOTIFICATION_KEY = 'sms-queue-notifications'
+
+
+def notify_sms_queue():
+    """
+    Wakes up a run_sms_queue process so that it claims due messages
+    right away instead of on its next poll.
+    """
+    client = get_redis_client().client.get_client()
+    client.rpush(SMS_QUEUE_NOTIFICATION_KEY, 1)
+    client.expire(SMS_QUEUE_NOTIFICATION_KEY, 60)
+
+
+def wait_for_sms_queue_notification(timeout):
+    """
+    Blocks until notify_sms_queue is called or `timeout` seconds pass.
+    """
+    client = get_redis_client().client.get_client()
+    if client.blpop([SMS_QUEUE_NOTIFICATION_KEY], timeout=timeout):
+        # The claim that follows covers any other pending notifications
+        client.delete(SMS_QUEUE_NOTIFICATION_KEY)
+
+
+def sms_is_due(msg, utcnow):
+    # We check datetime_to_process against utcnow plus a small amount
+    # of time because timestamps can differ between machines which
+    # can cause us to miss sending the message the first time and
+    # result in an unnecessary delay.
+    return (
+        isinstance(msg.processed, bool) and
+        not msg.processed and
+        not msg.error and
+        msg.datetime_to_process < (utcnow + timedelta(seconds=10))
+    )
+
+
+@no_result_task(serializer='pickle', queue="sms_queue", acks_late=True)
+def process_outgoing_sms_batch(queued_sms_pks):
+    """
+    queued_sms_pks - pks of outgoing QueuedSMS entries which share a domain
+    and backend_id
+
+    Processes the messages like process_sms, except that the domain is
+    loaded, its restricted times are checked and the outbound daily limit
+    is counted once for the whole batch, and messages sent through the same
+    backend share one backend object and its HTTP session. Each message is
+    still sent, and its success or failure tracked, on its own.
+    """
+    utcnow = get_utcnow()
+    message_locks = []
+    for queued_sms_pk in queued_sms_pks:
+        message_lock = get_lock("sms-queue-processing-%s" % queued_sms_pk)
+        if message_lock.acquire(blocking=False):
+            message_locks.append((queued_sms_pk, message_lock))
+
+    try:
+        requeue = _process_outgoing_sms_batch(
+            QueuedSMS.objects.filter(pk__in=[pk for pk, lock in message_locks]).order_by('datetime_to_process'),
+            utcnow
+        )
+    finally:
+        for queued_sms_pk, message_lock in message_locks:
+            release_lock(message_lock, True)
+
+    for msg in requeue:
+        send_to_sms_queue(msg)
+
+
+def _process_outgoing_sms_batch(queued_sms, utcnow):
+    """
+    Returns the messages which need to be requeued.
+    """
+    requeue = []
+    messages = []
+    for msg in queued_sms:
+        if msg.direction != OUTGOING:
+            # Only outgoing SMS are batched, leave anything else to process_sms
+            requeue.append(msg)
+        elif message_is_stale(msg, utcnow):
+            msg.set_system_error(SMS.ERROR_MESSAGE_IS_STALE)
+            remove_from_queue(msg)
+        elif sms_is_due(msg, utcnow):
+            messages.append(msg)
+
+    if not messages:
+        return requeue
+
+    domain = messages[0].domain
+    if any(msg.domain != domain for msg in messages):
+        raise ValueError("Expected messages from one domain")
+
+    domain_object = Domain.get_by_name(domain) if domain else None
+    if domain_object:
+        domain_now = ServerTime(utcnow).user_time(domain_object.get_default_timezone()).done()
+        if domain_sms_time_is_restricted(domain_object, domain_now):
+            for msg in messages:
+                delay_processing(msg, settings.SMS_QUEUE_DOMAIN_RESTRICTED_RETRY_INTERVAL)
+            return requeue
+
+        in_conversation = [
+            msg for msg in messages
+            if recipient_is_in_sms_conversation(msg, domain_object, domain_now, utcnow)
+        ]
+        for msg in in_conversation:
+            delay_processing(msg, 1)
+        messages = [msg for msg in messages if msg not in in_conversation]
+
+    outbound_counter = OutboundDailyCounter(domain_object)
+    backends = {}
+    for msg in outbound_counter.get_sendable_outbound_sms(messages):
+        try:
+            if (
+                msg.domain and
+                msg.couch_recipient_doc_type and
+                msg.couch_recipient and
+                not is_contact_active(msg.domain, msg.couch_recipient_doc_type, msg.couch_recipient)
+            ):
+                msg.set_system_error(SMS.ERROR_CONTACT_IS_INACTIVE)
+                remove_from_queue(msg)
+                continue
+
+            if msg.backend_id:
+                if msg.backend_id not in backends:
+                    backends[msg.backend_id] = msg.outbound_backend
+                backend = backends[msg.backend_id]
+            else:
+                backend = msg.outbound_backend
+
+            if handle_outgoing(msg, backend=backend):
+                outbound_counter.decrement()
+                requeue.append(msg)
+        except Exception:
+            notify_exception(None, message="Error processing outgoing SMS %s" % msg.pk)
+
+    return requeue
+
+
 @no_result_task(serializer='pickle', queue='background_queue', default_retry_delay=10 * 60,
                 max_retries=10, bind=True)
 def store_billable(self, msg):
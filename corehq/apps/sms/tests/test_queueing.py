@@ -12,7 +12,9 @@ from corehq.apps.sms.api import incoming, send_sms
 from corehq.apps.sms.models import SMS, QueuedSMS
 from corehq.apps.sms.tasks import (
     MAX_TRIAL_SMS,
+    OutboundDailyCounter,
     passes_trial_check,
+    process_outgoing_sms_batch,
     process_sms,
 )
 from corehq.apps.sms.tests.util import (
@@ -146,6 +148,65 @@ class QueueingTestCase(BaseSMSTest):
         self.assertEqual(process_sms_delay_mock.call_count, 0)
         self.assertBillableExists(couch_id)
 
+    def test_outgoing_batch(self, process_sms_delay_mock, enqueue_directly_mock):
+        send_sms(self.domain, None, '+999123', 'test outgoing 1')
+        send_sms(self.domain, None, '+999123', 'test outgoing 2')
+        self.assertEqual(self.queued_sms_count, 2)
+
+        def fail_second(msg, *args, **kwargs):
+            if msg.text == 'test outgoing 2':
+                raise Exception()
+
+        with patch(
+            'corehq.messaging.smsbackends.test.models.SQLTestSMSBackend.send',
+            new=Mock(side_effect=fail_second)
+        ) as send_mock:
+            process_outgoing_sms_batch([queued_sms.pk for queued_sms in QueuedSMS.objects.all()])
+
+        self.assertEqual(send_mock.call_count, 2)
+        self.assertEqual(self.reporting_sms_count, 1)
+        reporting_sms = self.get_reporting_sms()
+        self.assertEqual(reporting_sms.text, 'test outgoing 1')
+        self.assertEqual(reporting_sms.processed, True)
+        self.assertBillableExists(reporting_sms.couch_id)
+
+        queued_sms = self.get_queued_sms()
+        self.assertEqual(queued_sms.text, 'test outgoing 2')
+        self.assertEqual(queued_sms.num_processing_attempts, 1)
+        self.assertEqual(process_sms_delay_mock.call_count, 0)
+
+    @patch('corehq.apps.domain.models.Domain.get_daily_outbound_sms_limit', new=Mock(return_value=1))
+    def test_outgoing_batch_daily_limit(self, process_sms_delay_mock, enqueue_directly_mock):
+        counter = OutboundDailyCounter(self.domain_obj)
+        counter.client.delete(counter.key)
+        self.addCleanup(counter.client.delete, counter.key)
+
+        send_sms(self.domain, None, '+999123', 'test outgoing 1')
+        send_sms(self.domain, None, '+999123', 'test outgoing 2')
+
+        with patch_successful_send() as send_mock:
+            process_outgoing_sms_batch([queued_sms.pk for queued_sms in QueuedSMS.objects.all()])
+
+        self.assertEqual(send_mock.call_count, 1)
+        self.assertEqual(self.reporting_sms_count, 1)
+        queued_sms = self.get_queued_sms()
+        self.assertEqual(queued_sms.num_processing_attempts, 0)
+        self.assertGreater(queued_sms.datetime_to_process, datetime.utcnow() + timedelta(minutes=59))
+
+    def test_claim_queued_sms(self, process_sms_delay_mock, enqueue_directly_mock):
+        send_sms(self.domain, None, '+999123', 'test outgoing 1')
+        send_sms(self.domain, None, '+999123', 'test outgoing 2')
+
+        claimed_until = datetime.utcnow() + timedelta(hours=1)
+        [first] = QueuedSMS.claim_queued_sms(claimed_until, 1)
+        [second] = QueuedSMS.claim_queued_sms(claimed_until, 1)
+        self.assertEqual(first.text, 'test outgoing 1')
+        self.assertEqual(second.text, 'test outgoing 2')
+        self.assertEqual(QueuedSMS.claim_queued_sms(claimed_until, 10), [])
+
+        QueuedSMS.release_claims([first.pk])
+        self.assertEqual([sms.pk for sms in QueuedSMS.claim_queued_sms(claimed_until, 10)], [first.pk])
+
     def test_outgoing_failure(self, process_sms_delay_mock, enqueue_directly_mock):
         timestamp = datetime(2016, 1, 1, 12, 0)
 
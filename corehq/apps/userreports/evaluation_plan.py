@@ -0,0 +1,170 @@
+import json
+
+from corehq.apps.userreports.indicators import ColumnValue
+
+# Indicator spec properties which only describe the column of an indicator
+# and don't affect its values
+INDICATOR_COLUMN_PROPERTIES = (
+    'column_id', 'display_name', 'comment', 'is_nullable', 'is_primary_key', 'create_index',
+)
+
+
+class DataSourceEvaluationPlan(object):
+    """
+    Evaluates the filters and indicators of a set of data sources against
+    documents, evaluating parts that are identical between data sources only
+    once per document.
+
+    Data sources are compared by the JSON of their main filter, base item
+    expression and indicator specs. Indicator specs are compared without the
+    properties that only describe their columns, so the same expression is
+    shared between indicators with different column IDs. Specs that
+    reference named expressions or filters are only shared between data
+    sources whose named expressions and filters are also identical.
+
+    Only these top-level specs are shared. Expressions and filters nested in
+    different specs are still evaluated once per data source, except for
+    related document lookups, which are cached by the shared evaluation
+    context.
+
+    Data sources with validations are not part of the plan and are always
+    evaluated by their adapter.
+    """
+
+    def __init__(self, configs):
+        self._filters = {}
+        self._base_item_expressions = {}
+        self._indicators = {}
+        self._filter_key_by_config_id = {}
+        self._base_item_key_by_config_id = {}
+        self._indicators_by_config_id = {}
+        for config in configs:
+            self._add_config(config)
+
+    def _add_config(self, config):
+        config_id = config._id
+        filter_key = _get_spec_key(config.get_main_filter_spec(), config)
+        self._filters.setdefault(filter_key, config._get_main_filter())
+        self._filter_key_by_config_id[config_id] = filter_key
+
+        if config.has_validations:
+            return
+
+        if config.base_item_expression:
+            base_item_key = _get_spec_key(config.base_item_expression, config)
+            self._base_item_expressions.setdefault(base_item_key, config.parsed_expression)
+        else:
+            base_item_key = None
+        self._base_item_key_by_config_id[config_id] = base_item_key
+
+        indicators = []
+        for spec, indicator in zip(config.get_indicator_specs(), config.indicators.indicators):
+            indicator_key = _get_indicator_key(spec, config)
+            self._indicators.setdefault(indicator_key, indicator)
+            indicators.append((indicator_key, indicator))
+        self._indicators_by_config_id[config_id] = indicators
+
+    def get_document_evaluation(self, doc, eval_context):
+        return DocumentEvaluation(self, doc, eval_context)
+
+
+class DocumentEvaluation(object):
+    """
+    Results of evaluating a ``DataSourceEvaluationPlan`` against a single
+    document. Shares the document's ``EvaluationContext`` between data sources
+    so related document lookups are also only done once.
+    """
+
+    def __init__(self, plan, doc, eval_context):
+        self.plan = plan
+        self.doc = doc
+        self.eval_context = eval_context
+        self._filter_results = {}
+        self._items = {}
+        self._indicator_values = {}
+
+    def filter(self, adapter):
+        config = adapter.config
+        filter_key = self.plan._filter_key_by_config_id.get(config._id)
+        if filter_key is None:
+            return config.filter(self.doc, self.eval_context)
+
+        if filter_key not in self._filter_results:
+            filter_fn = self.plan._filters[filter_key]
+            self._filter_results[filter_key] = filter_fn(self.doc, self.eval_context)
+        return self._filter_results[filter_key]
+
+    def get_all_values(self, adapter):
+        """
+        Equivalent to ``adapter.get_all_values(doc, eval_context)`` for a
+        document that passes the data source filter.
+        """
+        config_id = adapter.config._id
+        if config_id not in self.plan._indicators_by_config_id:
+            return adapter.get_all_values(self.doc, self.eval_context)
+
+        base_item_key = self.plan._base_item_key_by_config_id[config_id]
+        rows = []
+        for item in self._get_items(base_item_key):
+            row = []
+            for indicator_key, indicator in self.plan._indicators_by_config_id[config_id]:
+                values = self._get_indicator_values(indicator_key, base_item_key, item)
+                if indicator is not self.plan._indicators[indicator_key]:
+                    # the values were calculated by an indicator with other columns
+                    values = [
+                        ColumnValue(column, value.value)
+                        for column, value in zip(indicator.get_columns(), values)
+                    ]
+                row.extend(values)
+            rows.append(row)
+            self.eval_context.increment_iteration()
+        return rows
+
+    def _get_items(self, base_item_key):
+        if base_item_key is None:
+            return [self.doc]
+
+        if base_item_key not in self._items:
+            expression = self.plan._base_item_expressions[base_item_key]
+            result = expression(self.doc, self.eval_context)
+            if result is None:
+                items = []
+            elif isinstance(result, list):
+                items = result
+            else:
+                items = [result]
+            self._items[base_item_key] = items
+        return self._items[base_item_key]
+
+    def _get_indicator_values(self, indicator_key, base_item_key, item):
+        cache_key = (indicator_key, base_item_key, self.eval_context.iteration)
+        if cache_key not in self._indicator_values:
+            indicator = self.plan._indicators[indicator_key]
+            self._indicator_values[cache_key] = indicator.get_values(item, self.eval_context)
+        return self._indicator_values[cache_key]
+
+
+def _get_indicator_key(spec, config):
+    spec = {
+        name: value for name, value in spec.items()
+        if name not in INDICATOR_COLUMN_PROPERTIES
+    }
+    return _get_spec_key(spec, config)
+
+
+def _get_spec_key(spec, config):
+    key = {'spec': spec}
+    if _references_named_spec(spec):
+        key['named_expressions'] = config.named_expressions
+        key['named_filters'] = config.named_filters
+    return json.dumps(key, sort_keys=True, default=str)
+
+
+def _references_named_spec(spec):
+    if isinstance(spec, dict):
+        if spec.get('type') == 'named':
+            return True
+        return any(_references_named_spec(value) for value in spec.values())
+    elif isinstance(spec, list):
+        return any(_references_named_spec(value) for value in spec)
+    return False
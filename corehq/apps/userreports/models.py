@@ -306,6 +306,15 @@ class DataSourceConfiguration(CachedCouchDocumentMixin, Document, AbstractUCRDat
         if not doc_types:
             return None
 
+        return FilterFactory.from_spec(
+            self._get_filter_spec(doc_types, include_configured),
+            context=self.get_factory_context(),
+        )
+
+    def get_main_filter_spec(self):
+        return self._get_filter_spec([self.referenced_doc_type])
+
+    def _get_filter_spec(self, doc_types, include_configured=True):
         extras = (
             [self.configured_filter]
             if include_configured and self.configured_filter else []
@@ -328,13 +337,10 @@ class DataSourceConfiguration(CachedCouchDocumentMixin, Document, AbstractUCRDat
                 ],
             },
         ]
-        return FilterFactory.from_spec(
-            {
-                'type': 'and',
-                'filters': built_in_filters + extras,
-            },
-            context=self.get_factory_context(),
-        )
+        return {
+            'type': 'and',
+            'filters': built_in_filters + extras,
+        }
 
     def _get_domain_filter_spec(self):
         return {
@@ -382,10 +388,12 @@ class DataSourceConfiguration(CachedCouchDocumentMixin, Document, AbstractUCRDat
     def get_factory_context(self):
         return FactoryContext(self.named_expression_objects, self.named_filter_objects)
 
-    @property
-    @memoized
-    def default_indicators(self):
-        default_indicators = [IndicatorFactory.from_spec({
+    def get_indicator_specs(self):
+        """The specs of all indicators of this data source, in column order"""
+        return self._get_default_indicator_specs() + list(self.configured_indicators)
+
+    def _get_default_indicator_specs(self):
+        default_indicator_specs = [{
             "column_id": "doc_id",
             "type": "expression",
             "display_name": "document id",
@@ -399,18 +407,24 @@ class DataSourceConfiguration(CachedCouchDocumentMixin, Document, AbstractUCRDat
                     "property_name": "_id"
                 }
             }
-        }, self.get_factory_context())]
-
-        default_indicators.append(IndicatorFactory.from_spec({
+        }, {
             "type": "inserted_at",
-        }, self.get_factory_context()))
+        }]
 
         if self.base_item_expression:
-            default_indicators.append(IndicatorFactory.from_spec({
+            default_indicator_specs.append({
                 "type": "repeat_iteration",
-            }, self.get_factory_context()))
+            })
+
+        return default_indicator_specs
 
-        return default_indicators
+    @property
+    @memoized
+    def default_indicators(self):
+        return [
+            IndicatorFactory.from_spec(spec, self.get_factory_context())
+            for spec in self._get_default_indicator_specs()
+        ]
 
     @property
     @memoized
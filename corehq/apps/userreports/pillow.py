@@ -31,6 +31,7 @@ from corehq.apps.userreports.exceptions import (
     TableRebuildError,
     UserReportsWarning,
 )
+from corehq.apps.userreports.evaluation_plan import DataSourceEvaluationPlan
 from corehq.apps.userreports.models import AsyncIndicator
 from corehq.apps.userreports.rebuild import (
     get_table_diffs,
@@ -94,6 +95,26 @@ def _filter_by_hash(configs, ucr_division):
     return filtered_configs
 
 
+def _get_adapters_by_document_subtype(adapters):
+    """Index adapters by the document subtypes (case type or xmlns) their filters can match
+
+    The ``None`` key holds the adapters whose filter does not restrict the subtype,
+    which apply to documents of every subtype.
+    """
+    subtypes_by_adapter = {
+        adapter: set(adapter.config.get_case_type_or_xmlns_filter())
+        for adapter in adapters
+    }
+    all_subtypes = set().union(*subtypes_by_adapter.values()) | {None}
+    return {
+        subtype: [
+            adapter for adapter in adapters
+            if None in subtypes_by_adapter[adapter] or subtype in subtypes_by_adapter[adapter]
+        ]
+        for subtype in all_subtypes
+    }
+
+
 def _filter_missing_domains(configs):
     """Return a list of configs whose domain exists on this environment"""
     domain_names = [config.domain for config in configs if config.is_static]
@@ -176,12 +197,35 @@ class ConfigurableReportTableManagerMixin(object):
                 get_indicator_adapter(config, raise_errors=True, load_source='change_feed')
             )
 
+        self.adapters_by_domain_and_subtype = {
+            domain: _get_adapters_by_document_subtype(adapters)
+            for domain, adapters in self.table_adapters_by_domain.items()
+        }
+        self.evaluation_plans_by_domain = {
+            domain: DataSourceEvaluationPlan([adapter.config for adapter in adapters])
+            for domain, adapters in self.table_adapters_by_domain.items()
+        }
+
         if self.run_migrations:
             self.rebuild_tables_if_necessary()
 
         self.bootstrapped = True
         self.last_bootstrapped = datetime.utcnow()
 
+    def get_adapters_for_subtype(self, domain, doc_subtype):
+        """Adapters in the domain whose filters could match documents of this subtype"""
+        if doc_subtype is None:
+            return list(self.table_adapters_by_domain[domain])
+        adapters_by_subtype = self.adapters_by_domain_and_subtype[domain]
+        return list(adapters_by_subtype.get(doc_subtype, adapters_by_subtype[None]))
+
+    def remove_adapter(self, domain, adapter):
+        """Stop processing an adapter until the next bootstrap"""
+        self.table_adapters_by_domain[domain].remove(adapter)
+        for subtype_adapters in self.adapters_by_domain_and_subtype[domain].values():
+            if adapter in subtype_adapters:
+                subtype_adapters.remove(adapter)
+
     def rebuild_tables_if_necessary(self):
         self._rebuild_sql_tables([
             adapter
@@ -271,7 +315,7 @@ class ConfigurableReportPillowProcessor(ConfigurableReportTableManagerMixin, Bul
             table.best_effort_save(doc, eval_context)
         except UserReportsWarning:
             # remove it until the next bootstrap call
-            self.table_adapters_by_domain[domain].remove(table)
+            self.remove_adapter(domain, table)
 
     def process_changes_chunk(self, changes):
         """
@@ -299,6 +343,7 @@ class ConfigurableReportPillowProcessor(ConfigurableReportTableManagerMixin, Bul
 
     def _process_chunk_for_domain(self, domain, changes_chunk):
         adapters = list(self.table_adapters_by_domain[domain])
+        evaluation_plan = self.evaluation_plans_by_domain[domain]
         changes_by_id = {change.id: change for change in changes_chunk}
         to_delete_by_adapter = defaultdict(list)
         rows_to_save_by_adapter = defaultdict(list)
@@ -308,34 +353,47 @@ class ConfigurableReportPillowProcessor(ConfigurableReportTableManagerMixin, Bul
             retry_changes, docs = bulk_fetch_changes_docs(to_update, domain)
         change_exceptions = []
 
+        docs_by_subtype = defaultdict(list)
+        for doc in docs:
+            docs_by_subtype[changes_by_id[doc['_id']].metadata.document_subtype].append(doc)
+
         with self._metrics_timer('single_batch_transform'):
-            for doc in docs:
-                change = changes_by_id[doc['_id']]
-                doc_subtype = change.metadata.document_subtype
-                eval_context = EvaluationContext(doc)
-                with self._metrics_timer('single_doc_transform'):
-                    for adapter in adapters:
-                        with self._metrics_timer('transform', adapter.config._id):
-                            if adapter.config.filter(doc, eval_context):
-                                if adapter.run_asynchronous:
-                                    async_configs_by_doc_id[doc['_id']].append(adapter.config._id)
-                                else:
-                                    try:
-                                        rows_to_save_by_adapter[adapter].extend(adapter.get_all_values(doc, eval_context))
-                                    except Exception as e:
-                                        change_exceptions.append((change, e))
-                                    eval_context.reset_iteration()
-                            elif (doc_subtype is None
-                                    or doc_subtype in adapter.config.get_case_type_or_xmlns_filter()):
-                                # Delete if the subtype is unknown or
-                                # if the subtype matches our filters, but the full filter no longer applies
-                                to_delete_by_adapter[adapter].append(doc)
+            for doc_subtype, subtype_docs in docs_by_subtype.items():
+                # skip adapters whose filters can't match this case type / xmlns
+                subtype_adapters = self.get_adapters_for_subtype(domain, doc_subtype)
+                for doc in subtype_docs:
+                    change = changes_by_id[doc['_id']]
+                    eval_context = EvaluationContext(doc)
+                    doc_evaluation = evaluation_plan.get_document_evaluation(doc, eval_context)
+                    with self._metrics_timer('single_doc_transform'):
+                        for adapter in subtype_adapters:
+                            with self._metrics_timer('transform', adapter.config._id):
+                                if doc_evaluation.filter(adapter):
+                                    if adapter.run_asynchronous:
+                                        async_configs_by_doc_id[doc['_id']].append(adapter.config._id)
+                                    else:
+                                        try:
+                                            rows_to_save_by_adapter[adapter].extend(
+                                                doc_evaluation.get_all_values(adapter)
+                                            )
+                                        except Exception as e:
+                                            change_exceptions.append((change, e))
+                                        eval_context.reset_iteration()
+                                elif (doc_subtype is None
+                                        or doc_subtype in adapter.config.get_case_type_or_xmlns_filter()):
+                                    # Delete if the subtype is unknown or
+                                    # if the subtype matches our filters, but the full filter no longer applies
+                                    to_delete_by_adapter[adapter].append(doc)
+
+        for change in changes_chunk:
+            if change.deleted:
+                for adapter in self.get_adapters_for_subtype(domain, change.metadata.document_subtype):
+                    to_delete_by_adapter[adapter].append({'_id': change.id})
 
         with self._metrics_timer('single_batch_delete'):
             # bulk delete by adapter
-            to_delete = [{'_id': c.id} for c in changes_chunk if c.deleted]
             for adapter in adapters:
-                delete_docs = to_delete_by_adapter[adapter] + to_delete
+                delete_docs = to_delete_by_adapter[adapter]
                 if not delete_docs:
                     continue
                 with self._metrics_timer('delete', adapter.config._id):
@@ -0,0 +1,109 @@
+import datetime
+import uuid
+
+from django.test import SimpleTestCase
+
+from mock import MagicMock, patch
+
+from corehq.apps.userreports.evaluation_plan import DataSourceEvaluationPlan
+from corehq.apps.userreports.specs import EvaluationContext
+from corehq.apps.userreports.tests.utils import (
+    get_sample_data_source,
+    get_sample_doc_and_indicators,
+)
+
+
+class DataSourceEvaluationPlanTest(SimpleTestCase):
+
+    def setUp(self):
+        self.config = get_sample_data_source()
+        self.config._id = uuid.uuid4().hex
+        self.other_config = get_sample_data_source()
+        self.other_config._id = uuid.uuid4().hex
+        self.other_config.table_id = 'other_sample'
+        self.plan = DataSourceEvaluationPlan([self.config, self.other_config])
+
+    def _adapter(self, config):
+        adapter = MagicMock()
+        adapter.config = config
+        return adapter
+
+    def test_shared_specs_compiled_once(self):
+        self.assertEqual(1, len(self.plan._filters))
+        self.assertEqual(len(self.config.get_indicator_specs()), len(self.plan._indicators))
+
+    def test_filter(self):
+        doc = dict(doc_type="CommCareCase", domain='user-reports', type='not-ticket')
+        doc_evaluation = self.plan.get_document_evaluation(doc, EvaluationContext(doc))
+        self.assertFalse(doc_evaluation.filter(self._adapter(self.config)))
+        self.assertFalse(doc_evaluation.filter(self._adapter(self.other_config)))
+
+    @patch('corehq.apps.userreports.specs.datetime')
+    def test_values_match_config(self, datetime_mock):
+        fake_time_now = datetime.datetime(2015, 4, 24, 12, 30, 8, 24886)
+        datetime_mock.utcnow.return_value = fake_time_now
+        sample_doc, _ = get_sample_doc_and_indicators(fake_time_now)
+        expected = [
+            [(value.column.id, value.value) for value in row]
+            for row in self.config.get_all_values(sample_doc)
+        ]
+
+        doc_evaluation = self.plan.get_document_evaluation(sample_doc, EvaluationContext(sample_doc))
+        for config in [self.config, self.other_config]:
+            adapter = self._adapter(config)
+            self.assertTrue(doc_evaluation.filter(adapter))
+            rows = doc_evaluation.get_all_values(adapter)
+            doc_evaluation.eval_context.reset_iteration()
+            self.assertEqual(expected, [[(value.column.id, value.value) for value in row] for row in rows])
+            adapter.get_all_values.assert_not_called()
+
+    def test_named_expressions_not_shared(self):
+        config = get_sample_data_source()
+        config._id = uuid.uuid4().hex
+        config.named_expressions = {'owner': {'type': 'property_name', 'property_name': 'owner_id'}}
+        config.configured_indicators.append({
+            'type': 'expression',
+            'column_id': 'named_owner',
+            'datatype': 'string',
+            'expression': {'type': 'named', 'name': 'owner'},
+        })
+        other_config = get_sample_data_source()
+        other_config._id = uuid.uuid4().hex
+        other_config.named_expressions = {'owner': {'type': 'property_name', 'property_name': 'user_id'}}
+        other_config.configured_indicators.append({
+            'type': 'expression',
+            'column_id': 'named_owner',
+            'datatype': 'string',
+            'expression': {'type': 'named', 'name': 'owner'},
+        })
+        plan = DataSourceEvaluationPlan([config, other_config])
+        self.assertEqual(len(config.get_indicator_specs()) + 1, len(plan._indicators))
+
+    @patch('corehq.apps.userreports.specs.datetime')
+    def test_indicators_shared_across_column_ids(self, datetime_mock):
+        fake_time_now = datetime.datetime(2015, 4, 24, 12, 30, 8, 24886)
+        datetime_mock.utcnow.return_value = fake_time_now
+        sample_doc, _ = get_sample_doc_and_indicators(fake_time_now)
+        indicator = {
+            'type': 'expression',
+            'column_id': 'expression_owner',
+            'datatype': 'string',
+            'expression': {'type': 'property_name', 'property_name': 'owner_id'},
+        }
+        config = get_sample_data_source()
+        config._id = uuid.uuid4().hex
+        config.configured_indicators.append(indicator)
+        other_config = get_sample_data_source()
+        other_config._id = uuid.uuid4().hex
+        other_config.configured_indicators.append(dict(indicator, column_id='other_owner', display_name='Owner'))
+        plan = DataSourceEvaluationPlan([config, other_config])
+        self.assertEqual(len(config.get_indicator_specs()), len(plan._indicators))
+
+        doc_evaluation = plan.get_document_evaluation(sample_doc, EvaluationContext(sample_doc))
+        for config, column_id in [(config, 'expression_owner'), (other_config, 'other_owner')]:
+            [row] = doc_evaluation.get_all_values(self._adapter(config))
+            doc_evaluation.eval_context.reset_iteration()
+            self.assertEqual(
+                (column_id, sample_doc['owner_id']),
+                (row[-1].column.id, row[-1].value)
+            )
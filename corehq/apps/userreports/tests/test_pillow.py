@@ -29,6 +29,7 @@ from corehq.apps.userreports.pillow import (
     REBUILD_CHECK_INTERVAL,
     ConfigurableReportPillowProcessor,
     ConfigurableReportTableManagerMixin,
+    _get_adapters_by_document_subtype,
 )
 from corehq.apps.userreports.tasks import (
     queue_async_indicators,
@@ -91,6 +92,47 @@ class ConfigurableReportTableManagerTest(SimpleTestCase):
         self.assertTrue(table_manager.needs_bootstrap())
 
 
+class AdaptersBySubtypeTest(SimpleTestCase):
+
+    def _adapter(self, case_types):
+        adapter = mock.MagicMock()
+        adapter.config.get_case_type_or_xmlns_filter.return_value = case_types
+        return adapter
+
+    def setUp(self):
+        self.person_adapter = self._adapter(['person'])
+        self.household_adapter = self._adapter(['household', 'person'])
+        self.any_type_adapter = self._adapter([None])
+        self.adapters = [self.person_adapter, self.household_adapter, self.any_type_adapter]
+        self.table_manager = ConfigurableReportTableManagerMixin([MockDataSourceProvider()])
+        self.table_manager.table_adapters_by_domain = {'domain': list(self.adapters)}
+        self.table_manager.adapters_by_domain_and_subtype = {
+            'domain': _get_adapters_by_document_subtype(self.adapters)
+        }
+
+    def test_adapters_for_subtype(self):
+        self.assertEqual(
+            self.adapters, self.table_manager.get_adapters_for_subtype('domain', 'person'))
+        self.assertEqual(
+            [self.household_adapter, self.any_type_adapter],
+            self.table_manager.get_adapters_for_subtype('domain', 'household')
+        )
+        self.assertEqual(
+            [self.any_type_adapter], self.table_manager.get_adapters_for_subtype('domain', 'other'))
+
+    def test_unknown_subtype_gets_all_adapters(self):
+        self.assertEqual(self.adapters, self.table_manager.get_adapters_for_subtype('domain', None))
+
+    def test_remove_adapter(self):
+        self.table_manager.remove_adapter('domain', self.household_adapter)
+        self.assertEqual(
+            [self.any_type_adapter], self.table_manager.get_adapters_for_subtype('domain', 'household'))
+        self.assertEqual(
+            [self.person_adapter, self.any_type_adapter],
+            self.table_manager.get_adapters_for_subtype('domain', None)
+        )
+
+
 @override_settings(TESTS_SHOULD_USE_SQL_BACKEND=True)
 class ChunkedUCRProcessorTest(TestCase):
     @classmethod
@@ -7,12 +7,19 @@ def get_blob_db():
     if not _db:
         from django.conf import settings
         db = _get_s3_db(settings)
+        old_db = None
         if db is None:
             db = _get_fs_db(settings)
         elif getattr(settings, "BLOB_DB_MIGRATING_FROM_FS_TO_S3", False):
-            db = _get_migrating_db(db, _get_fs_db(settings))
+            old_db = _get_fs_db(settings)
         elif getattr(settings, "BLOB_DB_MIGRATING_FROM_S3_TO_S3", False):
-            db = _get_migrating_db(db, _get_s3_db(settings, "OLD_S3_BLOB_DB_SETTINGS"))
+            old_db = _get_s3_db(settings, "OLD_S3_BLOB_DB_SETTINGS")
+        cache_config = getattr(settings, "BLOB_DB_LOCAL_CACHE", None)
+        if cache_config is not None:
+            # cache the new db so a migrating db remains the outermost db
+            db = _get_caching_db(db, cache_config)
+        if old_db is not None:
+            db = _get_migrating_db(db, old_db)
         _db.append(db)
     return _db[-1]
 
@@ -37,6 +44,11 @@ def _get_migrating_db(new_db, old_db):
     return MigratingBlobDB(new_db, old_db)
 
 
+def _get_caching_db(db, config):
+    from .cachingdb import CachingBlobDB
+    return CachingBlobDB(db, config["dir"], config["max_size"])
+
+
 class CODES:
     """Blob type codes.
 
@@ -0,0 +1,170 @@
+"""Local disk cache for blob content read from another blob db
+"""
+import os
+import threading
+from collections import OrderedDict
+from os.path import dirname, isdir, join
+from uuid import uuid4
+
+from corehq.blobs.fsdb import CHUNK_SIZE, FileRange, safejoin
+from corehq.blobs.util import validate_byte_range
+from corehq.util.metrics import metrics_counter
+
+TEMP_SUFFIX = ".tmp"
+
+
+class CachingBlobDB(object):
+    """Read-through cache of blob content on local disk
+
+    Blobs are never modified once written, so cached content only needs
+    to be discarded when a blob is deleted. The least recently read blobs
+    are evicted when the cache grows larger than `max_size` bytes.
+
+    The cache index is kept in memory and rebuilt from the cache
+    directory on startup. Processes sharing a cache directory each count
+    the cache size separately, so it may grow up to `max_size` times the
+    number of processes. A blob evicted by another process is fetched
+    from the wrapped blob db again.
+
+    Only deletes made through this instance remove cached content. A blob
+    deleted or expired by another host or process stays readable from
+    this cache until it is evicted, so the cache is only suitable for
+    blobs that are looked up through their (current) metadata.
+
+    Partial (byte range) reads of blobs that are not cached are passed
+    through to the wrapped blob db without caching.
+    """
+
+    def __init__(self, db, cache_dir, max_size):
+        self.db = db
+        self.metadb = db.metadb
+        self.cache_dir = cache_dir
+        self.max_size = max_size
+        self._lock = threading.Lock()
+        self._sizes = OrderedDict()  # key -> size, least recently used first
+        self._size = 0
+        self._load_index()
+
+    def put(self, *args, **kw):
+        return self.db.put(*args, **kw)
+
+    def get(self, key, byte_range=None):
+        path = safejoin(self.cache_dir, key)
+        with self._lock:
+            cached = key in self._sizes
+            if cached:
+                self._sizes.move_to_end(key)
+        if cached:
+            try:
+                fh = open(path, "rb")
+            except FileNotFoundError:
+                # evicted by another process
+                self._discard(key)
+            else:
+                metrics_counter('commcare.blobs.cache.hits')
+                return _get_range(fh, byte_range)
+
+        metrics_counter('commcare.blobs.cache.misses')
+        if byte_range is not None:
+            return self.db.get(key, byte_range=byte_range)
+        return self._fetch(key, path)
+
+    def get_many(self, keys):
+        for key in keys:
+            yield key, self.get(key)
+
+    def size(self, *args, **kw):
+        return self.db.size(*args, **kw)
+
+    def exists(self, *args, **kw):
+        return self.db.exists(*args, **kw)
+
+    def delete(self, key):
+        self._discard(key)
+        return self.db.delete(key)
+
+    def bulk_delete(self, metas):
+        for meta in metas:
+            self._discard(meta.key)
+        return self.db.bulk_delete(metas)
+
+    def expire(self, *args, **kw):
+        self.metadb.expire(*args, **kw)
+
+    def copy_blob(self, *args, **kw):
+        self.db.copy_blob(*args, **kw)
+
+    def _fetch(self, key, path):
+        dirpath = dirname(path)
+        if not isdir(dirpath):
+            os.makedirs(dirpath, exist_ok=True)
+        temp_path = "{}.{}{}".format(path, uuid4().hex, TEMP_SUFFIX)
+        size = 0
+        try:
+            with self.db.get(key) as blob, open(temp_path, "wb") as fh:
+                for chunk in iter(lambda: blob.read(CHUNK_SIZE), b""):
+                    fh.write(chunk)
+                    size += len(chunk)
+            result = open(temp_path, "rb")
+        except BaseException:
+            _remove(temp_path)
+            raise
+        if size > self.max_size:
+            # too big to cache, the open file is readable after removal
+            _remove(temp_path)
+            return result
+        os.replace(temp_path, path)
+        self._add(key, size)
+        return result
+
+    def _add(self, key, size):
+        evicted = []
+        with self._lock:
+            self._size += size - self._sizes.pop(key, 0)
+            self._sizes[key] = size
+            while self._size > self.max_size:
+                old_key, old_size = self._sizes.popitem(last=False)
+                self._size -= old_size
+                evicted.append(old_key)
+        for old_key in evicted:
+            _remove(safejoin(self.cache_dir, old_key))
+        if evicted:
+            metrics_counter('commcare.blobs.cache.evictions', value=len(evicted))
+
+    def _discard(self, key):
+        with self._lock:
+            self._size -= self._sizes.pop(key, 0)
+        _remove(safejoin(self.cache_dir, key))
+
+    def _load_index(self):
+        if not isdir(self.cache_dir):
+            os.makedirs(self.cache_dir, exist_ok=True)
+        files = []
+        for root, dirs, names in os.walk(self.cache_dir):
+            for name in names:
+                path = join(root, name)
+                if name.endswith(TEMP_SUFFIX):
+                    _remove(path)
+                    continue
+                stat = os.stat(path)
+                key = os.path.relpath(path, self.cache_dir)
+                files.append((stat.st_mtime, key, stat.st_size))
+        for mtime, key, size in sorted(files):
+            self._add(key, size)
+
+
+def _get_range(fh, byte_range):
+    if byte_range is None:
+        return fh
+    start, end = validate_byte_range(byte_range)
+    fh.seek(start)
+    if end is None:
+        return fh
+    return FileRange(fh, end - start + 1)
+
+
+def _remove(path):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
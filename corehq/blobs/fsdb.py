@@ -1,16 +1,18 @@
 """Filesystem database for large binary data objects (blobs)
 """
 import os
-from collections import namedtuple
+from collections import deque, namedtuple
 from hashlib import md5
+from io import RawIOBase
 from os.path import commonprefix, exists, isabs, isdir, dirname, join, realpath, sep
 
 from corehq.blobs.exceptions import BadName, NotFound
 from corehq.blobs.interface import AbstractBlobDB
-from corehq.blobs.util import check_safe_key
+from corehq.blobs.util import check_safe_key, get_readable, validate_byte_range
 from corehq.util.metrics import metrics_counter
 
 CHUNK_SIZE = 4096
+READ_AHEAD_COUNT = 10
 
 
 class FilesystemBlobDB(AbstractBlobDB):
@@ -30,6 +32,7 @@ class FilesystemBlobDB(AbstractBlobDB):
             os.makedirs(dirpath)
         length = 0
         digest = md5()
+        content = get_readable(content)
         with open(path, "wb") as fh:
             while True:
                 chunk = content.read(CHUNK_SIZE)
@@ -42,12 +45,39 @@ class FilesystemBlobDB(AbstractBlobDB):
         self.metadb.put(meta)
         return meta
 
-    def get(self, key):
+    def get(self, key, byte_range=None):
         path = self.get_path(key)
         if not exists(path):
             metrics_counter('commcare.blobdb.notfound')
             raise NotFound(key)
-        return open(path, "rb")
+        fh = open(path, "rb")
+        if byte_range is None:
+            return fh
+        start, end = validate_byte_range(byte_range)
+        fh.seek(start)
+        if end is None:
+            return fh
+        return FileRange(fh, end - start + 1)
+
+    def get_many(self, keys):
+        """Get many blobs, reading ahead of the caller
+
+        The OS is asked to load the next `READ_AHEAD_COUNT` blobs into
+        the page cache while the current blob is being read.
+        """
+        if not hasattr(os, "posix_fadvise"):
+            yield from super(FilesystemBlobDB, self).get_many(keys)
+            return
+        pending = deque()
+        for key in keys:
+            _read_ahead(self.get_path(key))
+            pending.append(key)
+            if len(pending) > READ_AHEAD_COUNT:
+                key = pending.popleft()
+                yield key, self.get(key)
+        while pending:
+            key = pending.popleft()
+            yield key, self.get(key)
 
     def size(self, key):
         path = self.get_path(key)
@@ -97,6 +127,40 @@ class FilesystemBlobDB(AbstractBlobDB):
         return safejoin(self.rootdir, key)
 
 
+class FileRange(RawIOBase):
+    """Read at most `length` bytes from the current position of a file
+    """
+
+    def __init__(self, fileobj, length):
+        self._fileobj = fileobj
+        self._remaining = length
+
+    def readable(self):
+        return True
+
+    def readinto(self, buf):
+        if self._remaining <= 0:
+            return 0
+        size = self._fileobj.readinto(memoryview(buf)[:self._remaining])
+        self._remaining -= size
+        return size
+
+    def close(self):
+        self._fileobj.close()
+        super(FileRange, self).close()
+
+
+def _read_ahead(path):
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except OSError:
+        return  # NotFound is raised when the blob is read
+    try:
+        os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_WILLNEED)
+    finally:
+        os.close(fd)
+
+
 def safejoin(root, subpath):
     """Join root to subpath ensuring that the result is actually inside root
     """
@@ -19,7 +19,9 @@ class AbstractBlobDB(metaclass=ABCMeta):
     def put(self, content, **blob_meta_args):
         """Put a blob in persistent storage
 
-        :param content: A file-like object in binary read mode.
+        :param content: A file-like object in binary read mode or an
+        iterable of `bytes` chunks. Content that is not seekable is
+        streamed to storage without knowing its length in advance.
         :param **blob_meta_args: A single `"meta"` argument (`BlobMeta`
         object) or arguments used to construct a `BlobMeta` object:
 
@@ -52,15 +54,34 @@ class AbstractBlobDB(metaclass=ABCMeta):
         raise NotImplementedError
 
     @abstractmethod
-    def get(self, key):
+    def get(self, key, byte_range=None):
         """Get a blob
 
         :param key: Blob key.
+        :param byte_range: Optional `(start, end)` tuple of byte offsets
+        to read only part of the blob. Like an HTTP `Range` header, both
+        offsets are inclusive and `end` may be `None` to read to the end
+        of the blob.
         :returns: A file-like object in binary read mode. The returned
         object should be closed when finished reading.
         """
         raise NotImplementedError
 
+    def get_many(self, keys):
+        """Get many blobs
+
+        Blob stores that can fetch blobs concurrently override this to
+        fetch ahead of the reader.
+
+        :param keys: Iterable of blob keys.
+        :returns: An iterator of `(key, file-like object)` pairs in the
+        order of `keys`. Each file-like object should be closed when
+        finished reading. `NotFound` is raised when the iterator reaches
+        a blob that does not exist.
+        """
+        for key in keys:
+            yield key, self.get(key)
+
     @abstractmethod
     def exists(self, key):
         """Check if blob exists
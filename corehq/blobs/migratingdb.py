@@ -25,6 +25,10 @@ class MigratingBlobDB(object):
         except NotFound:
             return self.old_db.get(*args, **kw)
 
+    def get_many(self, keys):
+        for key in keys:
+            yield key, self.get(key)
+
     def size(self, *args, **kw):
         try:
             return self.new_db.size(*args, **kw)
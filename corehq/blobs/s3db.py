@@ -1,23 +1,36 @@
 import os
 import weakref
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from contextlib import contextmanager
 from io import RawIOBase, UnsupportedOperation
 
 from corehq.blobs.exceptions import NotFound
 from corehq.blobs.interface import AbstractBlobDB
-from corehq.blobs.util import check_safe_key
+from corehq.blobs.util import (
+    CountingReader,
+    check_safe_key,
+    get_readable,
+    validate_byte_range,
+)
 from corehq.util.metrics import metrics_counter, metrics_histogram_timer
 from dimagi.utils.logging import notify_exception
 
 from dimagi.utils.chunked import chunked
 
 import boto3
+from boto3.s3.transfer import TransferConfig
 from botocore.client import Config
 from botocore.exceptions import ClientError
 from botocore.utils import fix_s3_host
 
 DEFAULT_S3_BUCKET = "blobdb"
 DEFAULT_BULK_DELETE_CHUNKSIZE = 1000
+DEFAULT_MULTIPART_CHUNKSIZE = 8 * 1024 * 1024
+DEFAULT_MAX_CONCURRENCY = 10
+# leave room in botocore's default pool of 10 connections for the
+# streams being read by the caller of get_many
+DEFAULT_GET_MANY_CONCURRENCY = 8
 
 
 class S3BlobDB(AbstractBlobDB):
@@ -36,6 +49,14 @@ class S3BlobDB(AbstractBlobDB):
         )
         self.bulk_delete_chunksize = config.get("bulk_delete_chunksize", DEFAULT_BULK_DELETE_CHUNKSIZE)
         self.s3_bucket_name = config.get("s3_bucket", DEFAULT_S3_BUCKET)
+        # content larger than one part is uploaded in parts, several at a time
+        multipart_chunksize = config.get("multipart_chunksize", DEFAULT_MULTIPART_CHUNKSIZE)
+        self.transfer_config = TransferConfig(
+            multipart_threshold=multipart_chunksize,
+            multipart_chunksize=multipart_chunksize,
+            max_concurrency=config.get("max_concurrency", DEFAULT_MAX_CONCURRENCY),
+        )
+        self.get_many_concurrency = config.get("get_many_concurrency", DEFAULT_GET_MANY_CONCURRENCY)
         self._s3_bucket_exists = False
         # https://github.com/boto/boto3/issues/259
         self.db.meta.client.meta.events.unregister('before-sign.s3', fix_s3_host)
@@ -64,7 +85,7 @@ class S3BlobDB(AbstractBlobDB):
         meta = self.metadb.new(**blob_meta_args)
         check_safe_key(meta.key)
         s3_bucket = self._s3_bucket(create=True)
-        if isinstance(content, BlobStream) and content.blob_db is self:
+        if isinstance(content, BlobStream) and content.blob_db is self and content.byte_range is None:
             obj = s3_bucket.Object(content.blob_key)
             meta.content_length = obj.content_length
             self.metadb.put(meta)
@@ -72,18 +93,64 @@ class S3BlobDB(AbstractBlobDB):
             with self.report_timing('put-via-copy', meta.key):
                 s3_bucket.copy(source, meta.key)
         else:
-            content.seek(0)
-            meta.content_length = get_file_size(content)
-            self.metadb.put(meta)
-            with self.report_timing('put', meta.key):
-                s3_bucket.upload_fileobj(content, meta.key)
+            content = get_readable(content)
+            try:
+                content.seek(0)
+                meta.content_length = get_file_size(content)
+            except (OSError, ValueError):
+                # not seekable: stream the content, counting its length
+                content = CountingReader(content)
+                with self.report_timing('put-stream', meta.key):
+                    s3_bucket.upload_fileobj(content, meta.key, Config=self.transfer_config)
+                meta.content_length = content.bytes_read
+                self.metadb.put(meta)
+            else:
+                self.metadb.put(meta)
+                with self.report_timing('put', meta.key):
+                    s3_bucket.upload_fileobj(content, meta.key, Config=self.transfer_config)
         return meta
 
-    def get(self, key):
+    def get(self, key, byte_range=None):
         check_safe_key(key)
+        kwargs = {}
+        if byte_range is not None:
+            start, end = validate_byte_range(byte_range)
+            kwargs["Range"] = "bytes={}-{}".format(start, "" if end is None else end)
         with maybe_not_found(throw=NotFound(key)), self.report_timing('get', key):
-            resp = self._s3_bucket().Object(key).get()
-        return BlobStream(resp["Body"], self, key)
+            resp = self._s3_bucket().Object(key).get(**kwargs)
+        return BlobStream(resp["Body"], self, key, byte_range)
+
+    def get_many(self, keys):
+        """Get many blobs, fetching up to `get_many_concurrency` at a time
+
+        Blobs are requested in threads ahead of the caller. The S3 client
+        is used directly because it is thread safe (boto3 resources are
+        not).
+        """
+        client = self.db.meta.client
+
+        def get(key):
+            check_safe_key(key)
+            with maybe_not_found(throw=NotFound(key)), self.report_timing('get', key):
+                resp = client.get_object(Bucket=self.s3_bucket_name, Key=key)
+            return BlobStream(resp["Body"], self, key)
+
+        pending = deque()
+        with ThreadPoolExecutor(max_workers=self.get_many_concurrency) as executor:
+            try:
+                for key in keys:
+                    pending.append((key, executor.submit(get, key)))
+                    if len(pending) >= self.get_many_concurrency:
+                        key, future = pending.popleft()
+                        yield key, future.result()
+                while pending:
+                    key, future = pending.popleft()
+                    yield key, future.result()
+            finally:
+                # caller stopped early or a get failed: close fetched streams
+                for key, future in pending:
+                    if not future.cancel() and future.exception() is None:
+                        future.result().close()
 
     def size(self, key):
         check_safe_key(key)
@@ -144,10 +211,11 @@ class S3BlobDB(AbstractBlobDB):
 
 class BlobStream(RawIOBase):
 
-    def __init__(self, stream, blob_db, blob_key):
+    def __init__(self, stream, blob_db, blob_key, byte_range=None):
         self._obj = stream
         self._blob_db = weakref.ref(blob_db)
         self.blob_key = blob_key
+        self.byte_range = byte_range
 
     def readable(self):
         return True
@@ -0,0 +1,104 @@
+from io import BytesIO
+from os.path import exists
+from shutil import rmtree
+from tempfile import mkdtemp
+
+from django.test import TestCase
+
+from testil import replattr
+
+from corehq.blobs import NotFound
+from corehq.blobs.cachingdb import CachingBlobDB
+from corehq.blobs.fsdb import safejoin
+from corehq.blobs.tests.util import TemporaryFilesystemBlobDB, new_meta
+from corehq.util.metrics.tests.utils import capture_metrics
+
+
+class TestCachingBlobDB(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super(TestCachingBlobDB, cls).setUpClass()
+        cls.fsdb = TemporaryFilesystemBlobDB()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.fsdb.close()
+        super(TestCachingBlobDB, cls).tearDownClass()
+
+    def setUp(self):
+        self.cache_dir = mkdtemp(prefix="blobcache")
+        self.addCleanup(rmtree, self.cache_dir)
+        self.db = CachingBlobDB(self.fsdb, self.cache_dir, max_size=10)
+
+    def test_get_from_cache(self):
+        meta = self.db.put(BytesIO(b"content"), meta=new_meta())
+        with capture_metrics() as metrics:
+            with self.db.get(key=meta.key) as fh:
+                self.assertEqual(fh.read(), b"content")
+            with replattr(self.fsdb, "get", blow_up, sigcheck=False):
+                with self.db.get(key=meta.key) as fh:
+                    self.assertEqual(fh.read(), b"content")
+        self.assertEqual(metrics.sum('commcare.blobs.cache.misses'), 1)
+        self.assertEqual(metrics.sum('commcare.blobs.cache.hits'), 1)
+
+    def test_get_byte_range(self):
+        meta = self.db.put(BytesIO(b"content"), meta=new_meta())
+        with self.db.get(key=meta.key, byte_range=(1, 3)) as fh:
+            self.assertEqual(fh.read(), b"ont")
+        self.assertFalse(self.is_cached(meta.key))
+        self.db.get(key=meta.key).close()
+        with replattr(self.fsdb, "get", blow_up, sigcheck=False):
+            with self.db.get(key=meta.key, byte_range=(1, 3)) as fh:
+                self.assertEqual(fh.read(), b"ont")
+            with self.db.get(key=meta.key, byte_range=(3, None)) as fh:
+                self.assertEqual(fh.read(), b"tent")
+
+    def test_evict_least_recently_used(self):
+        first = self.db.put(BytesIO(b"first"), meta=new_meta())
+        second = self.db.put(BytesIO(b"second"), meta=new_meta())
+        third = self.db.put(BytesIO(b"3rd"), meta=new_meta())
+        for meta in [first, second, third]:
+            self.db.get(key=meta.key).close()
+        self.assertFalse(self.is_cached(first.key))
+        self.assertTrue(self.is_cached(second.key))
+        self.assertTrue(self.is_cached(third.key))
+
+    def test_blob_larger_than_cache(self):
+        meta = self.db.put(BytesIO(b"too much content"), meta=new_meta())
+        with self.db.get(key=meta.key) as fh:
+            self.assertEqual(fh.read(), b"too much content")
+        self.assertFalse(self.is_cached(meta.key))
+
+    def test_delete(self):
+        meta = self.db.put(BytesIO(b"content"), meta=new_meta())
+        self.db.get(key=meta.key).close()
+        self.assertTrue(self.db.delete(key=meta.key))
+        self.assertFalse(self.is_cached(meta.key))
+        with self.assertRaises(NotFound):
+            self.db.get(key=meta.key)
+
+    def test_bulk_delete(self):
+        metas = [self.db.put(BytesIO(b"content"), meta=new_meta()) for x in range(2)]
+        self.db.get(key=metas[0].key).close()
+        self.assertTrue(self.db.bulk_delete(metas=metas))
+        self.assertFalse(self.is_cached(metas[0].key))
+
+    def test_load_index(self):
+        meta = self.db.put(BytesIO(b"content"), meta=new_meta())
+        self.db.get(key=meta.key).close()
+        db = CachingBlobDB(self.fsdb, self.cache_dir, max_size=10)
+        with replattr(self.fsdb, "get", blow_up, sigcheck=False):
+            with db.get(key=meta.key) as fh:
+                self.assertEqual(fh.read(), b"content")
+
+    def is_cached(self, key):
+        return key in self.db._sizes and exists(safejoin(self.cache_dir, key))
+
+
+def blow_up(*args, **kw):
+    raise Boom("should not be called")
+
+
+class Boom(Exception):
+    pass
@@ -68,6 +68,37 @@ class _BlobDBTests(object):
         with self.db.get(key=new.key) as fh:
             self.assertEqual(fh.read(), b"content")
 
+    def test_put_from_generator(self):
+        meta = self.db.put((chunk for chunk in [b"con", b"", b"tent"]), meta=new_meta())
+        self.assertEqual(meta.content_length, 7)
+        with self.db.get(key=meta.key) as fh:
+            self.assertEqual(fh.read(), b"content")
+
+    def test_get_byte_range(self):
+        meta = self.db.put(BytesIO(b"content"), meta=new_meta())
+        with self.db.get(key=meta.key, byte_range=(1, 3)) as fh:
+            self.assertEqual(fh.read(), b"ont")
+        with self.db.get(key=meta.key, byte_range=(3, None)) as fh:
+            self.assertEqual(fh.read(), b"tent")
+
+    def test_get_many(self):
+        metas = [self.db.put(BytesIO(b"content %d" % n), meta=new_meta()) for n in range(12)]
+        keys = [meta.key for meta in metas]
+        results = []
+        for key, fh in self.db.get_many(keys):
+            with fh:
+                results.append((key, fh.read()))
+        self.assertEqual(results, [(key, b"content %d" % n) for n, key in enumerate(keys)])
+
+    def test_get_many_not_found(self):
+        meta = self.db.put(BytesIO(b"content"), meta=new_meta())
+        items = self.db.get_many([meta.key, "missing"])
+        key, fh = next(items)
+        with fh:
+            self.assertEqual(fh.read(), b"content")
+        with self.assertRaises(mod.NotFound):
+            next(items)
+
     def test_exists(self):
         meta = self.db.put(BytesIO(b"content"), meta=new_meta())
         self.assertTrue(self.db.exists(key=meta.key), 'not found')
@@ -6,6 +6,9 @@ from mock import patch
 from testil import assert_raises, tempdir
 
 import corehq.blobs as mod
+from corehq.blobs.cachingdb import CachingBlobDB
+from corehq.blobs.fsdb import FilesystemBlobDB
+from corehq.blobs.migratingdb import MigratingBlobDB
 from corehq.util.test_utils import generate_cases
 from settingshelper import SharedDriveConfiguration
 
@@ -34,3 +37,25 @@ def test_get_blobdb(self, msg, root=True, blob_dir=None):
             with override_settings(SHARED_DRIVE_CONF=conf, S3_BLOB_DB_SETTINGS=None):
                 with assert_raises(mod.Error, msg=re.compile(msg)):
                     mod.get_blob_db()
+
+
+def test_get_blobdb_migrating_with_cache():
+    with tempdir() as tmp:
+        conf = SharedDriveConfiguration(
+            shared_drive_path=tmp,
+            restore_dir=None,
+            transfer_dir=None,
+            temp_dir=None,
+            blob_dir="blobdb",
+        )
+        new_db = FilesystemBlobDB(join(tmp, "new"))
+        cache_config = {"dir": join(tmp, "cache"), "max_size": 100}
+        with patch("corehq.blobs._db", new=[]), \
+                patch("corehq.blobs._get_s3_db", return_value=new_db), \
+                override_settings(SHARED_DRIVE_CONF=conf, BLOB_DB_MIGRATING_FROM_FS_TO_S3=True,
+                                  BLOB_DB_LOCAL_CACHE=cache_config):
+            db = mod.get_blob_db()
+        assert isinstance(db, MigratingBlobDB), db
+        assert isinstance(db.new_db, CachingBlobDB), db.new_db
+        assert db.new_db.db is new_db, db.new_db.db
+        assert isinstance(db.old_db, FilesystemBlobDB), db.old_db
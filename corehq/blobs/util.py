@@ -3,6 +3,7 @@ import os
 import re
 from base64 import urlsafe_b64encode, b64encode
 from datetime import datetime
+from io import RawIOBase
 
 from jsonfield import JSONField
 
@@ -115,6 +116,69 @@ def get_content_md5(fileobj):
     return b64encode(md5.digest()).decode('ascii')
 
 
+def get_readable(content):
+    """Get a file-like object for blob content
+
+    :param content: A file-like object in binary read mode or an
+    iterable of `bytes` chunks (e.g., a generator).
+    """
+    if hasattr(content, "read"):
+        return content
+    return IterableReader(content)
+
+
+class IterableReader(RawIOBase):
+    """Non-seekable file-like object reading chunks of bytes from an iterable
+    """
+
+    def __init__(self, iterable):
+        self._chunks = iter(iterable)
+        self._chunk = b""
+
+    def readable(self):
+        return True
+
+    def readinto(self, buf):
+        while not self._chunk:
+            try:
+                self._chunk = next(self._chunks)
+            except StopIteration:
+                return 0
+        size = min(len(buf), len(self._chunk))
+        buf[:size] = self._chunk[:size]
+        self._chunk = self._chunk[size:]
+        return size
+
+
+class CountingReader(RawIOBase):
+    """Non-seekable file-like object counting the bytes read from another
+    """
+
+    def __init__(self, fileobj):
+        self._fileobj = fileobj
+        self.bytes_read = 0
+
+    def readable(self):
+        return True
+
+    def read(self, size=-1):
+        data = self._fileobj.read(size)
+        self.bytes_read += len(data)
+        return data
+
+
+def validate_byte_range(byte_range):
+    """Validate a `(start, end)` byte range argument
+
+    :returns: The byte range as a tuple of `start` and `end`, which may
+    be `None`.
+    """
+    start, end = byte_range
+    if start < 0 or (end is not None and end < start):
+        raise ValueError("invalid byte range: {!r}".format(byte_range))
+    return start, end
+
+
 def set_max_connections(num_workers):
     """Set max connections for urllib3
 
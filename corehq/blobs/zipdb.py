@@ -18,7 +18,7 @@ class ZipBlobDB(AbstractBlobDB):
     def put(self, **blob_meta_args):
         raise NotImplementedError
 
-    def get(self, key):
+    def get(self, key, byte_range=None):
         raise NotImplementedError
 
     def delete(self, key):
@@ -234,10 +234,13 @@ def iter_es_docs(index_name, ids):
         yield from mget_query(index_name, ids_chunk)
 
 
-def iter_es_docs_from_query(query):
+def iter_es_docs_from_query(query, slice_id=None, max_slices=None):
     """Returns all docs which match query
+
+    Pass ``slice_id`` and ``max_slices`` to only return one slice of the
+    docs. See ``scroll_query``.
     """
-    scroll_result = query.scroll_ids()
+    scroll_result = query.scroll_ids(slice_id=slice_id, max_slices=max_slices)
 
     def iter_export_docs():
         with TransientTempfile() as temp_path:
@@ -254,19 +257,49 @@ def iter_es_docs_from_query(query):
     return ScanResult(scroll_result.count, iter_export_docs())
 
 
-def scroll_query(index_name, q, es_instance_alias=ES_DEFAULT_INSTANCE):
+def scroll_query(index_name, q, es_instance_alias=ES_DEFAULT_INSTANCE, slice_id=None, max_slices=None):
+    """Scroll all docs matching the query
+
+    :param slice_id: Only scroll slice ``slice_id`` of ``max_slices``
+    disjoint slices of the docs so that the slices can be scrolled
+    concurrently, each with its own scroll id. Slices are made up of whole
+    index shards since the scroll api does not support slicing in the
+    versions of Elasticsearch we support, so there is no benefit to using
+    more slices than the index has shards.
+    """
     es_meta = ES_META[index_name]
+    kwargs = {}
     try:
+        client = get_es_instance(es_instance_alias)
+        if max_slices is not None:
+            preference = _get_slice_preference(client, es_meta.index, slice_id, max_slices)
+            if preference is None:
+                return ScanResult(0, iter([]))
+            kwargs['preference'] = preference
         return scan(
-            get_es_instance(es_instance_alias),
+            client,
             index=es_meta.index,
             doc_type=es_meta.type,
             query=q,
+            **kwargs
         )
     except ElasticsearchException as e:
         raise ESError(e)
 
 
+def _get_slice_preference(client, index, slice_id, max_slices):
+    """Get the search preference that limits a search to the shards in a slice
+
+    :returns: The preference or ``None`` if the slice has no shards.
+    """
+    assert 0 <= slice_id < max_slices, (slice_id, max_slices)
+    num_shards = len(client.search_shards(index=index)['shards'])
+    shards = list(range(slice_id, num_shards, max_slices))
+    if not shards:
+        return None
+    return '_shards:{}'.format(','.join(str(shard) for shard in shards))
+
+
 class ScanResult(object):
 
     def __init__(self, count, iterator):
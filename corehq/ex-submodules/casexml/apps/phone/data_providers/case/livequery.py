@@ -23,9 +23,11 @@ Example case graphs with outcomes:
 """
 import logging
 from collections import defaultdict
-from functools import wraps
+from functools import partial, wraps
 from itertools import chain, islice
 
+from dimagi.utils.chunked import chunked
+
 from casexml.apps.case.const import CASE_INDEX_EXTENSION as EXTENSION
 from casexml.apps.phone.const import ASYNC_RETRY_AFTER
 from casexml.apps.phone.data_providers.case.load_testing import (
@@ -33,12 +35,16 @@ from casexml.apps.phone.data_providers.case.load_testing import (
 )
 from casexml.apps.phone.data_providers.case.stock import get_stock_payload
 from casexml.apps.phone.data_providers.case.utils import get_case_sync_updates
+from casexml.apps.phone.restore_caching import get_case_xml_cache
 from casexml.apps.phone.tasks import ASYNC_RESTORE_SENT
 from corehq.form_processor.interfaces.dbaccessors import CaseAccessors
 from corehq.sql_db.routers import read_from_plproxy_standbys
+from corehq.util.metrics import metrics_counter
 from corehq.toggles import LIVEQUERY_READ_FROM_STANDBYS, NAMESPACE_USER
 from corehq.util.datadog.utils import case_load_counter
 
+LIVEQUERY_PARTITION_SIZE = 5000
+
 
 def livequery_read_from_standbys(func):
     @wraps(func)
@@ -60,6 +66,131 @@ def do_livequery(timing_context, restore_state, response, async_task=None):
     the `restore_state.current_sync_log` and progress of `async_task`.
     Extends `response` with restore elements.
     """
+    debug = logging.getLogger(__name__).debug
+    accessor = CaseAccessors(restore_state.domain)
+    owner_ids = list(restore_state.owner_ids)
+
+    debug("sync %s for %r", restore_state.current_sync_log._id, owner_ids)
+    with timing_context("livequery"):
+        with timing_context("get_case_ids_by_owners"):
+            owned_ids = accessor.get_case_ids_by_owners(owner_ids, closed=False)
+            debug("owned: %r", owned_ids)
+
+        live_ids, indices = get_live_case_ids_and_indices(
+            timing_context, accessor, set(owned_ids), owned_ids)
+
+        if restore_state.last_sync_log:
+            with timing_context("discard_already_synced_cases"):
+                debug('last sync: %s', restore_state.last_sync_log._id)
+                sync_ids = discard_already_synced_cases(
+                    live_ids, restore_state, accessor)
+        else:
+            sync_ids = live_ids
+        restore_state.current_sync_log.case_ids_on_phone = live_ids
+
+        with timing_context("compile_response(%s cases)" % len(sync_ids)):
+            iaccessor = PrefetchIndexCaseAccessor(accessor, indices)
+            compile_response(
+                timing_context,
+                restore_state,
+                response,
+                batch_cases(iaccessor, sync_ids),
+                init_progress(async_task, len(sync_ids)),
+            )
+
+
+@livequery_read_from_standbys
+def do_livequery_partitioned(timing_context, restore_state, response, async_task=None):
+    """Get case sync restore response, walking the case graph in partitions
+
+    Same result as `do_livequery`, but the case index graph is walked from
+    `LIVEQUERY_PARTITION_SIZE` owned cases at a time and the case XML for
+    each partition is written to `response` before the next partition is
+    walked. Peak memory use for the case graph is bounded by partition
+    size rather than by the number of cases owned by the user.
+
+    Every live case is made live by a chain of indices starting at a
+    single owned case, so the union of the live cases found from each
+    partition is the same as the live cases found from all owned cases.
+    Cases reachable from more than one partition may be walked more than
+    once, but are only written to the response once.
+    """
+    debug = logging.getLogger(__name__).debug
+    accessor = CaseAccessors(restore_state.domain)
+    owner_ids = list(restore_state.owner_ids)
+    sync_log = restore_state.last_sync_log
+
+    debug("sync %s for %r", restore_state.current_sync_log._id, owner_ids)
+    with timing_context("livequery"):
+        with timing_context("get_case_ids_by_owners"):
+            owned_ids = accessor.get_case_ids_by_owners(owner_ids, closed=False)
+            debug("owned: %r", owned_ids)
+
+        phone_ids = sync_log.case_ids_on_phone if sync_log else set()
+        if phone_ids:
+            with timing_context("get_modified_case_ids"):
+                # cases on phone that have been modified since last sync
+                modified_ids = set(accessor.get_modified_case_ids(list(phone_ids), sync_log))
+        else:
+            modified_ids = set()
+
+        live_ids = set()
+        synced_ids = set()
+        modified_indices = {}
+        update_progress = init_progress(async_task, len(owned_ids))
+        owned_set = set(owned_ids)
+        for seed_ids in chunked(owned_ids, LIVEQUERY_PARTITION_SIZE):
+            with timing_context("livequery partition (%s cases)" % len(seed_ids)):
+                partition_live_ids, indices = get_live_case_ids_and_indices(
+                    timing_context, accessor, owned_set, seed_ids)
+                # sync all live cases not on phone and modified cases on phone
+                sync_ids = {
+                    case_id for case_id in partition_live_ids - live_ids
+                    if case_id not in phone_ids or case_id in modified_ids
+                }
+                live_ids.update(partition_live_ids)
+                for case_id in modified_ids.intersection(indices):
+                    modified_indices.setdefault(case_id, indices[case_id])
+
+                compile_response(
+                    timing_context,
+                    restore_state,
+                    response,
+                    batch_cases(PrefetchIndexCaseAccessor(accessor, indices), sync_ids),
+                    partial(_add_done, update_progress, len(synced_ids)),
+                )
+                synced_ids.update(sync_ids)
+                # release this partition's indices before walking the next one
+                del indices
+
+        # modified cases on phone that are no longer live
+        sync_ids = modified_ids - synced_ids
+        with timing_context("compile_response(%s cases)" % len(sync_ids)):
+            indices = defaultdict(list, modified_indices)
+            compile_response(
+                timing_context,
+                restore_state,
+                response,
+                batch_cases(PrefetchIndexCaseAccessor(accessor, indices), sync_ids),
+                partial(_add_done, update_progress, len(synced_ids)),
+            )
+        restore_state.current_sync_log.case_ids_on_phone = live_ids
+
+
+def _add_done(update_progress, previously_done, done):
+    update_progress(previously_done + done)
+
+
+def get_live_case_ids_and_indices(timing_context, accessor, owned_ids, seed_ids):
+    """Walk the case index graph from `seed_ids` and find the live cases
+
+    :param owned_ids: Set of all open case ids owned by the restore user.
+    :param seed_ids: Owned case ids to start the walk from. Only cases
+    reachable from these through case indices are considered.
+    :returns: A tuple `(live_ids, indices)` with the set of live case
+    ids and a dict of case id to the list of indices of each case that
+    was reached.
+    """
     def index_key(index):
         return '{} {}'.format(index.case_id, index.identifier)
 
@@ -197,7 +328,6 @@ def do_livequery(timing_context, restore_state, response, async_task=None):
 
     IGNORE = object()
     debug = logging.getLogger(__name__).debug
-    accessor = CaseAccessors(restore_state.domain)
 
     # case graph data structures
     live_ids = set()
@@ -207,67 +337,42 @@ def do_livequery(timing_context, restore_state, response, async_task=None):
     parents_by_child = defaultdict(set)    # child_id -> parent_ids
     indices = defaultdict(list)  # case_id -> list of CommCareCaseIndex-like
     seen_ix = defaultdict(set)   # case_id -> set of '<index.case_id> <index.identifier>'
-    owner_ids = list(restore_state.owner_ids)
 
-    debug("sync %s for %r", restore_state.current_sync_log._id, owner_ids)
-    with timing_context("livequery"):
-        with timing_context("get_case_ids_by_owners"):
-            owned_ids = accessor.get_case_ids_by_owners(owner_ids, closed=False)
-            debug("owned: %r", owned_ids)
-
-        next_ids = all_ids = set(owned_ids)
-        owned_ids = set(owned_ids)  # owned, open case ids (may be extensions)
-        open_ids = set(owned_ids)
-        while next_ids:
-            exclude = set(chain.from_iterable(seen_ix[id] for id in next_ids))
-            with timing_context("get_related_indices({} cases, {} seen)".format(
-                    len(next_ids), len(exclude))):
-                related = accessor.get_related_indices(list(next_ids), exclude)
-                if not related:
-                    break
-                update_open_and_deleted_ids(related)
-                next_ids = {classify(index, next_ids)
-                    for index in related
-                    if index.referenced_id not in deleted_ids
-                        and index.case_id not in deleted_ids}
-                next_ids.discard(IGNORE)
-                all_ids.update(next_ids)
-                debug('next: %r', next_ids)
-
-        with timing_context("enliven open roots (%s cases)" % len(open_ids)):
-            debug('open: %r', open_ids)
-            # owned, open, not an extension -> live
-            for case_id in owned_ids:
-                if not is_extension(case_id):
-                    enliven(case_id)
-
-            # available case with live extension -> live
-            for case_id in open_ids:
-                if (case_id not in live_ids
-                        and not is_extension(case_id)
-                        and has_live_extension(case_id)):
-                    enliven(case_id)
-
-            debug('live: %r', live_ids)
-
-        if restore_state.last_sync_log:
-            with timing_context("discard_already_synced_cases"):
-                debug('last sync: %s', restore_state.last_sync_log._id)
-                sync_ids = discard_already_synced_cases(
-                    live_ids, restore_state, accessor)
-        else:
-            sync_ids = live_ids
-        restore_state.current_sync_log.case_ids_on_phone = live_ids
-
-        with timing_context("compile_response(%s cases)" % len(sync_ids)):
-            iaccessor = PrefetchIndexCaseAccessor(accessor, indices)
-            compile_response(
-                timing_context,
-                restore_state,
-                response,
-                batch_cases(iaccessor, sync_ids),
-                init_progress(async_task, len(sync_ids)),
-            )
+    next_ids = all_ids = set(seed_ids)
+    open_ids = set(seed_ids)
+    while next_ids:
+        exclude = set(chain.from_iterable(seen_ix[id] for id in next_ids))
+        with timing_context("get_related_indices({} cases, {} seen)".format(
+                len(next_ids), len(exclude))):
+            related = accessor.get_related_indices(list(next_ids), exclude)
+            if not related:
+                break
+            update_open_and_deleted_ids(related)
+            next_ids = {classify(index, next_ids)
+                for index in related
+                if index.referenced_id not in deleted_ids
+                    and index.case_id not in deleted_ids}
+            next_ids.discard(IGNORE)
+            all_ids.update(next_ids)
+            debug('next: %r', next_ids)
+
+    with timing_context("enliven open roots (%s cases)" % len(open_ids)):
+        debug('open: %r', open_ids)
+        # owned, open, not an extension -> live
+        for case_id in owned_ids.intersection(all_ids):
+            if not is_extension(case_id):
+                enliven(case_id)
+
+        # available case with live extension -> live
+        for case_id in open_ids:
+            if (case_id not in live_ids
+                    and not is_extension(case_id)
+                    and has_live_extension(case_id)):
+                enliven(case_id)
+
+        debug('live: %r', live_ids)
+
+    return live_ids, indices
 
 
 def discard_already_synced_cases(live_ids, restore_state, accessor):
@@ -333,8 +438,42 @@ def init_progress(async_task, total):
     return update_progress
 
 
+def get_xml_for_updates(case_xml_cache, updates, restore_state):
+    if case_xml_cache is None:
+        return [item
+            for update in updates
+            for item in get_xml_for_response(update, restore_state)]
+    return get_cached_xml_for_updates(case_xml_cache, updates, restore_state)
+
+
+def get_cached_xml_for_updates(case_xml_cache, updates, restore_state):
+    """Get case XML for updates, only serializing cases that are not cached
+
+    Not used for load testing users since their cases are rewritten
+    before serialization.
+    """
+    cache_keys = [case_xml_cache.get_cache_key(update, restore_state.version) for update in updates]
+    cached = case_xml_cache.get_many(cache_keys)
+    to_cache = {}
+    elements = []
+    for cache_key, update in zip(cache_keys, updates):
+        if cache_key in cached:
+            elements.append(cached[cache_key])
+        else:
+            xml, = get_xml_for_response(update, restore_state)
+            to_cache[cache_key] = xml
+            elements.append(xml)
+    case_xml_cache.set_many(to_cache)
+
+    tags = {'domain': restore_state.domain}
+    metrics_counter('commcare.restores.case_xml_cache.hits', len(updates) - len(to_cache), tags=tags)
+    metrics_counter('commcare.restores.case_xml_cache.misses', len(to_cache), tags=tags)
+    return elements
+
+
 def compile_response(timing_context, restore_state, response, batches, update_progress):
     done = 0
+    case_xml_cache = get_case_xml_cache() if restore_state.loadtest_factor <= 1 else None
     for cases in batches:
         with timing_context("get_stock_payload"):
             response.extend(get_stock_payload(
@@ -348,9 +487,7 @@ def compile_response(timing_context, restore_state, response, batches, update_pr
                 restore_state.domain, cases, restore_state.last_sync_log)
 
         with timing_context("get_xml_for_response (%s updates)" % len(updates)):
-            response.extend(item
-                for update in updates
-                for item in get_xml_for_response(update, restore_state))
+            response.extend(get_xml_for_updates(case_xml_cache, updates, restore_state))
 
         done += len(cases)
         update_progress(done)
@@ -0,0 +1,275 @@
+"""Initial livequery restores assembled from cached per-owner case blocks
+
+Users that share owners (e.g. supervisors assigned to the same location)
+would each walk the same case graph and serialize the same cases on
+their initial restore. Instead the live cases reachable from the cases
+owned by each owner id are built into an `OwnerCaseBlock` once, cached,
+and a user's case payload is stitched together from the blocks of
+their owner ids.
+
+Every live case is made live by a chain of indices starting at a single
+owned case (see `do_livequery_partitioned`), so the union of the live
+cases of each owner's block is the set of live cases of the user.
+
+Blocks are stored in the blob db. `RESTORE_OWNER_BLOCK_CACHE` only maps
+each owner to the key of its current block.
+
+A cached block is only used if:
+- the open cases owned by the owner are unchanged,
+- none of the cases reached while building the block have been modified
+  since, and
+- no open extension case outside the block has been added to a case in
+  the block. Adding an index only modifies the extension case.
+"""
+import hashlib
+import logging
+import pickle
+from io import BytesIO
+from uuid import uuid4
+
+from django.conf import settings
+from django.core.cache import caches
+
+from casexml.apps.phone.data_providers.case.livequery import (
+    PrefetchIndexCaseAccessor,
+    batch_cases,
+    get_live_case_ids_and_indices,
+    get_xml_for_updates,
+    init_progress,
+    livequery_read_from_standbys,
+)
+from casexml.apps.phone.data_providers.case.utils import get_case_sync_updates
+from casexml.apps.phone.restore_caching import get_case_xml_cache
+from corehq.blobs import CODES, NotFound, get_blob_db
+from corehq.form_processor.interfaces.dbaccessors import CaseAccessors
+from corehq.toggles import LIVEQUERY_OWNER_BLOCK_SYNC, NON_COMMTRACK_LEDGERS
+from corehq.util.metrics import metrics_counter
+
+
+class OwnerCaseBlock(object):
+    """Serialized live cases reachable from the cases owned by one owner id
+
+    :param owned_ids: Set of open case ids owned by the owner.
+    :param live_ids: Set of live case ids.
+    :param modified_dates: Dict of case id to `server_modified_on` of
+    each case reached while walking the case graph.
+    :param xml_by_case_id: Dict of live case id to case XML.
+    :param index_keys: Set of `'<index.case_id> <index.identifier>'` of
+    the indices that were followed while walking the case graph.
+    """
+
+    def __init__(self, owned_ids, live_ids, modified_dates, xml_by_case_id, index_keys):
+        self.owned_ids = owned_ids
+        self.live_ids = live_ids
+        self.modified_dates = modified_dates
+        self.xml_by_case_id = xml_by_case_id
+        self.index_keys = index_keys
+
+    @property
+    def reached_ids(self):
+        return self.modified_dates.keys()
+
+    def save(self, domain, owner_id, timeout):
+        """Save the block to the blob db
+
+        :returns: The blob key of the saved block.
+        """
+        key = 'restore-owner-block-{}'.format(uuid4().hex)
+        get_blob_db().put(
+            BytesIO(pickle.dumps(vars(self), pickle.HIGHEST_PROTOCOL)),
+            domain=domain,
+            parent_id=owner_id,
+            type_code=CODES.restore,
+            key=key,
+            timeout=max(timeout // 60, 60),
+        )
+        return key
+
+    @classmethod
+    def load(cls, key):
+        """Load a block from the blob db
+
+        :returns: The block or `None` if it has expired.
+        """
+        try:
+            with get_blob_db().get(key=key) as fh:
+                return cls(**pickle.load(fh))
+        except NotFound:
+            return None
+
+
+def should_use_owner_blocks(restore_state):
+    """Owner blocks are only used for initial restores
+
+    Load testing users are excluded since their cases are rewritten
+    before serialization, and projects using ledgers are excluded since
+    ledgers change without modifying the case.
+    """
+    project = restore_state.project
+    return (
+        LIVEQUERY_OWNER_BLOCK_SYNC.enabled(restore_state.domain)
+        and not restore_state.last_sync_log
+        and restore_state.loadtest_factor <= 1
+        and not (project.commtrack_enabled or NON_COMMTRACK_LEDGERS.enabled(project.name))
+    )
+
+
+def get_owner_block_cache_key(domain, owner_id, version):
+    hashable_key = ','.join([domain, owner_id, str(version)])
+    return 'restore-owner-block-key-{}'.format(hashlib.md5(hashable_key.encode('utf-8')).hexdigest())
+
+
+@livequery_read_from_standbys
+def do_livequery_from_owner_blocks(timing_context, restore_state, response, async_task=None):
+    """Get initial case sync restore response from per-owner case blocks
+
+    Same result as `do_livequery` for a restore without a previous sync
+    log. Blocks that are missing or out of date are rebuilt and cached.
+    """
+    debug = logging.getLogger(__name__).debug
+    domain = restore_state.domain
+    accessor = CaseAccessors(domain)
+    cache = caches[settings.RESTORE_OWNER_BLOCK_CACHE]
+    owner_ids = sorted(restore_state.owner_ids)
+    cache_keys = {
+        owner_id: get_owner_block_cache_key(domain, owner_id, restore_state.version)
+        for owner_id in owner_ids
+    }
+
+    debug("sync %s for %r", restore_state.current_sync_log._id, owner_ids)
+    with timing_context("livequery owner blocks"):
+        with timing_context("get_owner_blocks"):
+            block_keys = cache.get_many(list(cache_keys.values()))
+            blocks = {}
+            for owner_id in owner_ids:
+                block_key = block_keys.get(cache_keys[owner_id])
+                block = OwnerCaseBlock.load(block_key) if block_key else None
+                if block is not None:
+                    blocks[owner_id] = block
+
+        with timing_context("get_case_ids_by_owners"):
+            all_owned_ids = set(accessor.get_case_ids_by_owners(owner_ids, closed=False))
+
+        with timing_context("discard_stale_owner_blocks"):
+            _discard_stale_blocks(accessor, blocks, all_owned_ids)
+
+        with timing_context("get_owned_ids_for_new_blocks"):
+            owned_ids_by_owner = _get_owned_ids_for_new_blocks(accessor, blocks, owner_ids, all_owned_ids)
+
+        tags = {'domain': domain}
+        metrics_counter('commcare.restores.owner_blocks.hits', len(blocks), tags=tags)
+        metrics_counter('commcare.restores.owner_blocks.misses', len(owner_ids) - len(blocks), tags=tags)
+
+        timeout = settings.RESTORE_OWNER_BLOCK_CACHE_TIMEOUT
+        new_block_keys = {}
+        for owner_id in owner_ids:
+            if owner_id not in blocks:
+                with timing_context("build_owner_block"):
+                    blocks[owner_id] = build_owner_block(
+                        timing_context, restore_state, accessor, owned_ids_by_owner[owner_id])
+                with timing_context("save_owner_block"):
+                    new_block_keys[cache_keys[owner_id]] = blocks[owner_id].save(domain, owner_id, timeout)
+        if new_block_keys:
+            cache.set_many(new_block_keys, timeout=timeout)
+
+        with timing_context("stitch_owner_blocks"):
+            live_ids = set()
+            total = len(set().union(*(block.live_ids for block in blocks.values())))
+            update_progress = init_progress(async_task, total)
+            for owner_id in owner_ids:
+                block = blocks[owner_id]
+                # cases reachable from more than one owner are only written once
+                response.extend(
+                    xml for case_id, xml in block.xml_by_case_id.items()
+                    if case_id not in live_ids
+                )
+                live_ids.update(block.live_ids)
+                update_progress(len(live_ids))
+        restore_state.current_sync_log.case_ids_on_phone = live_ids
+
+
+def _discard_stale_blocks(accessor, blocks, all_owned_ids):
+    """Discard blocks with cases that changed since they were built
+
+    :param all_owned_ids: Set of open case ids owned by any of the owners.
+    """
+    for owner_id, block in list(blocks.items()):
+        if not block.owned_ids <= all_owned_ids:
+            # an owned case was closed, deleted or reassigned
+            del blocks[owner_id]
+
+    reached_ids = set().union(*(block.reached_ids for block in blocks.values()))
+    if not reached_ids:
+        return
+    modified_dates = accessor.get_last_modified_dates(list(reached_ids))
+    for owner_id, block in list(blocks.items()):
+        if any(modified_dates.get(case_id) != date for case_id, date in block.modified_dates.items()):
+            del blocks[owner_id]
+
+    # New indices only modify the case they are on, so look for new open
+    # extension cases of the cases in each block. The indices of the
+    # blocks are excluded since they are known.
+    reached_ids = set().union(*(block.reached_ids for block in blocks.values()))
+    index_keys = set().union(*(block.index_keys for block in blocks.values()))
+    new_indices = accessor.get_related_indices(list(reached_ids), index_keys) if reached_ids else []
+    for owner_id, block in list(blocks.items()):
+        if any(
+            index.case_id not in block.reached_ids and index.referenced_id in block.reached_ids
+            for index in new_indices
+        ):
+            del blocks[owner_id]
+
+
+def _get_owned_ids_for_new_blocks(accessor, blocks, owner_ids, all_owned_ids):
+    """Get the open case ids owned by each owner that needs a new block
+
+    Owners of open cases that are not in any block (new cases, or cases
+    reassigned to the owner) also get a new block.
+
+    :returns: Dict of owner id to set of owned case ids.
+    """
+    def get_owned_ids(owner_id):
+        return set(accessor.get_case_ids_by_owners([owner_id], closed=False))
+
+    owned_ids_by_owner = {
+        owner_id: get_owned_ids(owner_id)
+        for owner_id in owner_ids if owner_id not in blocks
+    }
+    unknown_ids = all_owned_ids.difference(
+        *(block.owned_ids for block in blocks.values()),
+        *owned_ids_by_owner.values()
+    )
+    if unknown_ids:
+        for case in accessor.get_cases(list(unknown_ids)):
+            if case.owner_id in blocks:
+                del blocks[case.owner_id]
+                owned_ids_by_owner[case.owner_id] = get_owned_ids(case.owner_id)
+    return owned_ids_by_owner
+
+
+def build_owner_block(timing_context, restore_state, accessor, owned_ids):
+    live_ids, indices = get_live_case_ids_and_indices(
+        timing_context, accessor, set(owned_ids), owned_ids)
+
+    reached_ids = set(owned_ids)
+    for case_id, case_indices in indices.items():
+        reached_ids.add(case_id)
+        reached_ids.update(index.referenced_id for index in case_indices)
+    not_live_ids = list(reached_ids - live_ids)
+    modified_dates = accessor.get_last_modified_dates(not_live_ids) if not_live_ids else {}
+
+    xml_by_case_id = {}
+    case_xml_cache = get_case_xml_cache()
+    for cases in batch_cases(PrefetchIndexCaseAccessor(accessor, indices), live_ids):
+        updates = get_case_sync_updates(restore_state.domain, cases, None)
+        for update, xml in zip(updates, get_xml_for_updates(case_xml_cache, updates, restore_state)):
+            case = update.case
+            # use the loaded case so the block is invalidated by any change after it was serialized
+            modified_dates[case.case_id] = case.server_modified_on
+            xml_by_case_id[case.case_id] = xml
+    index_keys = {
+        '{} {}'.format(index.case_id, index.identifier)
+        for case_indices in indices.values()
+        for index in case_indices
+    }
+    return OwnerCaseBlock(set(owned_ids), live_ids, modified_dates, xml_by_case_id, index_keys)
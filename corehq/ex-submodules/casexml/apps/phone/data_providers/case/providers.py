@@ -1,6 +1,14 @@
 from casexml.apps.phone.data_providers import AsyncDataProvider
 from casexml.apps.phone.data_providers.case.clean_owners import CleanOwnerCaseSyncOperation
-from casexml.apps.phone.data_providers.case.livequery import do_livequery
+from casexml.apps.phone.data_providers.case.livequery import (
+    do_livequery,
+    do_livequery_partitioned,
+)
+from casexml.apps.phone.data_providers.case.owner_blocks import (
+    do_livequery_from_owner_blocks,
+    should_use_owner_blocks,
+)
+from corehq.toggles import LIVEQUERY_PARTITIONED_SYNC
 
 
 class CasePayloadProvider(AsyncDataProvider):
@@ -10,7 +18,13 @@ class CasePayloadProvider(AsyncDataProvider):
 
     def extend_response(self, restore_state, response):
         if restore_state.is_livequery:
-            do_livequery(
+            if should_use_owner_blocks(restore_state):
+                livequery = do_livequery_from_owner_blocks
+            elif LIVEQUERY_PARTITIONED_SYNC.enabled(restore_state.domain):
+                livequery = do_livequery_partitioned
+            else:
+                livequery = do_livequery
+            livequery(
                 self.timing_context,
                 restore_state,
                 response,
@@ -1,6 +1,10 @@
 import hashlib
 import logging
 import datetime
+
+from django.conf import settings
+from django.core.cache import caches
+
 from casexml.apps.phone.const import RESTORE_CACHE_KEY_PREFIX, ASYNC_RESTORE_CACHE_KEY_PREFIX
 from corehq.toggles import ENABLE_LOADTEST_USERS
 from corehq.util.quickcache import quickcache
@@ -97,3 +101,45 @@ class RestorePayloadPathCache(_RestoreCache):
 class AsyncRestoreTaskIdCache(_RestoreCache):
     timeout = 24 * 60 * 60
     prefix = ASYNC_RESTORE_CACHE_KEY_PREFIX
+
+
+class CaseXMLCache(object):
+    """
+    Serialized case XML shared between restores, keyed on the case's
+    ``server_modified_on`` so that an entry is never reused after the case
+    changes. Cases synced to many users or on every sync are then only
+    serialized once.
+
+    Uses the Django cache configured by ``settings.RESTORE_CASE_XML_CACHE``
+    (e.g. redis or a local file based cache). See ``get_case_xml_cache``.
+    """
+
+    def __init__(self, cache, timeout):
+        self.cache = cache
+        self.timeout = timeout
+
+    @staticmethod
+    def get_cache_key(update, version):
+        case = update.case
+        hashable_key = ','.join([str(part) for part in [
+            case.case_id,
+            case.server_modified_on.isoformat() if case.server_modified_on else '',
+            version,
+            sorted(update.required_updates),
+            sorted((index.identifier, index.referenced_id) for index in case.indices),
+        ]])
+        return 'restore-case-xml-{}'.format(hashlib.md5(hashable_key.encode('utf-8')).hexdigest())
+
+    def get_many(self, cache_keys):
+        return self.cache.get_many(cache_keys)
+
+    def set_many(self, xml_by_cache_key):
+        if xml_by_cache_key:
+            self.cache.set_many(xml_by_cache_key, timeout=self.timeout)
+
+
+def get_case_xml_cache():
+    """Return the ``CaseXMLCache`` or ``None`` if it is not configured"""
+    if not settings.RESTORE_CASE_XML_CACHE:
+        return None
+    return CaseXMLCache(caches[settings.RESTORE_CASE_XML_CACHE], settings.RESTORE_CASE_XML_CACHE_TIMEOUT)
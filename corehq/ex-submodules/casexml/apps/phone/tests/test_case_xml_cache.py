@@ -0,0 +1,60 @@
+from datetime import datetime
+
+from django.core.cache import caches
+from django.test import SimpleTestCase
+
+from mock import MagicMock, patch
+
+from casexml.apps.case.const import CASE_ACTION_UPDATE
+from casexml.apps.phone.data_providers.case.livequery import get_cached_xml_for_updates
+from casexml.apps.phone.data_providers.case.utils import CaseSyncUpdate
+from casexml.apps.phone.restore_caching import CaseXMLCache
+from casexml.apps.phone.xml import get_case_element, tostring
+from corehq.form_processor.models import CommCareCaseIndexSQL, CommCareCaseSQL
+
+
+class CaseXMLCacheTest(SimpleTestCase):
+
+    def setUp(self):
+        self.cache = caches['locmem']
+        self.cache.clear()
+        self.case_xml_cache = CaseXMLCache(self.cache, 60)
+        self.restore_state = MagicMock(domain='xml-cache', version='2.0', loadtest_factor=1)
+
+    def _get_update(self, server_modified_on=datetime(2020, 1, 1), indices=()):
+        case = CommCareCaseSQL(
+            case_id='case1',
+            domain='xml-cache',
+            type='person',
+            name='Dale',
+            owner_id='owner1',
+            modified_on=datetime(2020, 1, 1),
+            server_modified_on=server_modified_on,
+            case_json={},
+        )
+        case.cached_indices = list(indices)
+        return CaseSyncUpdate(case, None, required_updates=[CASE_ACTION_UPDATE])
+
+    def test_cached_xml_matches_serialized(self):
+        update = self._get_update()
+        expected = tostring(get_case_element(update.case, update.required_updates, '2.0'))
+        self.assertEqual([expected], get_cached_xml_for_updates(self.case_xml_cache, [update], self.restore_state))
+        with patch('casexml.apps.phone.data_providers.case.livequery.get_xml_for_response') as serialize:
+            self.assertEqual(
+                [expected], get_cached_xml_for_updates(self.case_xml_cache, [update], self.restore_state))
+        serialize.assert_not_called()
+
+    def test_modified_case_not_served_from_cache(self):
+        update = self._get_update()
+        modified = self._get_update(server_modified_on=datetime(2020, 1, 2))
+        self.assertNotEqual(
+            CaseXMLCache.get_cache_key(update, '2.0'),
+            CaseXMLCache.get_cache_key(modified, '2.0'),
+        )
+
+    def test_key_depends_on_version_and_indices(self):
+        update = self._get_update()
+        key = CaseXMLCache.get_cache_key(update, '2.0')
+        self.assertNotEqual(key, CaseXMLCache.get_cache_key(update, '1.0'))
+        with_index = self._get_update(indices=[CommCareCaseIndexSQL(identifier='parent', referenced_id='case2')])
+        self.assertNotEqual(key, CaseXMLCache.get_cache_key(with_index, '2.0'))
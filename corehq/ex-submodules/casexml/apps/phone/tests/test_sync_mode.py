@@ -1066,6 +1066,12 @@ class LiveQueryExtensionCasesSyncTokenUpdatesSQL(LiveQueryExtensionCasesSyncToke
     pass
 
 
+@flag_enabled('LIVEQUERY_PARTITIONED_SYNC')
+@patch('casexml.apps.phone.data_providers.case.livequery.LIVEQUERY_PARTITION_SIZE', 1)
+class LiveQueryPartitionedExtensionCasesSyncTokenUpdatesSQL(LiveQueryExtensionCasesSyncTokenUpdatesSQL):
+    pass
+
+
 class ExtensionCasesFirstSync(BaseSyncTest):
 
     def setUp(self):
@@ -1109,6 +1115,17 @@ class LiveQueryExtensionCasesFirstSyncSQL(LiveQueryExtensionCasesFirstSync):
     pass
 
 
+@flag_enabled('LIVEQUERY_PARTITIONED_SYNC')
+@patch('casexml.apps.phone.data_providers.case.livequery.LIVEQUERY_PARTITION_SIZE', 1)
+class LiveQueryPartitionedExtensionCasesFirstSyncSQL(LiveQueryExtensionCasesFirstSyncSQL):
+    pass
+
+
+@flag_enabled('LIVEQUERY_OWNER_BLOCK_SYNC')
+class LiveQueryOwnerBlockExtensionCasesFirstSyncSQL(LiveQueryExtensionCasesFirstSyncSQL):
+    pass
+
+
 class ChangingOwnershipTest(BaseSyncTest):
 
     def test_remove_user_from_group(self):
@@ -1848,6 +1865,38 @@ class LiveQueryMultiUserSyncTestSQL(LiveQueryMultiUserSyncTest):
     pass
 
 
+@flag_enabled('LIVEQUERY_OWNER_BLOCK_SYNC')
+class LiveQueryOwnerBlockMultiUserSyncTestSQL(LiveQueryMultiUserSyncTestSQL):
+
+    def _initial_sync(self, user):
+        device = self.get_device(user=user, default_owner_id=self.shared_group._id)
+        return device.sync(overwrite_cache=True)
+
+    @flag_enabled('EXTENSION_CASES_SYNC_ENABLED')
+    def test_new_extension_of_cached_block(self):
+        host = CaseStructure(case_id='owner_block_host', attrs={'create': True})
+        self.guy.post_changes(host)
+        self.assertIn(host.case_id, self._initial_sync(self.other_user).cases)
+
+        # adding the extension does not modify the host
+        extension = CaseStructure(
+            case_id='owner_block_extension',
+            attrs={'create': True, 'owner_id': '-'},
+            indices=[CaseIndex(host, relationship='extension', related_type=PARENT_TYPE)],
+            walk_related=False,
+        )
+        self.guy.post_changes(extension)
+        self.assertIn(extension.case_id, self._initial_sync(self.other_user).cases)
+
+    def test_case_reassigned_to_cached_owner(self):
+        case_id = 'owner_block_reassigned'
+        self.guy.post_changes(case_id=case_id, create=True, owner_id=self.user_id)
+        self.assertNotIn(case_id, self._initial_sync(self.other_user).cases)
+
+        self.guy.post_changes(case_id=case_id, owner_id=self.shared_group._id)
+        self.assertIn(case_id, self._initial_sync(self.other_user).cases)
+
+
 class SteadyStateExtensionSyncTest(BaseSyncTest):
     """
     Test that doing multiple clean syncs with extensions does what we think it will
@@ -83,6 +83,13 @@ class CsvFileWriterTests(SimpleTestCase):
         file_start = writer.get_file().read(6)
         self.assertEqual(file_start, BOM_UTF8 + b'100')
 
+    def test_csv_file_writer_rows(self):
+        writer = CsvFileWriter()
+        writer.open('Spam')
+        writer.write_rows([['ham', 'spam'], [1, 'eggs, bacon']])
+        writer.finish()
+        self.assertEqual(writer.get_file().read(), BOM_UTF8 + b'ham,spam\r\n1,"eggs, bacon"\r\n')
+
 
 class HtmlExportWriterTests(SimpleTestCase):
 
@@ -96,6 +96,10 @@ class ExportFileWriter(object):
     def write_row(self, row):
         raise NotImplementedError
 
+    def write_rows(self, rows):
+        for row in rows:
+            self.write_row(row)
+
     def _end_file(self):
         pass
 
@@ -117,12 +121,15 @@ class CsvFileWriter(ExportFileWriter):
         self._file.write(BOM_UTF8)
 
     def write_row(self, row):
+        self.write_rows([row])
+
+    def write_rows(self, rows):
         buffer = io.StringIO()
         csvwriter = csv.writer(buffer, csv.excel)
-        csvwriter.writerow([
+        csvwriter.writerows([
             col.decode('utf-8') if isinstance(col, bytes) else col
             for col in row
-        ])
+        ] for row in rows)
         self._file.write(buffer.getvalue().encode('utf-8'))
 
 
@@ -242,6 +249,14 @@ class ExportWriter(object):
         """
         return self._write_row(table_index, row)
 
+    def write_rows(self, table_index, rows):
+        """
+        Write a block of rows to one table. Unlike write() this does not
+        update the primary component of row ids.
+        """
+        assert self._isopen
+        return self._write_rows(table_index, rows)
+
     def close(self):
         """
         Close any open file references, do any cleanup.
@@ -259,6 +274,10 @@ class ExportWriter(object):
     def _write_row(self, sheet_index, row):
         raise NotImplementedError
 
+    def _write_rows(self, sheet_index, rows):
+        for row in rows:
+            self._write_row(sheet_index, row)
+
     def _close(self):
         raise NotImplementedError
 
@@ -287,6 +306,9 @@ class OnDiskExportWriter(ExportWriter):
         self.table_names[table_index] = table_title
 
     def _write_row(self, sheet_index, row):
+        self._write_rows(sheet_index, [row])
+
+    def _write_rows(self, sheet_index, rows):
 
         def _transform(val):
             if val is None:
@@ -295,8 +317,7 @@ class OnDiskExportWriter(ExportWriter):
                 val = val.encode("utf8")
             return val
 
-        row = list(map(_transform, row))
-        self.tables[sheet_index].write_row(row)
+        self.tables[sheet_index].write_rows([list(map(_transform, row)) for row in rows])
 
     def _close(self):
         """
@@ -135,20 +135,20 @@ class PillowCheckpointEventHandler(ChangeEventHandler):
             time_hit = seconds_since_last_update >= self.max_checkpoint_delay
         return frequency_hit or time_hit
 
-    def get_new_seq(self, change):
+    def get_new_seq(self, change, context=None):
         return change['seq']
 
     def update_checkpoint(self, change, context):
         if self.should_update_checkpoint(context):
             context.reset()
-            self.checkpoint.update_to(self.get_new_seq(change))
+            self.checkpoint.update_to(self.get_new_seq(change, context))
             self.last_update = datetime.utcnow()
             if self.checkpoint_callback:
                 self.checkpoint_callback.checkpoint_updated()
             return True
         elif (datetime.utcnow() - self.last_log).total_seconds() > 10:
             self.last_log = datetime.utcnow()
-            pillow_logging.info("Heartbeat: %s", self.get_new_seq(change))
+            pillow_logging.info("Heartbeat: %s", self.get_new_seq(change, context))
 
         return False
 
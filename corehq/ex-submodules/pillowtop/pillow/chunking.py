@@ -0,0 +1,80 @@
+from datetime import datetime
+
+from django.conf import settings
+
+from corehq.util.metrics import metrics_gauge
+
+DEFAULT_MAX_WAIT_SECONDS = 30
+
+
+class ChunkSize(object):
+    """
+    Decides when a chunk of changes for batch processing is ready: once it
+    has ``size`` changes or once ``max_wait_seconds`` have passed since the
+    last chunk was processed.
+    """
+
+    def __init__(self, size, max_wait_seconds=DEFAULT_MAX_WAIT_SECONDS):
+        self.size = size
+        self.max_wait_seconds = max_wait_seconds
+
+    def is_full(self, chunk):
+        return len(chunk) >= self.size
+
+    def wait_elapsed(self, last_process_time):
+        return (datetime.utcnow() - last_process_time).total_seconds() > self.max_wait_seconds
+
+    def record_chunk(self, pillow_name, changes_chunk, processing_time):
+        """Called after each chunk has been processed"""
+        pass
+
+
+class AdaptiveChunkSize(ChunkSize):
+    """
+    Chunk size that grows while the pillow is behind the change feed, for
+    throughput during bursts, and shrinks when processing a chunk takes
+    longer than ``target_seconds``.
+
+        - halved (down to ``min_size``) after a chunk that was slower than
+          ``target_seconds``
+        - increased by half (up to ``max_size``) after a full chunk whose
+          oldest change was waiting longer than ``max_wait_seconds``
+    """
+
+    def __init__(self, size, min_size, max_size, target_seconds, max_wait_seconds=DEFAULT_MAX_WAIT_SECONDS):
+        assert 0 < min_size <= max_size, (min_size, max_size)
+        super(AdaptiveChunkSize, self).__init__(
+            min(max(size, min_size), max_size),
+            max_wait_seconds,
+        )
+        self.min_size = min_size
+        self.max_size = max_size
+        self.target_seconds = target_seconds
+
+    def record_chunk(self, pillow_name, changes_chunk, processing_time):
+        if processing_time > self.target_seconds:
+            self.size = max(self.min_size, self.size // 2)
+        elif self.is_full(changes_chunk) and self._get_max_change_lag(changes_chunk) > self.max_wait_seconds:
+            self.size = min(self.max_size, self.size + max(1, self.size // 2))
+        metrics_gauge('commcare.change_feed.chunked.chunk_size', self.size, tags={'pillow_name': pillow_name})
+
+    @staticmethod
+    def _get_max_change_lag(changes_chunk):
+        """Seconds since the oldest change was published, or 0 if that is not known"""
+        metadata = changes_chunk[0].metadata
+        if metadata is None or metadata.publish_timestamp is None:
+            return 0
+        return (datetime.utcnow() - metadata.publish_timestamp).total_seconds()
+
+
+def get_chunk_size(pillow_name, default_size):
+    """Get the ``ChunkSize`` for a pillow
+
+    Pillows listed in ``settings.PILLOW_ADAPTIVE_CHUNK_SIZE`` get an
+    ``AdaptiveChunkSize`` with the limits configured there, starting from
+    the pillow's ``processor_chunk_size``.
+    """
+    config = settings.PILLOW_ADAPTIVE_CHUNK_SIZE.get(pillow_name)
+    if config is None:
+        return ChunkSize(default_size)
+    return AdaptiveChunkSize(default_size, **config)
@@ -15,7 +15,9 @@ from dimagi.utils.logging import notify_exception
 from kafka.common import TopicPartition
 from pillowtop.const import CHECKPOINT_MIN_WAIT
 from pillowtop.dao.exceptions import DocumentMissingError
-from pillowtop.utils import force_seq_int
+from pillowtop.pillow.chunking import get_chunk_size
+from pillowtop.pillow.pipeline import ChunkPipeline, PipelinedChunk
+from pillowtop.utils import bulk_fetch_changes_docs, force_seq_int
 from pillowtop.exceptions import PillowtopCheckpointReset
 from pillowtop.logger import pillow_logging
 
@@ -38,6 +40,9 @@ class PillowRuntimeContext(object):
 
     def __init__(self, changes_seen=0):
         self.changes_seen = changes_seen
+        # change feed offsets of the last processed change when they differ from
+        # the offsets read by the change feed (see PillowBase.processor_pipeline_depth)
+        self.processed_offsets = None
 
     def reset(self):
         self.changes_seen = 0
@@ -53,6 +58,9 @@ class PillowBase(metaclass=ABCMeta):
     retry_errors = True
     # this will be the batch size for processors that support batch processing
     processor_chunk_size = 0
+    # number of chunks that can wait in front of the fetch and process stages
+    # when batch processing. 0 processes chunks serially on the reading thread.
+    processor_pipeline_depth = 0
 
     @abstractproperty
     def pillow_id(self):
@@ -115,6 +123,12 @@ class PillowBase(metaclass=ABCMeta):
         if updated:
             self._record_checkpoint_in_datadog()
 
+    @property
+    @memoized
+    def chunk_size(self):
+        """The ``ChunkSize`` that decides when a chunk is ready for batch processing"""
+        return get_chunk_size(self.get_name(), self.processor_chunk_size)
+
     @property
     @memoized
     def batch_processors(self):
@@ -139,8 +153,11 @@ class PillowBase(metaclass=ABCMeta):
             batch processors. If there are batch processors, checkpoint is updated
             at the end of the batch, otherwise is updated for every change.
         """
+        if self.batch_processors and self.processor_pipeline_depth:
+            return self._process_changes_pipelined(since, forever)
+
         context = PillowRuntimeContext(changes_seen=0)
-        min_wait_seconds = 30
+        chunk_size = self.chunk_size
 
         def process_offset_chunk(chunk, context):
             if not chunk:
@@ -160,13 +177,10 @@ class PillowBase(metaclass=ABCMeta):
                         # Queue and process in chunks for both batch
                         #   and serial processors
                         changes_chunk.append(change)
-                        chunk_full = len(changes_chunk) == self.processor_chunk_size
-                        time_elapsed = (datetime.utcnow() - last_process_time).seconds > min_wait_seconds
-                        if chunk_full or time_elapsed:
+                        if chunk_size.is_full(changes_chunk) or chunk_size.wait_elapsed(last_process_time):
                             last_process_time = datetime.utcnow()
-                            self._batch_process_with_error_handling(changes_chunk)
                             # update checkpoint for just the latest change
-                            self._update_checkpoint(changes_chunk[-1], context)
+                            process_offset_chunk(changes_chunk, context)
                             # reset for next chunk
                             changes_chunk = []
                     else:
@@ -175,12 +189,90 @@ class PillowBase(metaclass=ABCMeta):
                         self._record_change_in_datadog(change, processing_time)
                         self._update_checkpoint(change, context)
                 else:
+                    # the change feed is idle: don't leave a partial chunk waiting for more changes
+                    if changes_chunk and chunk_size.wait_elapsed(last_process_time):
+                        last_process_time = datetime.utcnow()
+                        process_offset_chunk(changes_chunk, context)
+                        changes_chunk = []
                     self._update_checkpoint(None, None)
             process_offset_chunk(changes_chunk, context)
         except PillowtopCheckpointReset:
             process_offset_chunk(changes_chunk, context)
             self.process_changes(since=self.get_last_checkpoint_sequence(), forever=forever)
 
+    def _process_changes_pipelined(self, since, forever):
+        """
+        Process changes in chunks, fetching the documents for a chunk and
+        processing it in background threads while the next chunks are read
+        from the change feed. See ``ChunkPipeline``.
+
+            The checkpoint is updated on this thread after a chunk has been
+            processed, to the feed offsets recorded when the chunk was read,
+            so it never moves past changes that are still in the pipeline.
+        """
+        context = PillowRuntimeContext(changes_seen=0)
+        chunk_size = self.chunk_size
+        change_feed = self.get_change_feed()
+        pipeline = ChunkPipeline(
+            self._prefetch_chunk_docs,
+            self._batch_process_with_error_handling,
+            depth=self.processor_pipeline_depth,
+        )
+
+        def submit_chunk(chunk):
+            if chunk:
+                pipeline.submit(PipelinedChunk(chunk, change_feed.get_processed_offsets()))
+
+        def update_checkpoint_for_completed(block=False):
+            for completed in pipeline.iter_completed(block=block):
+                context.processed_offsets = completed.processed_offsets
+                self._update_checkpoint(completed.changes[-1], context)
+
+        changes_chunk = []
+        last_process_time = datetime.utcnow()
+        checkpoint_reset = False
+        try:
+            try:
+                for change in change_feed.iter_changes(since=since or None, forever=forever):
+                    context.changes_seen += 1
+                    if change:
+                        changes_chunk.append(change)
+                        if chunk_size.is_full(changes_chunk) or chunk_size.wait_elapsed(last_process_time):
+                            last_process_time = datetime.utcnow()
+                            submit_chunk(changes_chunk)
+                            changes_chunk = []
+                    else:
+                        if changes_chunk and chunk_size.wait_elapsed(last_process_time):
+                            last_process_time = datetime.utcnow()
+                            submit_chunk(changes_chunk)
+                            changes_chunk = []
+                        self._update_checkpoint(None, None)
+                    update_checkpoint_for_completed()
+                submit_chunk(changes_chunk)
+                update_checkpoint_for_completed(block=True)
+            except PillowtopCheckpointReset:
+                checkpoint_reset = True
+                submit_chunk(changes_chunk)
+                update_checkpoint_for_completed(block=True)
+        finally:
+            pipeline.close()
+
+        if checkpoint_reset:
+            self.process_changes(since=self.get_last_checkpoint_sequence(), forever=forever)
+
+    def _prefetch_chunk_docs(self, changes_chunk):
+        """
+        Fetch the documents for a chunk in bulk ahead of processing. Processors
+        using ``bulk_fetch_changes_docs`` or ``change.get_document`` will find
+        them already set on the changes.
+        """
+        to_fetch = [
+            change for change in self._deduplicate_changes(changes_chunk)
+            if not change.deleted and change.should_fetch_document()
+        ]
+        if to_fetch:
+            bulk_fetch_changes_docs(to_fetch)
+
     def _batch_process_with_error_handling(self, changes_chunk):
         """
         Process given chunk in batch mode first on batch-processors
@@ -231,6 +323,7 @@ class PillowBase(metaclass=ABCMeta):
         for change in changes_chunk:
             processing_time += self.process_with_error_handling(change)
         self._record_datadog_metrics(changes_chunk, processing_time)
+        self.chunk_size.record_chunk(self.get_name(), changes_chunk, processing_time)
 
     def process_with_error_handling(self, change, processor=None):
         # process given change on all serial processors or given processor.
@@ -402,7 +495,7 @@ class ChangeEventHandler(metaclass=ABCMeta):
         pass
 
     @abstractmethod
-    def get_new_seq(self, change):
+    def get_new_seq(self, change, context=None):
         """
         :return: appropriate sequence value to update the checkpoint to
         """
@@ -416,11 +509,12 @@ class ConstructedPillow(PillowBase):
     """
 
     def __init__(self, name, checkpoint, change_feed, processor,
-                 change_processed_event_handler=None, processor_chunk_size=0):
+                 change_processed_event_handler=None, processor_chunk_size=0, processor_pipeline_depth=0):
         self._name = name
         self._checkpoint = checkpoint
         self._change_feed = change_feed
         self.processor_chunk_size = processor_chunk_size
+        self.processor_pipeline_depth = processor_pipeline_depth
         if isinstance(processor, list):
             self.processors = processor
         else:
@@ -0,0 +1,116 @@
+from queue import Empty, Queue
+from threading import Thread
+
+from django.db import connections
+
+from pillowtop.logger import pillow_logging
+
+_STOP = object()
+
+
+class PipelinedChunk(object):
+    """
+    A chunk of changes moving through the pipeline along with the change feed
+    offsets that had been read when the chunk was closed, so that the checkpoint
+    can be set to exactly this chunk once it has been processed.
+    """
+
+    def __init__(self, changes, processed_offsets=None):
+        self.changes = changes
+        self.processed_offsets = processed_offsets
+        self.error = None
+
+
+class ChunkPipeline(object):
+    """
+    Runs the fetch and load stages of chunked pillow processing in background
+    threads so that reading from the change feed, fetching the documents for
+    the next chunk and processing the current chunk overlap.
+
+        read (caller) -> [fetch queue] -> fetch -> [load queue] -> load -> [done queue]
+
+    The fetch and load queues are bounded by ``depth`` so at most ``depth``
+    chunks wait in front of each stage. Each stage is a single thread, so
+    chunks leave the pipeline in the order they were submitted and the caller
+    can update checkpoints in order from ``iter_completed``.
+
+    :param fetch_fn: called with the list of changes. Should populate the
+                     change documents. Errors are logged and ignored since the
+                     processors fetch any documents that are still missing.
+    :param load_fn: called with the list of changes to process them.
+    """
+
+    def __init__(self, fetch_fn, load_fn, depth=1):
+        assert depth > 0, depth
+        self._fetch_fn = fetch_fn
+        self._load_fn = load_fn
+        self._fetch_queue = Queue(maxsize=depth)
+        self._load_queue = Queue(maxsize=depth)
+        self._done_queue = Queue()
+        self._in_flight = 0
+        self._threads = [
+            Thread(target=self._run_fetch, name='pillow-pipeline-fetch', daemon=True),
+            Thread(target=self._run_load, name='pillow-pipeline-load', daemon=True),
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    @property
+    def in_flight(self):
+        return self._in_flight
+
+    def submit(self, chunk):
+        """Add a chunk to the pipeline. Blocks while the fetch stage is full."""
+        self._in_flight += 1
+        self._fetch_queue.put(chunk)
+
+    def iter_completed(self, block=False):
+        """Yield chunks that have finished processing, in submission order
+
+        :param block: wait for all chunks in flight to finish
+        :raises: the exception raised while processing a chunk, if any
+        """
+        while self._in_flight:
+            try:
+                chunk = self._done_queue.get(block=block)
+            except Empty:
+                return
+            self._in_flight -= 1
+            if chunk.error is not None:
+                raise chunk.error
+            yield chunk
+
+    def close(self):
+        """Stop the stage threads once all chunks in flight have been processed"""
+        self._fetch_queue.put(_STOP)
+        for thread in self._threads:
+            thread.join()
+
+    def _run_fetch(self):
+        try:
+            while True:
+                chunk = self._fetch_queue.get()
+                if chunk is not _STOP:
+                    try:
+                        self._fetch_fn(chunk.changes)
+                    except Exception:
+                        pillow_logging.exception("Error prefetching documents for chunk")
+                self._load_queue.put(chunk)
+                if chunk is _STOP:
+                    return
+        finally:
+            connections.close_all()
+
+    def _run_load(self):
+        try:
+            while True:
+                chunk = self._load_queue.get()
+                if chunk is _STOP:
+                    return
+                try:
+                    self._load_fn(chunk.changes)
+                except Exception as e:
+                    chunk.error = e
+                self._done_queue.put(chunk)
+        finally:
+            connections.close_all()
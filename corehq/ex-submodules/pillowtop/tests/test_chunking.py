@@ -0,0 +1,72 @@
+from datetime import datetime, timedelta
+
+from django.test import SimpleTestCase, override_settings
+
+from pillowtop.feed.interface import Change, ChangeMeta
+from pillowtop.pillow.chunking import AdaptiveChunkSize, ChunkSize, get_chunk_size
+
+
+def _get_changes(count, lag_seconds=0):
+    publish_timestamp = datetime.utcnow() - timedelta(seconds=lag_seconds)
+    return [
+        Change(id=str(i), sequence_id=i, metadata=ChangeMeta(
+            document_id=str(i),
+            data_source_type='couch',
+            data_source_name='test_commcarehq',
+            publish_timestamp=publish_timestamp,
+        ))
+        for i in range(count)
+    ]
+
+
+class ChunkSizeTest(SimpleTestCase):
+
+    def test_static(self):
+        chunk_size = ChunkSize(10)
+        self.assertFalse(chunk_size.is_full(_get_changes(9)))
+        self.assertTrue(chunk_size.is_full(_get_changes(10)))
+        chunk_size.record_chunk('pillow', _get_changes(10, lag_seconds=600), 600)
+        self.assertEqual(10, chunk_size.size)
+
+    def test_wait_elapsed(self):
+        chunk_size = ChunkSize(10, max_wait_seconds=5)
+        self.assertFalse(chunk_size.wait_elapsed(datetime.utcnow()))
+        self.assertTrue(chunk_size.wait_elapsed(datetime.utcnow() - timedelta(seconds=6)))
+
+    @override_settings(PILLOW_ADAPTIVE_CHUNK_SIZE={'pillow': {'min_size': 1, 'max_size': 5, 'target_seconds': 1}})
+    def test_get_chunk_size(self):
+        chunk_size = get_chunk_size('pillow', 10)
+        self.assertIsInstance(chunk_size, AdaptiveChunkSize)
+        self.assertEqual(5, chunk_size.size)
+        self.assertNotIsInstance(get_chunk_size('other', 10), AdaptiveChunkSize)
+
+
+class AdaptiveChunkSizeTest(SimpleTestCase):
+
+    def setUp(self):
+        self.chunk_size = AdaptiveChunkSize(10, min_size=4, max_size=30, target_seconds=10, max_wait_seconds=5)
+
+    def test_grows_when_behind(self):
+        self.chunk_size.record_chunk('pillow', _get_changes(10, lag_seconds=60), 1)
+        self.assertEqual(15, self.chunk_size.size)
+        for i in range(5):
+            self.chunk_size.record_chunk('pillow', _get_changes(self.chunk_size.size, lag_seconds=60), 1)
+        self.assertEqual(30, self.chunk_size.size)
+
+    def test_unchanged_when_caught_up(self):
+        self.chunk_size.record_chunk('pillow', _get_changes(10), 1)
+        self.chunk_size.record_chunk('pillow', _get_changes(3, lag_seconds=60), 1)
+        self.assertEqual(10, self.chunk_size.size)
+
+    def test_shrinks_when_slow(self):
+        self.chunk_size.record_chunk('pillow', _get_changes(10, lag_seconds=60), 11)
+        self.assertEqual(5, self.chunk_size.size)
+        self.chunk_size.record_chunk('pillow', _get_changes(5, lag_seconds=60), 11)
+        self.assertEqual(4, self.chunk_size.size)
+
+    def test_changes_without_metadata(self):
+        changes = [Change(id=str(i), sequence_id=i) for i in range(10)]
+        self.chunk_size.record_chunk('pillow', changes, 11)
+        self.assertEqual(5, self.chunk_size.size)
+        self.chunk_size.record_chunk('pillow', changes[:5], 1)
+        self.assertEqual(5, self.chunk_size.size)
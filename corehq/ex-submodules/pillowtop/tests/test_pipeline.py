@@ -0,0 +1,54 @@
+from django.test import SimpleTestCase
+
+from pillowtop.pillow.pipeline import ChunkPipeline, PipelinedChunk
+
+
+class ChunkPipelineTest(SimpleTestCase):
+
+    def test_chunks_complete_in_order(self):
+        fetched = []
+        loaded = []
+        pipeline = ChunkPipeline(fetched.append, loaded.append, depth=2)
+        chunks = [[i, i + 1] for i in range(0, 20, 2)]
+        try:
+            for i, chunk in enumerate(chunks):
+                pipeline.submit(PipelinedChunk(chunk, processed_offsets={'test': i}))
+            completed = list(pipeline.iter_completed(block=True))
+        finally:
+            pipeline.close()
+
+        self.assertEqual(chunks, fetched)
+        self.assertEqual(chunks, loaded)
+        self.assertEqual([c.changes for c in completed], chunks)
+        self.assertEqual([c.processed_offsets for c in completed], [{'test': i} for i in range(len(chunks))])
+        self.assertEqual(0, pipeline.in_flight)
+
+    def test_fetch_error_does_not_stop_processing(self):
+        def fetch(changes):
+            raise ValueError('fetch failed')
+
+        loaded = []
+        pipeline = ChunkPipeline(fetch, loaded.append)
+        try:
+            pipeline.submit(PipelinedChunk([1]))
+            list(pipeline.iter_completed(block=True))
+        finally:
+            pipeline.close()
+        self.assertEqual([[1]], loaded)
+
+    def test_load_error_raised_to_caller(self):
+        def load(changes):
+            if changes == [2]:
+                raise ValueError('load failed')
+
+        pipeline = ChunkPipeline(lambda changes: None, load)
+        completed = []
+        try:
+            for value in [1, 2, 3]:
+                pipeline.submit(PipelinedChunk([value]))
+            with self.assertRaises(ValueError):
+                for chunk in pipeline.iter_completed(block=True):
+                    completed.append(chunk.changes)
+        finally:
+            pipeline.close()
+        self.assertEqual([[1]], completed)
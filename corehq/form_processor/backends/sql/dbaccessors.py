@@ -4,7 +4,7 @@ import logging
 import operator
 import struct
 from abc import ABCMeta, abstractmethod, abstractproperty
-from collections import namedtuple
+from collections import defaultdict, namedtuple
 from datetime import datetime
 from io import BytesIO
 from itertools import groupby
@@ -166,6 +166,17 @@ class ShardAccessor(object):
         # convert 64 bit hash to 32 bit to match Postgres
         return hash_long & 0xffffffff
 
+    @staticmethod
+    def get_doc_ids_by_shard(doc_ids):
+        """
+        :param doc_ids:
+        :return: Dict of ``shard_id -> [doc_id, ...]``
+        """
+        assert settings.USE_PARTITIONED_DATABASE, """Partitioned DB not in use,
+        consider using `corehq.sql_db.get_db_alias_for_partitioned_doc` instead"""
+        part_mask = len(plproxy_config.get_django_shard_map()) - 1
+        return group_doc_ids_by_shard(doc_ids, part_mask)
+
     @staticmethod
     def get_database_for_docs(doc_ids):
         """
@@ -184,25 +195,14 @@ class ShardAccessor(object):
 
     @staticmethod
     def _get_doc_database_map(doc_ids, by_doc=True):
-        assert settings.USE_PARTITIONED_DATABASE, """Partitioned DB not in use,
-        consider using `corehq.sql_db.get_db_alias_for_partitioned_doc` instead"""
-        databases = {}
         shard_map = plproxy_config.get_django_shard_map()
-        part_mask = len(shard_map) - 1
-        for chunk in chunked(doc_ids, 100):
-            hashes = ShardAccessor.hash_doc_ids_python(chunk)
-            shards = {doc_id: hash_ & part_mask for doc_id, hash_ in hashes.items()}
-            for doc_id, shard_id in shards.items():
-                dbname = shard_map[shard_id].django_dbname
-                if by_doc:
-                    databases.update({
-                        doc_id: dbname
-                    })
-                else:
-                    if dbname not in databases:
-                        databases[dbname] = [doc_id]
-                    else:
-                        databases[dbname].append(doc_id)
+        databases = {}
+        for shard_id, shard_doc_ids in ShardAccessor.get_doc_ids_by_shard(doc_ids).items():
+            dbname = shard_map[shard_id].django_dbname
+            if by_doc:
+                databases.update(dict.fromkeys(shard_doc_ids, dbname))
+            else:
+                databases.setdefault(dbname, []).extend(shard_doc_ids)
         return databases
 
     @staticmethod
@@ -223,6 +223,40 @@ class ShardAccessor(object):
         return ShardAccessor.get_shard_id_and_database_for_doc(doc_id)[1]
 
 
+SHARD_ROUTING_CACHE_SIZE = 10000
+
+_unpack_low_32_bits = struct.Struct("<I").unpack_from
+
+
+@functools.lru_cache(maxsize=SHARD_ROUTING_CACHE_SIZE)
+def _hash_doc_id(doc_id, siphash24=csiphash.siphash24, hash_key=ShardAccessor.hash_key):
+    """Same as ``ShardAccessor.hash_doc_id_python``
+
+    Only the low 32 bits of the little endian 64 bit hash are used so they
+    are unpacked directly from the first 4 bytes of the digest.
+    """
+    if isinstance(doc_id, str):
+        return _unpack_low_32_bits(siphash24(hash_key, doc_id.encode('utf-8')))[0]
+    elif isinstance(doc_id, UUID):
+        return _unpack_low_32_bits(siphash24(hash_key, doc_id.bytes))[0]
+    return _unpack_low_32_bits(siphash24(hash_key, doc_id))[0]
+
+
+def group_doc_ids_by_shard(doc_ids, part_mask):
+    """Group doc IDs by shard ID in a single pass over the IDs
+
+    Hashes of recently routed IDs are cached since the same IDs are often
+    routed repeatedly e.g. by pillows fetching changed docs.
+
+    :param part_mask: Number of shards - 1
+    :return: Dict of ``shard_id -> [doc_id, ...]``
+    """
+    doc_ids_by_shard = defaultdict(list)
+    for doc_id in doc_ids:
+        doc_ids_by_shard[_hash_doc_id(doc_id) & part_mask].append(doc_id)
+    return doc_ids_by_shard
+
+
 DocIds = namedtuple('DocIds', 'doc_id primary_key')
 
 
@@ -498,6 +532,29 @@ class FormAccessorSQL(AbstractFormAccessor):
 
         return forms
 
+    @staticmethod
+    def iter_form_xml(form_ids):
+        """Get the XML of many forms
+
+        Metadata for all forms is fetched with one query and the XML is
+        fetched with `get_many` so the blob db can read ahead.
+
+        :returns: An iterator of `(form_id, xml)` pairs ordered by form id.
+        Forms without XML are skipped.
+        """
+        assert isinstance(form_ids, list)
+        if not form_ids:
+            return
+        blob_db = get_blob_db()
+        metas = [
+            meta for meta in blob_db.metadb.get_for_parents(form_ids, CODES.form_xml)
+            if meta.name == "form.xml"
+        ]
+        form_ids_by_key = {meta.key: meta.parent_id for meta in metas}
+        for key, content in blob_db.get_many(meta.key for meta in metas):
+            with content:
+                yield form_ids_by_key[key], content.read()
+
     @staticmethod
     def get_forms_by_type(domain, type_, limit, recent_first=False):
         state = doc_type_to_state[type_]
@@ -633,8 +690,7 @@ class FormAccessorSQL(AbstractFormAccessor):
                 transaction.on_commit(attachment_writer.commit, using=form.db)
                 form.save()
                 attachment_writer.write()
-                for operation in operations:
-                    operation.save()
+                XFormOperationSQL.objects.using(form.db).bulk_create(operations)
         except InternalError as e:
             raise XFormSaveError(e)
 
@@ -994,46 +1050,79 @@ class CaseAccessorSQL(AbstractCaseAccessor):
 
     @staticmethod
     def save_case(case):
-        transactions_to_save = case.get_live_tracked_models(CaseTransaction)
-
-        indices_to_save_or_update = case.get_live_tracked_models(CommCareCaseIndexSQL)
-        index_ids_to_delete = [index.id for index in case.get_tracked_models_to_delete(CommCareCaseIndexSQL)]
-
-        attachments_to_save = case.get_tracked_models_to_create(CaseAttachmentSQL)
-        attachment_ids_to_delete = [att.id for att in case.get_tracked_models_to_delete(CaseAttachmentSQL)]
-        for attachment in attachments_to_save:
-            if attachment.is_saved():
-                raise CaseSaveError(
-                    """Updating attachments is not supported.
-                    case id={}, attachment id={}""".format(
-                        case.case_id, attachment.attachment_id
+        CaseAccessorSQL.save_cases([case])
+
+    @staticmethod
+    def save_cases(cases):
+        """Save cases along with their tracked transactions, indices and attachments
+
+        New rows are written with one multi-row INSERT per table and shard
+        database rather than one statement per model.
+        """
+        for case in cases:
+            for attachment in case.get_tracked_models_to_create(CaseAttachmentSQL):
+                if attachment.is_saved():
+                    raise CaseSaveError(
+                        """Updating attachments is not supported.
+                        case id={}, attachment id={}""".format(
+                            case.case_id, attachment.attachment_id
+                        )
                     )
-                )
 
-        try:
-            with transaction.atomic(using=case.db, savepoint=False):
-                case.save()
-                for case_transaction in transactions_to_save:
-                    case_transaction.save()
+        cases_by_db = defaultdict(list)
+        for case in cases:
+            cases_by_db[case.db].append(case)
 
-                for index in indices_to_save_or_update:
-                    index.domain = case.domain  # ensure domain is set on indices
-                    update_fields = None
-                    if index.is_saved():
-                        # prevent changing identifier
-                        update_fields = ['referenced_id', 'referenced_type', 'relationship_id']
-                    index.save(update_fields=update_fields)
+        try:
+            for db_name, db_cases in cases_by_db.items():
+                with transaction.atomic(using=db_name, savepoint=False):
+                    CaseAccessorSQL._save_cases_in_db(db_name, db_cases)
+                    for case in db_cases:
+                        case.clear_tracked_models()
+        except DatabaseError as e:
+            raise CaseSaveError(e)
 
-                CommCareCaseIndexSQL.objects.using(case.db).filter(id__in=index_ids_to_delete).delete()
+    @staticmethod
+    def _save_cases_in_db(db_name, cases):
+        new_cases = [case for case in cases if not case.is_saved()]
+        existing_cases = [case for case in cases if case.is_saved()]
+        CommCareCaseSQL.objects.using(db_name).bulk_create(new_cases)
+        for case in existing_cases:
+            case.save()
+
+        transactions_to_create = []
+        indices_to_create = []
+        attachments_to_create = []
+        index_ids_to_delete = []
+        attachment_ids_to_delete = []
+        for case in cases:
+            for case_transaction in case.get_live_tracked_models(CaseTransaction):
+                if case_transaction.is_saved():
+                    case_transaction.save()
+                else:
+                    transactions_to_create.append(case_transaction)
 
-                for attachment in attachments_to_save:
-                    attachment.save()
+            for index in case.get_live_tracked_models(CommCareCaseIndexSQL):
+                index.domain = case.domain  # ensure domain is set on indices
+                if index.is_saved():
+                    # prevent changing identifier
+                    index.save(update_fields=['referenced_id', 'referenced_type', 'relationship_id'])
+                else:
+                    indices_to_create.append(index)
+            index_ids_to_delete.extend(
+                index.id for index in case.get_tracked_models_to_delete(CommCareCaseIndexSQL))
 
-                CaseAttachmentSQL.objects.using(case.db).filter(id__in=attachment_ids_to_delete).delete()
+            attachments_to_create.extend(case.get_tracked_models_to_create(CaseAttachmentSQL))
+            attachment_ids_to_delete.extend(
+                att.id for att in case.get_tracked_models_to_delete(CaseAttachmentSQL))
 
-                case.clear_tracked_models()
-        except DatabaseError as e:
-            raise CaseSaveError(e)
+        CaseTransaction.objects.using(db_name).bulk_create(transactions_to_create)
+        CommCareCaseIndexSQL.objects.using(db_name).bulk_create(indices_to_create)
+        if index_ids_to_delete:
+            CommCareCaseIndexSQL.objects.using(db_name).filter(id__in=index_ids_to_delete).delete()
+        CaseAttachmentSQL.objects.using(db_name).bulk_create(attachments_to_create)
+        if attachment_ids_to_delete:
+            CaseAttachmentSQL.objects.using(db_name).filter(id__in=attachment_ids_to_delete).delete()
 
     @staticmethod
     def get_open_case_ids_for_owner(domain, owner_id):
@@ -1147,6 +1236,23 @@ class CaseAccessorSQL(AbstractCaseAccessor):
             [domain, external_id, case_type]
         ))
 
+    @staticmethod
+    def get_cases_by_external_ids(domain, external_ids, case_type=None):
+        if not external_ids:
+            return []
+
+        cases = []
+        for db_name in get_db_aliases_for_partitioned_query():
+            query = CommCareCaseSQL.objects.using(db_name).filter(
+                domain=domain,
+                external_id__in=external_ids,
+                deleted=False,
+            )
+            if case_type:
+                query = query.filter(type=case_type)
+            cases.extend(query)
+        return cases
+
     @staticmethod
     def get_case_by_domain_hq_user_id(domain, user_id, case_type):
         try:
@@ -15,7 +15,7 @@ from corehq.form_processor.backends.sql.dbaccessors import (
     FormAccessorSQL, CaseAccessorSQL, LedgerAccessorSQL
 )
 from corehq.form_processor.change_publishers import (
-    publish_form_saved, publish_case_saved, publish_ledger_v2_saved)
+    publish_form_saved, publish_case_saved, publish_submission_saved)
 from corehq.form_processor.exceptions import CaseNotFound, KafkaPublishingError
 from corehq.form_processor.interfaces.processor import CaseUpdateMetadata
 from corehq.form_processor.models import (
@@ -121,8 +121,7 @@ class FormProcessorSQL(object):
 
                 FormAccessorSQL.save_new_form(processed_forms.submitted)
                 if cases:
-                    for case in cases:
-                        CaseAccessorSQL.save_case(case)
+                    CaseAccessorSQL.save_cases(cases)
 
                 if stock_result:
                     ledgers_to_save = stock_result.models_to_save
@@ -132,9 +131,10 @@ class FormProcessorSQL(object):
                 sort_submissions = toggles.SORT_OUT_OF_ORDER_FORM_SUBMISSIONS_SQL.enabled(
                     processed_forms.submitted.domain, toggles.NAMESPACE_DOMAIN)
                 if sort_submissions:
-                    for case in cases:
-                        if SqlCaseUpdateStrategy(case).reconcile_transactions_if_necessary():
-                            CaseAccessorSQL.save_case(case)
+                    CaseAccessorSQL.save_cases([
+                        case for case in cases
+                        if SqlCaseUpdateStrategy(case).reconcile_transactions_if_necessary()
+                    ])
         except DatabaseError:
             for model in all_models:
                 setattr(model, model._meta.pk.attname, None)
@@ -149,14 +149,11 @@ class FormProcessorSQL(object):
 
     @staticmethod
     def publish_changes_to_kafka(processed_forms, cases, stock_result):
-        publish_form_saved(processed_forms.submitted)
-        cases = cases or []
-        for case in cases:
-            publish_case_saved(case)
-
-        if stock_result:
-            for ledger in stock_result.models_to_save:
-                publish_ledger_v2_saved(ledger)
+        publish_submission_saved(
+            processed_forms.submitted,
+            cases or [],
+            stock_result.models_to_save if stock_result else [],
+        )
 
     @classmethod
     def apply_deprecation(cls, existing_xform, new_xform):
@@ -134,6 +134,18 @@ class AbstractCaseDbCache(metaclass=ABCMeta):
     def clear_changed(self):
         self._changed = set()
 
+    def discard_changes(self):
+        """
+        Replace the cached cases with their saved versions, dropping any
+        unsaved changes and cases that have not been saved. Locks held by
+        the cache are kept.
+        """
+        case_ids = list(self.cache)
+        self.cache = {}
+        self._changed = set()
+        for case in self._iter_cases(case_ids):
+            self.cache[_get_id_for_case(case)] = case
+
     def get_cached_forms(self):
         """
         Get any in-memory forms being processed. These are only used by the Couch backend
@@ -40,6 +40,22 @@ def publish_case_saved(case, send_post_save_signal=True):
         sql_case_post_save.send(case.__class__, case=case)
 
 
+def publish_submission_saved(form, cases, ledger_values):
+    """
+    Publish the changes to a form and the cases and ledgers it updated in a
+    single producer batch and run case post-save signals.
+    """
+    changes = [(topics.FORM_SQL, change_meta_from_sql_form(form))]
+    changes.extend((topics.CASE_SQL, change_meta_from_sql_case(case)) for case in cases)
+    changes.extend(
+        (topics.LEDGER, change_meta_from_ledger_v2(ledger_value.ledger_reference, ledger_value.domain))
+        for ledger_value in ledger_values
+    )
+    producer.send_changes(changes)
+    for case in cases:
+        sql_case_post_save.send(case.__class__, case=case)
+
+
 def change_meta_from_sql_case(case):
     return ChangeMeta(
         document_id=case.case_id,
@@ -14,11 +14,11 @@ from django.urls import reverse
 from django.utils.translation import ugettext as _
 import sys
 
-from casexml.apps.case.xform import close_extension_cases
+from casexml.apps.case.xform import close_extension_cases, get_case_updates
 from casexml.apps.phone.restore_caching import AsyncRestoreTaskIdCache, RestorePayloadPathCache
 import couchforms
 from casexml.apps.case.exceptions import PhoneDateValueError, IllegalCaseId, UsesReferrals, InvalidCaseIndex, \
-    CaseValueError
+    CaseValueError, CommCareCaseError
 from corehq.apps.receiverwrapper.rate_limiter import report_submission_usage
 from corehq.const import OPENROSA_VERSION_3
 from corehq.middleware import OPENROSA_VERSION_HEADER
@@ -33,6 +33,7 @@ from corehq.form_processor.interfaces.dbaccessors import FormAccessors
 from corehq.form_processor.interfaces.processor import FormProcessorInterface
 from corehq.form_processor.parsers.form import process_xform_xml
 from corehq.form_processor.system_action import SYSTEM_ACTION_XMLNS, handle_system_action
+from corehq.form_processor.utils import convert_xform_to_json
 from corehq.form_processor.utils.metadata import scrub_meta
 from corehq.form_processor.submission_process_tracker import unfinished_submission
 from corehq.util.datadog.utils import form_load_counter
@@ -303,6 +304,9 @@ class SubmissionPost(object):
                         case_stock_result = self.process_xforms_for_cases(xforms, case_db)
                     except (IllegalCaseId, UsesReferrals, MissingProductId,
                             PhoneDateValueError, InvalidCaseIndex, CaseValueError) as e:
+                        if self.case_db:
+                            # the case DB is shared with the rest of the batch
+                            case_db.discard_changes()
                         self._handle_known_error(e, instance, xforms)
                         submission_type = 'error'
                         openrosa_kwargs['error_nature'] = ResponseNature.PROCESSING_FAILURE
@@ -535,6 +539,58 @@ class SubmissionPost(object):
         return FormProcessingResult(response, device_log_form, [], [], 'device-log')
 
 
+def process_submission_batch(domain, submissions):
+    """Process an ordered batch of submissions to a single domain
+
+    The submissions share one case DB cache, so a case touched by several
+    forms in the batch is only loaded once. The cases updated by the forms
+    are locked up front, in a consistent order, and held until the whole
+    batch has been processed.
+
+    Each form is otherwise processed exactly as if it was submitted on its
+    own. The changes of a form that fails with a known error are discarded
+    from the cache before the next form is processed. Unexpected errors are
+    raised as for a single submission, leaving the preceding forms of the
+    batch saved.
+
+    :param submissions: list of ``SubmissionPost`` objects for the domain
+    :returns: list of ``FormProcessingResult``, one per submission
+    """
+    interface = FormProcessorInterface(domain)
+    case_db = interface.casedb_cache(
+        domain=domain, lock=True, deleted_ok=True, load_src="form_submission_batch",
+    )
+    results = []
+    with case_db:
+        for case_id in sorted(_get_case_ids_for_submissions(submissions)):
+            try:
+                case_db.get(case_id)
+            except IllegalCaseId:
+                # reported as an error on the form when it is processed
+                pass
+
+        for submission in submissions:
+            assert submission.domain == domain, (submission.domain, domain)
+            assert submission.case_db is None, 'Submission already has a case DB'
+            submission.case_db = case_db
+            results.append(submission.run())
+    return results
+
+
+def _get_case_ids_for_submissions(submissions):
+    case_ids = set()
+    for submission in submissions:
+        if isinstance(submission.instance, BadRequest):
+            continue
+        try:
+            form_json = convert_xform_to_json(submission.instance)
+            case_ids.update(update.id for update in get_case_updates(form_json))
+        except (couchforms.XMLSyntaxError, CommCareCaseError):
+            # these are handled when the form is processed
+            continue
+    return case_ids
+
+
 def _transform_instance_to_error(interface, exception, instance):
     error_message = '{}: {}'.format(type(exception).__name__, str(exception))
     return interface.xformerror_from_xform_instance(instance, error_message)
@@ -300,6 +300,46 @@ class CaseAccessorTestsSQL(TestCase):
         case_ids = CaseAccessorSQL.get_case_ids_in_domain(DOMAIN)
         self.assertEqual({case1.case_id, case3.case_id}, set(case_ids))
 
+    def test_save_cases(self):
+        form = XFormInstanceSQL(form_id=uuid.uuid4().hex, domain=DOMAIN)
+        utcnow = datetime.utcnow()
+        cases = []
+        for i in range(3):
+            case = CommCareCaseSQL(
+                case_id=uuid.uuid4().hex,
+                domain=DOMAIN,
+                type='child',
+                owner_id='user1',
+                opened_on=utcnow,
+                modified_on=utcnow,
+                modified_by='user1',
+                server_modified_on=utcnow,
+            )
+            case.track_create(CaseTransaction.form_transaction(case, form, utcnow))
+            case.track_create(CommCareCaseIndexSQL(
+                case=case,
+                identifier='parent',
+                referenced_type='mother',
+                referenced_id=uuid.uuid4().hex,
+                relationship_id=CommCareCaseIndexSQL.CHILD
+            ))
+            cases.append(case)
+        existing_case = _create_case()
+        existing_case.track_create(CaseTransaction.form_transaction(existing_case, form, utcnow))
+        cases.append(existing_case)
+
+        CaseAccessorSQL.save_cases(cases)
+
+        for case in cases:
+            self.assertTrue(case.is_saved())
+            self.assertFalse(case.has_tracked_models())
+            transactions = CaseAccessorSQL.get_transactions(case.case_id)
+            self.assertIn(form.form_id, [t.form_id for t in transactions])
+        for case in cases[:3]:
+            [index] = CaseAccessorSQL.get_indices(DOMAIN, case.case_id)
+            self.assertEqual('parent', index.identifier)
+            self.assertEqual(DOMAIN, index.domain)
+
     def test_save_case_update_index(self):
         case = _create_case()
 
@@ -610,6 +650,30 @@ class CaseAccessorTestsSQL(TestCase):
 
         self.assertEqual([], CaseAccessorSQL.get_cases_by_external_id('d2', '123', case_type='t2'))
 
+    def test_get_cases_by_external_ids(self):
+        case1 = _create_case(case_type='t1')
+        case2 = _create_case(case_type='t1')
+        case3 = _create_case(case_type='t2')
+        case4 = _create_case(case_type='t1')
+        case5 = _create_case(domain='d2', case_type='t1')
+        for case, external_id in [(case1, '123'), (case2, '456'), (case3, '123'),
+                                  (case4, '123'), (case5, '123')]:
+            case.external_id = external_id
+            CaseAccessorSQL.save_case(case)
+        CaseAccessorSQL.soft_delete_cases(DOMAIN, [case4.case_id])
+        self.addCleanup(lambda: FormProcessorTestUtils.delete_all_cases('d2'))
+
+        cases = CaseAccessorSQL.get_cases_by_external_ids(DOMAIN, ['123', '456'])
+        self.assertEqual(
+            {case1.case_id, case2.case_id, case3.case_id},
+            {case.case_id for case in cases}
+        )
+
+        cases = CaseAccessorSQL.get_cases_by_external_ids(DOMAIN, ['123', '456'], case_type='t1')
+        self.assertEqual({case1.case_id, case2.case_id}, {case.case_id for case in cases})
+
+        self.assertEqual([], CaseAccessorSQL.get_cases_by_external_ids(DOMAIN, []))
+
     def test_closed_transactions(self):
         case = _create_case()
         _create_case_transactions(case)
@@ -151,6 +151,14 @@ class FormAccessorTestsSQL(TestCase):
         with attachment_meta.open() as content:
             self.assertEqual(form_xml, content.read().decode('utf-8'))
 
+    def test_iter_form_xml(self):
+        forms = [create_form_for_test(DOMAIN) for i in range(2)]
+        xml_by_form_id = dict(FormAccessorSQL.iter_form_xml([form.form_id for form in forms] + ['missing']))
+        self.assertEqual(xml_by_form_id, {
+            form.form_id: get_simple_form_xml(form.form_id).encode('utf-8')
+            for form in forms
+        })
+
     def test_get_form_operations(self):
         form = create_form_for_test(DOMAIN)
 
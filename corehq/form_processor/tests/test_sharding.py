@@ -3,10 +3,14 @@ from unittest import skipUnless, SkipTest
 from uuid import uuid4, UUID
 
 from django.conf import settings
-from django.test import TestCase
+from django.test import SimpleTestCase, TestCase
 from django.test.utils import override_settings
 
-from corehq.form_processor.backends.sql.dbaccessors import ShardAccessor
+from corehq.form_processor.backends.sql.dbaccessors import (
+    ShardAccessor,
+    _hash_doc_id,
+    group_doc_ids_by_shard,
+)
 from corehq.form_processor.models import XFormInstanceSQL, CommCareCaseSQL
 from corehq.form_processor.tests.utils import create_form_for_test, FormProcessorTestUtils, use_sql_backend
 from corehq.sql_db.config import plproxy_config
@@ -200,3 +204,19 @@ class ShardAccessorTests(TestCase):
         uuid = UUID('403724ef9fe141f2908363918c62c2ff')
         self.assertEqual(ShardAccessor.hash_doc_id_python(uuid), 1415444857)
         self.assertEqual(ShardAccessor.hash_doc_uuid_sql_for_testing(uuid), 1415444857)
+
+
+class GroupDocIdsByShardTests(SimpleTestCase):
+
+    def test_matches_hash_doc_id_python(self):
+        doc_ids = [str(i) for i in range(2048)] + [uuid4() for i in range(10)]
+        part_mask = 1023
+        expected = defaultdict(list)
+        for doc_id in doc_ids:
+            expected[ShardAccessor.hash_doc_id_python(doc_id) & part_mask].append(doc_id)
+        self.assertEqual(expected, group_doc_ids_by_shard(doc_ids, part_mask))
+
+    def test_hash_uuid(self):
+        uuid = UUID('403724ef9fe141f2908363918c62c2ff')
+        self.assertEqual(_hash_doc_id(uuid), 1415444857)
+        self.assertEqual(_hash_doc_id(uuid.hex), ShardAccessor.hash_doc_id_python(uuid.hex))
@@ -1,7 +1,9 @@
 from corehq.apps.domain_migration_flags.api import any_migrations_in_progress
 from corehq.messaging.scheduling.scheduling_partitioned.dbaccessors import (
+    claim_due_schedule_instances,
     get_active_schedule_instance_ids,
     get_active_case_schedule_instance_ids,
+    release_schedule_instance_claims,
 )
 from corehq.messaging.scheduling.scheduling_partitioned.models import (
     AlertScheduleInstance,
@@ -14,9 +16,14 @@ from corehq.messaging.scheduling.tasks import (
     handle_timed_schedule_instance,
     handle_case_alert_schedule_instance,
     handle_case_timed_schedule_instance,
+    handle_schedule_instance_batch,
 )
-from corehq.sql_db.util import handle_connection_failure, get_default_and_partitioned_db_aliases
-from datetime import datetime
+from corehq.sql_db.util import (
+    get_db_aliases_for_partitioned_query,
+    get_default_and_partitioned_db_aliases,
+    handle_connection_failure,
+)
+from datetime import datetime, timedelta
 from dimagi.utils.couch import get_redis_lock
 from dimagi.utils.logging import notify_exception
 from django.core.management.base import BaseCommand
@@ -34,9 +41,21 @@ class Command(BaseCommand):
     consumes from the reminder_queue. This is ok because this process uses
     locks to ensure items are only enqueued once, and it's what is desired
     in order to more efficiently spawn the needed celery tasks.
+
+    With --batch-size, due instances are instead claimed in batches from
+    each partitioned database (see claim_due_schedule_instances) and one
+    task is spawned per batch, which avoids a lock and a task per instance.
     """
     help = "Spawns tasks to process schedule instances"
 
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=None,
+            help="Claim due schedule instances and spawn one task per batch of this many instances",
+        )
+
     def get_task(self, cls):
         task = {
             AlertScheduleInstance: handle_alert_schedule_instance,
@@ -88,10 +107,45 @@ class Command(BaseCommand):
                 if enqueue_lock.acquire(blocking=False):
                     self.get_task(cls).delay(case_id, schedule_instance_id)
 
-    def handle(self, **options):
+    @handle_connection_failure(get_db_aliases=get_default_and_partitioned_db_aliases)
+    def create_batch_tasks(self, batch_size):
+        now = datetime.utcnow()
+        # As with the enqueue locks above, instances which are claimed but
+        # not processed are only retried once an hour.
+        claimed_until = now + timedelta(hours=1)
+        for cls in (AlertScheduleInstance, TimedScheduleInstance,
+                    CaseAlertScheduleInstance, CaseTimedScheduleInstance):
+            for db_name in get_db_aliases_for_partitioned_query():
+                skipped_ids = []
+                while True:
+                    rows = claim_due_schedule_instances(cls, db_name, now, claimed_until, batch_size)
+                    instance_ids = []
+                    for row in rows:
+                        schedule_instance_id = row[-1]
+                        if skip_domain(row[0]):
+                            skipped_ids.append(schedule_instance_id)
+                        elif len(row) == 3:
+                            instance_ids.append((row[1], schedule_instance_id))
+                        else:
+                            instance_ids.append(schedule_instance_id)
+
+                    if instance_ids:
+                        handle_schedule_instance_batch.delay(cls, instance_ids)
+
+                    if len(rows) < batch_size:
+                        break
+
+                if skipped_ids:
+                    # Skipped domains are retried on the next run
+                    release_schedule_instance_claims(cls, db_name, skipped_ids)
+
+    def handle(self, batch_size=None, **options):
         while True:
             try:
-                self.create_tasks()
+                if batch_size:
+                    self.create_batch_tasks(batch_size)
+                else:
+                    self.create_tasks()
             except:
                 notify_exception(None, message="Could not fetch due reminders")
             sleep(10)
@@ -1,7 +1,12 @@
+from collections import defaultdict
 from uuid import UUID
 
+from django.db import transaction
 from django.db.models import Q
 
+from django_bulk_update.helper import bulk_update as bulk_update_helper
+from dimagi.utils.chunked import chunked
+
 from corehq.sql_db.util import (
     get_db_aliases_for_partitioned_query,
     paginate_query_across_partitioned_databases,
@@ -220,6 +225,63 @@ def _paginate_query(db_name, model_class, q_expression, load_source, query_size=
         previous_pks = current_pks
 
 
+def claim_due_schedule_instances(cls, db_name, due_before, claimed_until, limit):
+    """
+    Claims up to `limit` active schedule instances of the given class in
+    the given partitioned database which are due before `due_before` by
+    setting their claimed_until lease, oldest first.
+
+    Instances which are already claimed until after `due_before` are not
+    claimed again, and rows locked by a concurrent claim are skipped, so
+    concurrent callers claim distinct instances.
+
+    :return: A list of (domain, schedule_instance_id) tuples, or
+    (domain, case_id, schedule_instance_id) tuples for case schedule instances
+    """
+    from corehq.messaging.scheduling.scheduling_partitioned.models import (
+        AlertScheduleInstance,
+        TimedScheduleInstance,
+        CaseAlertScheduleInstance,
+        CaseTimedScheduleInstance,
+    )
+
+    if cls in (AlertScheduleInstance, TimedScheduleInstance):
+        return_values = ['domain', 'schedule_instance_id']
+    elif cls in (CaseAlertScheduleInstance, CaseTimedScheduleInstance):
+        return_values = ['domain', 'case_id', 'schedule_instance_id']
+    else:
+        raise TypeError("Unexpected class: %s" % cls)
+
+    with transaction.atomic(using=db_name):
+        rows = list(
+            cls.objects.using(db_name)
+            .select_for_update(skip_locked=True)
+            .filter(
+                Q(claimed_until__isnull=True) | Q(claimed_until__lt=due_before),
+                active=True,
+                next_event_due__lte=due_before,
+            )
+            .order_by('active', 'next_event_due')
+            .values_list(*return_values)[:limit]
+        )
+        if rows:
+            cls.objects.using(db_name).filter(
+                schedule_instance_id__in=[row[-1] for row in rows]
+            ).update(claimed_until=claimed_until)
+
+    return rows
+
+
+def release_schedule_instance_claims(cls, db_name, schedule_instance_ids):
+    """
+    Clears the claimed_until lease of the given schedule instances so
+    that they can be claimed again right away.
+    """
+    cls.objects.using(db_name).filter(
+        schedule_instance_id__in=schedule_instance_ids
+    ).update(claimed_until=None)
+
+
 def get_alert_schedule_instances_for_schedule(schedule):
     from corehq.messaging.scheduling.models import AlertSchedule
     from corehq.messaging.scheduling.scheduling_partitioned.models import AlertScheduleInstance
@@ -308,6 +370,51 @@ def delete_case_schedule_instance(instance):
     instance.delete()
 
 
+def _group_schedule_instances_by_db(instances):
+    """
+    :return: A dict of {(cls, db_name): [instance, ...]}
+    """
+    from corehq.messaging.scheduling.scheduling_partitioned.models import ScheduleInstance
+
+    result = defaultdict(list)
+    for instance in instances:
+        _validate_class(instance, ScheduleInstance)
+        _validate_uuid(instance.schedule_instance_id)
+        result[(type(instance), instance.db)].append(instance)
+
+    return result
+
+
+def bulk_create_schedule_instances(instances, batch_size=1000):
+    """
+    Creates the given new schedule instances with one INSERT per batch
+    and partitioned database.
+    """
+    for (cls, db_name), db_instances in _group_schedule_instances_by_db(instances).items():
+        cls.objects.using(db_name).bulk_create(db_instances, batch_size=batch_size)
+
+
+def bulk_update_schedule_instances(instances, batch_size=1000):
+    """
+    Saves the given existing schedule instances with one UPDATE per batch
+    and partitioned database.
+    """
+    for (cls, db_name), db_instances in _group_schedule_instances_by_db(instances).items():
+        bulk_update_helper(db_instances, using=db_name, batch_size=batch_size)
+
+
+def bulk_delete_schedule_instances(instances, batch_size=1000):
+    """
+    Deletes the given schedule instances with one DELETE per batch
+    and partitioned database.
+    """
+    for (cls, db_name), db_instances in _group_schedule_instances_by_db(instances).items():
+        for chunk in chunked(db_instances, batch_size):
+            cls.objects.using(db_name).filter(
+                schedule_instance_id__in=[instance.schedule_instance_id for instance in chunk]
+            ).delete()
+
+
 def delete_alert_schedule_instances_for_schedule(cls, schedule_id):
     from corehq.messaging.scheduling.scheduling_partitioned.models import (
         AlertScheduleInstance,
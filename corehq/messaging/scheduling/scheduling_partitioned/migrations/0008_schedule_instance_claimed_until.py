@@ -0,0 +1,31 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scheduling_partitioned', '0007_index_cleanup'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='alertscheduleinstance',
+            name='claimed_until',
+            field=models.DateTimeField(null=True),
+        ),
+        migrations.AddField(
+            model_name='casealertscheduleinstance',
+            name='claimed_until',
+            field=models.DateTimeField(null=True),
+        ),
+        migrations.AddField(
+            model_name='casetimedscheduleinstance',
+            name='claimed_until',
+            field=models.DateTimeField(null=True),
+        ),
+        migrations.AddField(
+            model_name='timedscheduleinstance',
+            name='claimed_until',
+            field=models.DateTimeField(null=True),
+        ),
+    ]
@@ -43,6 +43,12 @@ class ScheduleInstance(PartitionedModel):
     next_event_due = models.DateTimeField()
     active = models.BooleanField()
 
+    # Set when queue_schedule_instances claims the instance for a batch
+    # (see claim_due_schedule_instances) and cleared when the instance is
+    # handled or refreshed, so that the instance is claimed again as soon
+    # as it is next due rather than when the claim expires.
+    claimed_until = models.DateTimeField(null=True)
+
     RECIPIENT_TYPE_CASE = 'CommCareCase'
     RECIPIENT_TYPE_MOBILE_WORKER = 'CommCareUser'
     RECIPIENT_TYPE_WEB_USER = 'WebUser'
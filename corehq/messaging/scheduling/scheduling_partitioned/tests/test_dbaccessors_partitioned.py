@@ -2,6 +2,11 @@ import uuid
 from corehq.form_processor.backends.sql.dbaccessors import ShardAccessor
 from corehq.form_processor.tests.utils import only_run_with_partitioned_database
 from corehq.messaging.scheduling.scheduling_partitioned.dbaccessors import (
+    bulk_create_schedule_instances,
+    bulk_delete_schedule_instances,
+    bulk_update_schedule_instances,
+    claim_due_schedule_instances,
+    release_schedule_instance_claims,
     get_alert_schedule_instance,
     get_timed_schedule_instance,
     save_alert_schedule_instance,
@@ -102,6 +107,29 @@ class TestSchedulingPartitionedDBAccessorsGetAndSave(BaseSchedulingPartitionedDB
         self.assertEqual(TimedScheduleInstance.objects.using(self.db1).count(), 0)
         self.assertEqual(TimedScheduleInstance.objects.using(self.db2).count(), 1)
 
+    def test_bulk_save_and_delete(self):
+        instances = [
+            self.make_alert_schedule_instance(self.p1_uuid),
+            self.make_alert_schedule_instance(self.p2_uuid),
+            self.make_timed_schedule_instance(self.p2_uuid),
+        ]
+        bulk_create_schedule_instances(instances)
+        self.assertEqual(AlertScheduleInstance.objects.using(self.db1).count(), 1)
+        self.assertEqual(AlertScheduleInstance.objects.using(self.db2).count(), 1)
+        self.assertEqual(TimedScheduleInstance.objects.using(self.db2).count(), 1)
+
+        for instance in instances:
+            instance.active = False
+        bulk_update_schedule_instances(instances)
+        self.assertFalse(get_alert_schedule_instance(self.p1_uuid).active)
+        self.assertFalse(get_alert_schedule_instance(self.p2_uuid).active)
+        self.assertFalse(get_timed_schedule_instance(self.p2_uuid).active)
+
+        bulk_delete_schedule_instances(instances[:2])
+        self.assertEqual(AlertScheduleInstance.objects.using(self.db1).count(), 0)
+        self.assertEqual(AlertScheduleInstance.objects.using(self.db2).count(), 0)
+        self.assertEqual(TimedScheduleInstance.objects.using(self.db2).count(), 1)
+
     def test_get_alert_schedule_instance(self):
         self.test_save_alert_schedule_instance()
         instance = get_alert_schedule_instance(self.p1_uuid)
@@ -247,6 +275,55 @@ class TestSchedulingPartitionedDBAccessorsDeleteAndFilter(BaseSchedulingPartitio
             []
         )
 
+    def test_claim_due_schedule_instances(self):
+        now = datetime(2017, 4, 1)
+        claimed_until = datetime(2017, 4, 1, 1)
+        self.assertEqual(
+            claim_due_schedule_instances(AlertScheduleInstance, self.db1, now, claimed_until, 10),
+            [(self.domain, self.p1_uuid1)]
+        )
+        self.assertEqual(
+            claim_due_schedule_instances(AlertScheduleInstance, self.db1, now, claimed_until, 10),
+            []
+        )
+        self.assertEqual(
+            get_alert_schedule_instance(self.p1_uuid1).claimed_until,
+            claimed_until
+        )
+
+        # expired claims are claimed again
+        self.assertEqual(
+            claim_due_schedule_instances(AlertScheduleInstance, self.db1, datetime(2017, 4, 1, 2),
+                datetime(2017, 4, 1, 3), 10),
+            [(self.domain, self.p1_uuid1)]
+        )
+
+        release_schedule_instance_claims(AlertScheduleInstance, self.db1, [self.p1_uuid1])
+        self.assertEqual(
+            claim_due_schedule_instances(AlertScheduleInstance, self.db1, now, claimed_until, 10),
+            [(self.domain, self.p1_uuid1)]
+        )
+
+    def test_claim_due_schedule_instances_limit(self):
+        self.timed_instance2_p1.schedule_instance_id = self.p1_uuid2
+        self.timed_instance2_p1.next_event_due = datetime(2017, 2, 1)
+        save_timed_schedule_instance(self.timed_instance2_p1)
+
+        now = datetime(2017, 4, 1)
+        claimed_until = datetime(2017, 4, 1, 1)
+        self.assertEqual(
+            claim_due_schedule_instances(TimedScheduleInstance, self.db1, now, claimed_until, 1),
+            [(self.domain, self.p1_uuid2)]
+        )
+        self.assertEqual(
+            claim_due_schedule_instances(TimedScheduleInstance, self.db1, now, claimed_until, 1),
+            [(self.domain, self.p1_uuid3)]
+        )
+        self.assertEqual(
+            claim_due_schedule_instances(TimedScheduleInstance, self.db1, now, claimed_until, 1),
+            []
+        )
+
     def test_get_alert_schedule_instances_for_schedule(self):
         self.assertItemsEqual(
             get_alert_schedule_instances_for_schedule(AlertSchedule(schedule_id=self.schedule_id1)),
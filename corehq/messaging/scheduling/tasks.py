@@ -13,8 +13,9 @@ from corehq.messaging.scheduling.scheduling_partitioned.models import (
     CaseScheduleInstanceMixin,
 )
 from corehq.messaging.scheduling.scheduling_partitioned.dbaccessors import (
-    delete_alert_schedule_instance,
-    delete_timed_schedule_instance,
+    bulk_create_schedule_instances,
+    bulk_delete_schedule_instances,
+    bulk_update_schedule_instances,
     get_alert_schedule_instances_for_schedule,
     get_timed_schedule_instances_for_schedule,
     get_alert_schedule_instance,
@@ -24,8 +25,8 @@ from corehq.messaging.scheduling.scheduling_partitioned.dbaccessors import (
     get_case_alert_schedule_instances_for_schedule,
     get_case_timed_schedule_instances_for_schedule,
     get_case_schedule_instance,
+    release_schedule_instance_claims,
     save_case_schedule_instance,
-    delete_case_schedule_instance,
     delete_alert_schedule_instances_for_schedule,
     delete_timed_schedule_instances_for_schedule,
     delete_schedule_instances_by_case_id,
@@ -33,6 +34,7 @@ from corehq.messaging.scheduling.scheduling_partitioned.dbaccessors import (
 from corehq.util.celery_utils import no_result_task
 from datetime import datetime
 from dimagi.utils.couch import CriticalSection
+from dimagi.utils.logging import notify_exception
 from django.conf import settings
 
 
@@ -101,56 +103,49 @@ class ScheduleInstanceRefresher(object):
         """
         raise NotImplementedError()
 
-    @staticmethod
-    def delete_instance(instance):
-        if isinstance(instance, AlertScheduleInstance):
-            delete_alert_schedule_instance(instance)
-        elif isinstance(instance, TimedScheduleInstance):
-            delete_timed_schedule_instance(instance)
-        elif isinstance(instance, (CaseAlertScheduleInstance, CaseTimedScheduleInstance)):
-            delete_case_schedule_instance(instance)
-        else:
-            raise TypeError("Unexpected type: %s" % type(instance))
-
-    @staticmethod
-    def save_instance(instance):
-        if isinstance(instance, AlertScheduleInstance):
-            save_alert_schedule_instance(instance)
-        elif isinstance(instance, TimedScheduleInstance):
-            save_timed_schedule_instance(instance)
-        elif isinstance(instance, (CaseAlertScheduleInstance, CaseTimedScheduleInstance)):
-            save_case_schedule_instance(instance)
-        else:
-            raise TypeError("Unexpected type: %s" % type(instance))
-
     def refresh(self):
         # A list of (instance, needs_saving) tuples representing the final version
-        # of the refreshed instances and whether or not each one needs to be saved
+        # of the existing instances and whether or not each one needs to be saved
         # at the end of processing. We should avoid saving instances that didn't
         # change to prevent churn on the database tables.
         refreshed_list = []
+        new_instances = []
+        deleted_instances = []
 
         for recipient_type_and_id in self.new_recipients:
             recipient_type, recipient_id = recipient_type_and_id
 
             if recipient_type_and_id not in self.existing_instances:
-                refreshed_list.append(
-                    (self.create_new_instance_for_recipient(recipient_type, recipient_id), True)
-                )
+                new_instances.append(self.create_new_instance_for_recipient(recipient_type, recipient_id))
 
         for recipient_type_and_id, instance in self.existing_instances.items():
             if recipient_type_and_id in self.new_recipients:
                 needs_saving = self.handle_existing_instance(instance)
                 refreshed_list.append((instance, needs_saving))
             else:
-                self.delete_instance(instance)
+                deleted_instances.append(instance)
 
+        changed_instances = []
         for instance, needs_saving in refreshed_list:
             if instance.check_active_flag_against_schedule():
                 needs_saving = True
 
             if needs_saving:
-                self.save_instance(instance)
+                # Any claim from queue_schedule_instances was taken for the
+                # old next_event_due, so clear it to have the instance claimed
+                # again when it is next due
+                instance.claimed_until = None
+                changed_instances.append(instance)
+
+        for instance in new_instances:
+            instance.check_active_flag_against_schedule()
+
+        # Instances are written in bulk per partitioned database since
+        # broadcasts to large groups and locations can refresh tens of
+        # thousands of instances at a time.
+        bulk_delete_schedule_instances(deleted_instances)
+        bulk_create_schedule_instances(new_instances)
+        bulk_update_schedule_instances(changed_instances)
 
 
 class AlertScheduleInstanceRefresher(ScheduleInstanceRefresher):
@@ -423,6 +418,10 @@ def _handle_schedule_instance(instance, save_function):
     """
     :return: True if the event was handled, otherwise False
     """
+    # Saving the instance releases any claim from queue_schedule_instances
+    claimed = instance.claimed_until is not None
+    instance.claimed_until = None
+
     if (
         instance.memoized_schedule.deleted or
         (isinstance(instance, CaseScheduleInstanceMixin) and (instance.case is None or instance.case.is_deleted))
@@ -447,6 +446,11 @@ def _handle_schedule_instance(instance, save_function):
         save_function(instance)
         return True
 
+    if claimed:
+        # The instance was rescheduled or deactivated after it was claimed,
+        # so release the claim to let it be claimed as soon as it is due again
+        release_schedule_instance_claims(type(instance), instance.db, [instance.schedule_instance_id])
+
     return False
 
 
@@ -454,28 +458,50 @@ def update_broadcast_last_sent_timestamp(broadcast_class, schedule_id):
     broadcast_class.objects.filter(schedule_id=schedule_id).update(last_sent_timestamp=datetime.utcnow())
 
 
-@no_result_task(serializer='pickle', queue='reminder_queue')
-def handle_alert_schedule_instance(schedule_instance_id):
+def _handle_alert_schedule_instance(schedule_instance_id):
+    """
+    :return: The alert_schedule_id of the instance if the event was handled, otherwise None
+    """
     with CriticalSection(['handle-alert-schedule-instance-%s' % schedule_instance_id.hex]):
         try:
             instance = get_alert_schedule_instance(schedule_instance_id)
         except AlertScheduleInstance.DoesNotExist:
-            return
+            return None
 
         if _handle_schedule_instance(instance, save_alert_schedule_instance):
-            update_broadcast_last_sent_timestamp(ImmediateBroadcast, instance.alert_schedule_id)
+            return instance.alert_schedule_id
 
+    return None
 
-@no_result_task(serializer='pickle', queue='reminder_queue')
-def handle_timed_schedule_instance(schedule_instance_id):
+
+def _handle_timed_schedule_instance(schedule_instance_id):
+    """
+    :return: The timed_schedule_id of the instance if the event was handled, otherwise None
+    """
     with CriticalSection(['handle-timed-schedule-instance-%s' % schedule_instance_id.hex]):
         try:
             instance = get_timed_schedule_instance(schedule_instance_id)
         except TimedScheduleInstance.DoesNotExist:
-            return
+            return None
 
         if _handle_schedule_instance(instance, save_timed_schedule_instance):
-            update_broadcast_last_sent_timestamp(ScheduledBroadcast, instance.timed_schedule_id)
+            return instance.timed_schedule_id
+
+    return None
+
+
+@no_result_task(serializer='pickle', queue='reminder_queue')
+def handle_alert_schedule_instance(schedule_instance_id):
+    schedule_id = _handle_alert_schedule_instance(schedule_instance_id)
+    if schedule_id:
+        update_broadcast_last_sent_timestamp(ImmediateBroadcast, schedule_id)
+
+
+@no_result_task(serializer='pickle', queue='reminder_queue')
+def handle_timed_schedule_instance(schedule_instance_id):
+    schedule_id = _handle_timed_schedule_instance(schedule_instance_id)
+    if schedule_id:
+        update_broadcast_last_sent_timestamp(ScheduledBroadcast, schedule_id)
 
 
 @no_result_task(serializer='pickle', queue='reminder_queue')
@@ -504,6 +530,55 @@ def handle_case_timed_schedule_instance(case_id, schedule_instance_id):
         _handle_schedule_instance(instance, save_case_schedule_instance)
 
 
+def _handle_broadcast_schedule_instance_batch(schedule_instance_ids, handle_function, broadcast_class):
+    schedule_ids = set()
+    for schedule_instance_id in schedule_instance_ids:
+        try:
+            schedule_id = handle_function(schedule_instance_id)
+        except Exception:
+            notify_exception(None, message="Error handling schedule instance %s" % schedule_instance_id)
+            continue
+
+        if schedule_id:
+            schedule_ids.add(schedule_id)
+
+    for schedule_id in schedule_ids:
+        update_broadcast_last_sent_timestamp(broadcast_class, schedule_id)
+
+
+def _handle_case_schedule_instance_batch(instance_ids, handle_function):
+    for case_id, schedule_instance_id in instance_ids:
+        try:
+            handle_function(case_id, schedule_instance_id)
+        except Exception:
+            notify_exception(None, message="Error handling schedule instance %s" % schedule_instance_id)
+
+
+@no_result_task(serializer='pickle', queue='reminder_queue')
+def handle_schedule_instance_batch(cls, instance_ids):
+    """
+    Handles a batch of schedule instances claimed by queue_schedule_instances.
+    Each instance is handled under the same lock as in its single instance task,
+    and the last sent timestamp of a broadcast is updated once per batch.
+
+    :param cls: The schedule instance class
+    :param instance_ids: A list of schedule_instance_ids, or of
+    (case_id, schedule_instance_id) tuples for case schedule instances
+    """
+    if cls is AlertScheduleInstance:
+        _handle_broadcast_schedule_instance_batch(instance_ids, _handle_alert_schedule_instance,
+            ImmediateBroadcast)
+    elif cls is TimedScheduleInstance:
+        _handle_broadcast_schedule_instance_batch(instance_ids, _handle_timed_schedule_instance,
+            ScheduledBroadcast)
+    elif cls is CaseAlertScheduleInstance:
+        _handle_case_schedule_instance_batch(instance_ids, handle_case_alert_schedule_instance)
+    elif cls is CaseTimedScheduleInstance:
+        _handle_case_schedule_instance_batch(instance_ids, handle_case_timed_schedule_instance)
+    else:
+        raise TypeError("Unexpected class: %s" % cls)
+
+
 @no_result_task(serializer='pickle', queue='background_queue', acks_late=True)
 def delete_schedule_instances_for_cases(domain, case_ids):
     for case_id in case_ids:
@@ -4,6 +4,8 @@ from corehq.apps.users.models import CommCareUser
 from corehq.form_processor.tests.utils import partitioned, run_with_all_backends
 from corehq.apps.hqcase.utils import update_case
 from corehq.messaging.scheduling.scheduling_partitioned.dbaccessors import (
+    claim_due_schedule_instances,
+    get_timed_schedule_instance,
     save_alert_schedule_instance,
     save_timed_schedule_instance,
     delete_alert_schedule_instance,
@@ -28,10 +30,11 @@ from corehq.messaging.scheduling.models import (
     SMSContent,
 )
 from corehq.messaging.scheduling.tasks import (
+    handle_timed_schedule_instance,
     refresh_alert_schedule_instances,
     refresh_timed_schedule_instances,
 )
-from datetime import datetime, date, time
+from datetime import datetime, date, time, timedelta
 from django.test import TestCase
 from mock import patch
 
@@ -432,6 +435,72 @@ class DeleteScheduleInstancesTest(BaseScheduleTest):
         self.assertEqual(self.count(get_timed_schedule_instances_for_schedule(self.timed_schedule_2)), 0)
 
 
+@partitioned
+@patch('corehq.messaging.scheduling.models.content.SMSContent.send')
+@patch('corehq.messaging.scheduling.util.utcnow')
+class ScheduleInstanceClaimTest(BaseScheduleTest):
+
+    def setUp(self):
+        super(ScheduleInstanceClaimTest, self).setUp()
+        self.schedule = TimedSchedule.create_simple_daily_schedule(
+            self.domain,
+            TimedEvent(time=time(12, 0)),
+            SMSContent(),
+            total_iterations=2,
+        )
+
+    def tearDown(self):
+        delete_timed_schedule_instances_for_schedule(TimedScheduleInstance, self.schedule.schedule_id)
+        self.schedule.delete()
+        super(ScheduleInstanceClaimTest, self).tearDown()
+
+    def create_and_claim_instance(self, utcnow_patch):
+        utcnow_patch.return_value = datetime(2017, 3, 16, 6, 0)
+        refresh_timed_schedule_instances(self.schedule.schedule_id, (('CommCareUser', self.user1.get_id),),
+            date(2017, 3, 16))
+        [instance] = get_timed_schedule_instances_for_schedule(self.schedule)
+
+        now = datetime(2017, 3, 16, 16, 1)
+        self.assertEqual(
+            claim_due_schedule_instances(TimedScheduleInstance, instance.db, now, now + timedelta(hours=1), 10),
+            [(self.domain, instance.schedule_instance_id)]
+        )
+        instance = get_timed_schedule_instance(instance.schedule_instance_id)
+        self.assertIsNotNone(instance.claimed_until)
+        return instance
+
+    def test_claim_released_when_instance_not_due(self, utcnow_patch, send_patch):
+        instance = self.create_and_claim_instance(utcnow_patch)
+
+        # The instance is rescheduled after it was claimed
+        next_event_due = datetime.utcnow() + timedelta(minutes=5)
+        instance.next_event_due = next_event_due
+        save_timed_schedule_instance(instance)
+
+        handle_timed_schedule_instance(instance.schedule_instance_id)
+        self.assertEqual(send_patch.call_count, 0)
+        instance = get_timed_schedule_instance(instance.schedule_instance_id)
+        self.assertIsNone(instance.claimed_until)
+        self.assertEqual(instance.next_event_due, next_event_due)
+
+        due_before = next_event_due + timedelta(minutes=1)
+        self.assertEqual(
+            claim_due_schedule_instances(TimedScheduleInstance, instance.db, due_before,
+                due_before + timedelta(hours=1), 10),
+            [(self.domain, instance.schedule_instance_id)]
+        )
+
+    def test_refresh_releases_claim(self, utcnow_patch, send_patch):
+        instance = self.create_and_claim_instance(utcnow_patch)
+
+        # Set start date one day back, which recalculates the schedule
+        refresh_timed_schedule_instances(self.schedule.schedule_id, (('CommCareUser', self.user1.get_id),),
+            date(2017, 3, 15))
+        instance = get_timed_schedule_instance(instance.schedule_instance_id)
+        self.assertEqual(instance.schedule_iteration_num, 2)
+        self.assertIsNone(instance.claimed_until)
+
+
 @partitioned
 @patch('corehq.messaging.scheduling.models.content.SMSContent.send')
 @patch('corehq.messaging.scheduling.util.utcnow')
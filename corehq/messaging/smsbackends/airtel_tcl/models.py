@@ -1,6 +1,5 @@
 import json
 import pytz
-import requests
 from corehq.apps.sms.models import SQLSMSBackend
 from corehq.messaging.smsbackends.airtel_tcl.exceptions import AirtelTCLError, InvalidDestinationNumber
 from corehq.messaging.smsbackends.airtel_tcl.forms import AirtelTCLBackendForm
@@ -116,7 +115,7 @@ class AirtelTCLBackend(SQLSMSBackend):
             msg_obj.set_system_error(SMS.ERROR_INVALID_DESTINATION_NUMBER)
             return
 
-        response = requests.post(
+        response = self.get_http_session().post(
             self.get_url(),
             data=json.dumps(payload),
             timeout=settings.SMS_GATEWAY_TIMEOUT,
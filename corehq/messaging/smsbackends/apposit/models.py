@@ -1,5 +1,4 @@
 import json
-import requests
 from corehq.apps.sms.models import SMS, SQLSMSBackend
 from corehq.apps.sms.util import strip_plus
 from corehq.messaging.smsbackends.apposit.forms import AppositBackendForm
@@ -85,7 +84,7 @@ class SQLAppositBackend(SQLSMSBackend):
             'message': msg.text,
         }
         json_payload = json.dumps(data)
-        response = requests.post(
+        response = self.get_http_session().post(
             self.url,
             auth=(config.application_id, config.application_token),
             data=json_payload,
@@ -12,7 +12,6 @@ from xml.sax.saxutils import escape, unescape
 from django.conf import settings
 from corehq.apps.sms.api import incoming as incoming_sms
 import logging
-import requests
 import six
 
 logger = logging.getLogger(__name__)
@@ -106,7 +105,7 @@ class SQLGrapevineBackend(SQLSMSBackend):
 
         url = 'http://www.gvi.bms9.vine.co.za/httpInputhandler/ApplinkUpload'
 
-        response = requests.post(
+        response = self.get_http_session().post(
             url,
             data=data.encode('utf-8'),
             headers={'content-type': 'text/xml'},
@@ -1,5 +1,4 @@
 import pytz
-import requests
 from datetime import datetime
 from corehq.apps.sms.models import SQLSMSBackend
 from corehq.messaging.smsbackends.ivory_coast_mtn.exceptions import IvoryCoastMTNError
@@ -73,7 +72,7 @@ class IvoryCoastMTNBackend(SQLSMSBackend):
             msg_obj.set_system_error(SMS.ERROR_INVALID_DESTINATION_NUMBER)
             return
 
-        response = requests.get(
+        response = self.get_http_session().get(
             'http://smspro.mtn.ci/smspro/soap/messenger.asmx/HTTP_SendSms',
             params=self.get_params(msg_obj),
             timeout=settings.SMS_GATEWAY_TIMEOUT,
@@ -1,6 +1,5 @@
 import base64
 import json
-import requests
 from corehq.apps.sms.models import SQLSMSBackend
 from corehq.messaging.smsbackends.karix.exceptions import KarixError
 from corehq.messaging.smsbackends.karix.forms import KarixBackendForm
@@ -86,7 +85,7 @@ class KarixBackend(SQLSMSBackend):
             msg_obj.set_system_error(SMS.ERROR_INVALID_DESTINATION_NUMBER)
             return
 
-        response = requests.post(
+        response = self.get_http_session().post(
             'https://japi.instaalerts.zone/httpapi/JsonReceiver',
             data=json.dumps(self.get_json_payload(msg_obj)),
             timeout=settings.SMS_GATEWAY_TIMEOUT,
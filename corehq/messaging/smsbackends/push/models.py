@@ -1,4 +1,3 @@
-import requests
 from corehq.apps.sms.models import SQLSMSBackend
 from corehq.messaging.smsbackends.push.forms import PushBackendForm
 from django.conf import settings
@@ -115,7 +114,7 @@ class PushBackend(SQLSMSBackend):
     def send(self, msg, *args, **kwargs):
         headers = {'Content-Type': 'application/xml'}
         payload = self.get_outbound_payload(msg)
-        response = requests.post(
+        response = self.get_http_session().post(
             self.get_url(),
             data=payload,
             headers=headers,
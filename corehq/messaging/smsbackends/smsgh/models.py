@@ -1,4 +1,3 @@
-import requests
 from corehq.apps.sms.models import SMS, SQLSMSBackend
 from corehq.messaging.smsbackends.smsgh.forms import SMSGHBackendForm
 from django.conf import settings
@@ -93,7 +92,7 @@ class SQLSMSGHBackend(SQLSMSBackend):
             'ClientId': config.client_id,
             'ClientSecret': config.client_secret,
         }
-        response = requests.get(self.get_url(), params=params, timeout=settings.SMS_GATEWAY_TIMEOUT)
+        response = self.get_http_session().get(self.get_url(), params=params, timeout=settings.SMS_GATEWAY_TIMEOUT)
 
         if self.response_is_error(response):
             self.handle_error(response, msg)
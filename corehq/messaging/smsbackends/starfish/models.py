@@ -1,5 +1,4 @@
 import re
-import requests
 from corehq.apps.sms.forms import BackendForm
 from corehq.apps.sms.models import SMS, SQLSMSBackend
 from django.conf import settings
@@ -61,7 +60,7 @@ class StarfishBackend(SQLSMSBackend):
             "msisdn": msg.phone_number,
             "message": msg.text.encode('utf-8'),
         }
-        response = requests.get(
+        response = self.get_http_session().get(
             self.get_url(),
             params=payload,
             timeout=settings.SMS_GATEWAY_TIMEOUT,
@@ -1,7 +1,6 @@
 import codecs
 import jsonfield
 import re
-import requests
 from dimagi.utils.logging import notify_exception
 from django.conf import settings
 from django.db import models
@@ -95,7 +94,7 @@ class StartEnterpriseBackend(SQLSMSBackend):
             msg_obj.set_system_error(SMS.ERROR_INVALID_DESTINATION_NUMBER)
             return
 
-        response = requests.get(
+        response = self.get_http_session().get(
             SINGLE_SMS_URL,
             params=self.get_params(msg_obj),
             timeout=settings.SMS_GATEWAY_TIMEOUT,
@@ -79,7 +79,7 @@ class SQLTelerivetBackend(SQLSMSBackend):
         url = 'https://api.telerivet.com/v1/projects/%s/messages/send' % config.project_id
 
         # Sending with the json param automatically sets the Content-Type header to application/json
-        response = requests.post(
+        response = self.get_http_session().post(
             url,
             auth=(config.api_key, ''),
             json=payload,
@@ -1,5 +1,3 @@
-import requests
-
 from dimagi.utils.logging import notify_exception
 from corehq.apps.sms.models import SQLSMSBackend
 from corehq.messaging.smsbackends.vertex.const import (
@@ -77,7 +75,7 @@ class VertexBackend(SQLSMSBackend):
             return
 
         params = self.populate_params(msg_obj)
-        resp = requests.get(VERTEX_URL, params=params, timeout=settings.SMS_GATEWAY_TIMEOUT)
+        resp = self.get_http_session().get(VERTEX_URL, params=params, timeout=settings.SMS_GATEWAY_TIMEOUT)
         self.handle_response(msg_obj, resp.status_code, resp.text)
 
     def handle_response(self, msg_obj, resp_status_code, resp_text):
@@ -4,6 +4,12 @@ MAX_RETRY_WAIT = timedelta(days=7)
 MIN_RETRY_WAIT = timedelta(minutes=60)
 CHECK_REPEATERS_INTERVAL = timedelta(minutes=5)
 CHECK_REPEATERS_KEY = 'check-repeaters-key'
+# Number of repeat records sent one after another by one task
+REPEAT_RECORD_BATCH_SIZE = 100
+# Max number of batches of each repeater that are queued or being sent
+MAX_REPEATER_BATCHES = 5
+# Max time a claimed repeat record waits for its batch to fill up
+MAX_REPEAT_RECORD_BATCH_WAIT = timedelta(seconds=30)
 
 POST_TIMEOUT = 75  # seconds
 
@@ -153,14 +153,15 @@ def _get_repeater_ids_by_domain(domain):
     return [result['id'] for result in results]
 
 
-def iterate_repeat_records(due_before, chunk_size=10000, database=None):
+def iterate_repeat_records(due_before, chunk_size=10000, database=None, domain=None):
+    """Iterate over the repeat records due before ``due_before``, of all domains by default"""
     from .models import RepeatRecord
     json_now = json_format_datetime(due_before)
 
     view_kwargs = {
         'reduce': False,
-        'startkey': [None],
-        'endkey': [None, json_now, {}],
+        'startkey': [domain],
+        'endkey': [domain, json_now, {}],
         'include_docs': True
     }
     for doc in paginate_view(
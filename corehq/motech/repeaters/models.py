@@ -43,7 +43,10 @@ associates it with the payload using the payload's ID. The
 Next we jump to *tasks.py*. The ``check_repeaters()`` function will run
 every ``CHECK_REPEATERS_INTERVAL`` (currently set to 5 minutes). Each
 ``RepeatRecord`` due to be processed will be added to the
-``CELERY_REPEAT_RECORD_QUEUE``.
+``CELERY_REPEAT_RECORD_QUEUE`` in a batch with other records of the same
+repeater. Only a few batches of each repeater are queued at a time, and
+a repeater whose destination failed is skipped until its records are due
+to be retried, so that one repeater's backlog does not hold up others.
 
 When it is pulled off the queue and processed, if its repeater is paused
 it will be postponed. If its repeater is deleted it will be deleted. And
@@ -850,6 +853,15 @@ class RepeatRecord(Document):
     def attempt_forward_now(self):
         from corehq.motech.repeaters.tasks import process_repeat_record
 
+        if self.claim():
+            process_repeat_record.delay(self)
+
+    def claim(self):
+        """Claim this record to be sent if it is due
+
+        :returns: True if the record was claimed. False if it is not due
+        or another process claimed it first.
+        """
         def is_ready():
             return self.next_check < datetime.utcnow()
 
@@ -857,7 +869,7 @@ class RepeatRecord(Document):
             return self.succeeded or self.cancelled or self.next_check is None
 
         if already_processed() or not is_ready():
-            return
+            return False
 
         # Set the next check to happen an arbitrarily long time from now so
         # if something goes horribly wrong with the delayed task it will not
@@ -871,8 +883,8 @@ class RepeatRecord(Document):
             # Another process beat us to the punch. This takes advantage
             # of Couch DB's optimistic locking, which prevents a process
             # with stale data from overwriting the work of another.
-            return
-        process_repeat_record.delay(self)
+            return False
+        return True
 
     def requeue(self):
         self.cancelled = False
@@ -1,3 +1,5 @@
+import hashlib
+from collections import OrderedDict
 from datetime import datetime, timedelta
 
 from django.conf import settings
@@ -8,6 +10,7 @@ from celery.utils.log import get_task_logger
 
 from corehq.util.metrics import metrics_gauge_task, metrics_counter, metrics_histogram_timer
 from dimagi.utils.couch import get_redis_lock
+from dimagi.utils.couch.cache.cache_core import get_redis_client
 from dimagi.utils.couch.undo import DELETED_SUFFIX
 
 from corehq.apps.accounting.utils import domain_has_privilege
@@ -15,10 +18,14 @@ from corehq.motech.models import RequestLog
 from corehq.motech.repeaters.const import (
     CHECK_REPEATERS_INTERVAL,
     CHECK_REPEATERS_KEY,
+    MAX_REPEAT_RECORD_BATCH_WAIT,
+    MAX_REPEATER_BATCHES,
     RECORD_FAILURE_STATE,
     RECORD_PENDING_STATE,
+    REPEAT_RECORD_BATCH_SIZE,
 )
 from corehq.motech.repeaters.dbaccessors import (
+    get_domains_that_have_repeat_records,
     get_overdue_repeat_record_count,
     iterate_repeat_records,
 )
@@ -34,6 +41,8 @@ _check_repeaters_buckets = make_buckets_from_timedeltas(
     timedelta(hours=5),
     timedelta(hours=10),
 )
+# a batch is lost if its task is, so stop counting it after this long
+REPEATER_BATCHES_TIMEOUT = 6 * 60 * 60
 _soft_assert = soft_assert(to='@'.join(('nhooper', 'dimagi.com')))
 logging = get_task_logger(__name__)
 
@@ -57,13 +66,27 @@ def clean_logs():
     queue=settings.CELERY_PERIODIC_QUEUE,
 )
 def check_repeaters():
+    for partition in range(settings.CHECK_REPEATERS_PARTITION_COUNT):
+        check_repeaters_in_partition.delay(partition)
+
+
+@task(queue=settings.CELERY_PERIODIC_QUEUE)
+def check_repeaters_in_partition(partition):
+    """Queue the due repeat records of the domains in ``partition``
+
+    Domains are split across ``settings.CHECK_REPEATERS_PARTITION_COUNT``
+    partitions so that their records can be read, claimed and queued by
+    several workers at once.
+    """
     start = datetime.utcnow()
     six_hours_sec = 6 * 60 * 60
     six_hours_later = start + timedelta(seconds=six_hours_sec)
+    partition_count = settings.CHECK_REPEATERS_PARTITION_COUNT
+    lock_key = "{}-{}".format(CHECK_REPEATERS_KEY, partition)
 
     # Long timeout to allow all waiting repeat records to be iterated
     check_repeater_lock = get_redis_lock(
-        CHECK_REPEATERS_KEY,
+        lock_key,
         timeout=six_hours_sec,
         name=CHECK_REPEATERS_KEY,
     )
@@ -76,27 +99,179 @@ def check_repeaters():
             "commcare.repeaters.check.processing",
             timing_buckets=_check_repeaters_buckets,
         ):
-            for record in iterate_repeat_records(start):
-                if datetime.utcnow() > six_hours_later:
-                    _soft_assert(False, "I've been iterating repeat records for six hours. I quit!")
-                    break
-                metrics_counter("commcare.repeaters.check.attempt_forward")
-                record.attempt_forward_now()
+            dispatcher = RepeatRecordDispatcher()
+            try:
+                for record in _iter_due_repeat_records(start, partition, partition_count):
+                    if datetime.utcnow() > six_hours_later:
+                        _soft_assert(False, "I've been iterating repeat records for six hours. I quit!")
+                        break
+                    dispatcher.add(record)
+            finally:
+                # queue the records that have been claimed
+                dispatcher.flush()
     finally:
         check_repeater_lock.release()
 
 
+def _iter_due_repeat_records(due_before, partition, partition_count):
+    if partition_count == 1:
+        yield from iterate_repeat_records(due_before)
+        return
+    for domain in get_domains_that_have_repeat_records():
+        if get_domain_partition(domain, partition_count) == partition:
+            yield from iterate_repeat_records(due_before, domain=domain)
+
+
+def get_domain_partition(domain, partition_count):
+    if partition_count == 1:
+        return 0
+    return int(hashlib.md5(domain.encode('utf-8')).hexdigest(), 16) % partition_count
+
+
+class RepeatRecordDispatcher(object):
+    """Claims due repeat records and queues them in batches per repeater
+
+    At most ``MAX_REPEATER_BATCHES`` batches of each repeater are queued
+    or being sent at a time, and records of a repeater that is backing off
+    after a failed send are not claimed. The remaining records are left to
+    be checked again, so a repeater with a large backlog or a failing
+    destination does not hold up the records of other repeaters.
+
+    A batch is queued once it is full or once its first record was claimed
+    ``MAX_REPEAT_RECORD_BATCH_WAIT`` ago, so records of repeaters with few
+    due records are not held until all due records have been checked.
+    """
+
+    def __init__(self):
+        # repeater_id -> (claimed at, records), oldest batch first
+        self.batches = OrderedDict()
+        self.available_batches = {}
+
+    def add(self, record):
+        self._queue_waiting_batches()
+        repeater_id = record.repeater_id
+        if repeater_id not in self.available_batches:
+            self.available_batches[repeater_id] = _get_available_batches(repeater_id)
+        if not self.available_batches[repeater_id]:
+            metrics_counter("commcare.repeaters.check.skipped")
+            return
+        if not record.claim():
+            return
+        metrics_counter("commcare.repeaters.check.attempt_forward")
+        if repeater_id not in self.batches:
+            self.batches[repeater_id] = (datetime.utcnow(), [])
+        claimed_at, batch = self.batches[repeater_id]
+        batch.append(record)
+        if len(batch) >= REPEAT_RECORD_BATCH_SIZE:
+            self._queue_batch(repeater_id)
+
+    def flush(self):
+        for repeater_id in list(self.batches):
+            self._queue_batch(repeater_id)
+
+    def _queue_waiting_batches(self):
+        claimed_before = datetime.utcnow() - MAX_REPEAT_RECORD_BATCH_WAIT
+        while self.batches:
+            repeater_id, (claimed_at, records) = next(iter(self.batches.items()))
+            if claimed_at > claimed_before:
+                break
+            self._queue_batch(repeater_id)
+
+    def _queue_batch(self, repeater_id):
+        claimed_at, records = self.batches.pop(repeater_id)
+        self.available_batches[repeater_id] -= 1
+        _start_batch(repeater_id)
+        process_repeat_records.delay(repeater_id, records)
+
+
+def _get_batches_key(repeater_id):
+    return "repeater-batches-{}".format(repeater_id)
+
+
+def _get_backoff_key(repeater_id):
+    return "repeater-backoff-{}".format(repeater_id)
+
+
+def _get_available_batches(repeater_id):
+    client = get_redis_client()
+    if client.get(_get_backoff_key(repeater_id)):
+        return 0
+    return max(0, MAX_REPEATER_BATCHES - (client.get(_get_batches_key(repeater_id)) or 0))
+
+
+def _start_batch(repeater_id):
+    client = get_redis_client()
+    key = _get_batches_key(repeater_id)
+    # expire in case a batch is lost without being finished
+    client.add(key, 0, timeout=REPEATER_BATCHES_TIMEOUT)
+    client.incr(key)
+
+
+def _finish_batch(repeater_id):
+    try:
+        get_redis_client().decr(_get_batches_key(repeater_id))
+    except ValueError:
+        pass  # expired
+
+
+def _back_off(repeater_id, until, repeat_records):
+    """Postpone ``repeat_records`` and stop queueing the repeater's records until ``until``"""
+    now = datetime.utcnow()
+    timeout = max(1, int((until - now).total_seconds()))
+    get_redis_client().set(_get_backoff_key(repeater_id), True, timeout=timeout)
+    for repeat_record in repeat_records:
+        repeat_record.postpone_by(until - now)
+    metrics_counter("commcare.repeaters.backoff")
+
+
 @task(serializer='pickle', queue=settings.CELERY_REPEAT_RECORD_QUEUE)
 def process_repeat_record(repeat_record):
+    _process_repeat_record(repeat_record, _has_forwarding_privilege(repeat_record.domain))
 
-    # A RepeatRecord should ideally never get into this state, as the
-    # domain_has_privilege check is also triggered in the create_repeat_records
-    # in signals.py. But if it gets here, forcefully cancel the RepeatRecord.
+
+@task(serializer='pickle', queue=settings.CELERY_REPEAT_RECORD_QUEUE)
+def process_repeat_records(repeater_id, repeat_records):
+    """Send a batch of repeat records of one repeater one after another
+
+    If a record fails to be sent and will be retried, the rest of the
+    batch is postponed until the record's next check and no more of the
+    repeater's records are queued until then.
+    """
+    try:
+        has_privilege = _has_forwarding_privilege(repeat_records[0].domain)
+        for i, repeat_record in enumerate(repeat_records):
+            num_attempts = len(repeat_record.attempts)
+            _process_repeat_record(repeat_record, has_privilege)
+            if _failed_with_retry(repeat_record, num_attempts):
+                _back_off(repeater_id, repeat_record.next_check, repeat_records[i + 1:])
+                break
+    finally:
+        _finish_batch(repeater_id)
+
+
+def _failed_with_retry(repeat_record, num_attempts):
+    return (
+        len(repeat_record.attempts) > num_attempts
+        and not repeat_record.succeeded
+        and not repeat_record.cancelled
+        and repeat_record.next_check is not None
+    )
+
+
+def _has_forwarding_privilege(domain):
     # todo reconcile ZAPIER_INTEGRATION and DATA_FORWARDING
     #  they each do two separate things and are priced differently,
     #  but use the same infrastructure
-    if not (domain_has_privilege(repeat_record.domain, ZAPIER_INTEGRATION)
-            or domain_has_privilege(repeat_record.domain, DATA_FORWARDING)):
+    return (domain_has_privilege(domain, ZAPIER_INTEGRATION)
+            or domain_has_privilege(domain, DATA_FORWARDING))
+
+
+def _process_repeat_record(repeat_record, has_forwarding_privilege):
+
+    # A RepeatRecord should ideally never get into this state, as the
+    # domain_has_privilege check is also triggered in the create_repeat_records
+    # in signals.py. But if it gets here, forcefully cancel the RepeatRecord.
+    if not has_forwarding_privilege:
         repeat_record.cancel()
         repeat_record.save()
 
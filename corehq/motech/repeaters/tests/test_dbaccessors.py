@@ -144,6 +144,12 @@ class TestRepeatRecordDBAccessors(TestCase):
         records = list(iterate_repeat_records(datetime.utcnow(), chunk_size=2))
         self.assertEqual(len(records), 4)  # Should grab all but the succeeded one
 
+    def test_iterate_repeat_records_by_domain(self):
+        records = list(iterate_repeat_records(datetime.utcnow(), chunk_size=2, domain=self.domain))
+        self.assertEqual(len(records), 4)
+        records = list(iterate_repeat_records(datetime.utcnow(), domain='wrong-domain'))
+        self.assertEqual(len(records), 0)
+
     def test_get_overdue_repeat_record_count(self):
         overdue_count = get_overdue_repeat_record_count()
         self.assertEqual(overdue_count, 1)
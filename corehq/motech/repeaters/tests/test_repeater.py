@@ -11,6 +11,7 @@ from mock import Mock, patch
 from casexml.apps.case.mock import CaseBlock, CaseFactory
 from casexml.apps.case.xform import get_case_ids_from_form
 from couchforms.const import DEVICE_LOG_XMLNS
+from dimagi.utils.couch.cache.cache_core import get_redis_client
 from dimagi.utils.parsing import json_format_datetime
 
 from corehq.apps.accounting.models import SoftwarePlanEdition
@@ -59,8 +60,14 @@ from corehq.motech.repeaters.repeater_generators import (
     RegisterGenerator,
 )
 from corehq.motech.repeaters.tasks import (
+    RepeatRecordDispatcher,
+    _finish_batch,
+    _get_available_batches,
+    _get_backoff_key,
     check_repeaters,
+    check_repeaters_in_partition,
     process_repeat_record,
+    process_repeat_records,
 )
 
 MockResponse = namedtuple('MockResponse', 'status_code reason')
@@ -314,7 +321,7 @@ class RepeaterTest(BaseRepeaterTest):
     def test_process_repeat_record_locking(self):
         self.assertEqual(len(self.repeat_records()), 2)
 
-        with patch('corehq.motech.repeaters.tasks.process_repeat_record') as mock_process:
+        with patch('corehq.motech.repeaters.tasks.process_repeat_records') as mock_process:
             check_repeaters()
             self.assertEqual(mock_process.delay.call_count, 0)
 
@@ -323,9 +330,25 @@ class RepeaterTest(BaseRepeaterTest):
             record.next_check = datetime.utcnow()
             record.save()
 
-        with patch('corehq.motech.repeaters.tasks.process_repeat_record') as mock_process:
+        with patch('corehq.motech.repeaters.tasks.process_repeat_records') as mock_process:
             check_repeaters()
-            self.assertEqual(mock_process.delay.call_count, 2)
+            queued = [record for call in mock_process.delay.call_args_list for record in call[0][1]]
+            self.assertEqual(len(queued), 2)
+        for repeater_id, records in (call[0] for call in mock_process.delay.call_args_list):
+            _finish_batch(repeater_id)
+
+    @run_with_all_backends
+    def test_process_repeat_records_backs_off(self):
+        first, second = self.repeat_records()
+        with patch('corehq.motech.repeaters.models.simple_post',
+                   return_value=MockResponse(status_code=500, reason="Borked")) as mock_post:
+            process_repeat_records(first.repeater_id, [first, second])
+            self.assertEqual(mock_post.call_count, 1)
+        self.addCleanup(get_redis_client().delete, _get_backoff_key(first.repeater_id))
+
+        second = RepeatRecord.get(second._id)
+        self.assertAlmostEqual(second.next_check, first.next_check, delta=timedelta(seconds=1))
+        self.assertEqual(_get_available_batches(first.repeater_id), 0)
 
     @run_with_all_backends
     def test_automatic_cancel_repeat_record(self):
@@ -1168,6 +1191,47 @@ class TestGetRetryInterval(SimpleTestCase):
             self.assertEqual(interval, timedelta(hours=expected_interval_hours))
 
 
+@patch('corehq.motech.repeaters.tasks._start_batch')
+@patch('corehq.motech.repeaters.tasks._get_available_batches', return_value=5)
+@patch('corehq.motech.repeaters.tasks.process_repeat_records')
+class RepeatRecordDispatcherTests(SimpleTestCase):
+
+    def _get_record(self, repeater_id):
+        return Mock(repeater_id=repeater_id, claim=Mock(return_value=True))
+
+    def test_partial_batches_wait(self, mock_process, *args):
+        dispatcher = RepeatRecordDispatcher()
+        dispatcher.add(self._get_record('small'))
+        dispatcher.add(self._get_record('large'))
+        self.assertEqual(mock_process.delay.call_count, 0)
+        dispatcher.flush()
+        self.assertEqual(mock_process.delay.call_count, 2)
+
+    def test_waiting_batch_is_queued(self, mock_process, *args):
+        dispatcher = RepeatRecordDispatcher()
+        record = self._get_record('small')
+        dispatcher.add(record)
+        with patch('corehq.motech.repeaters.tasks.MAX_REPEAT_RECORD_BATCH_WAIT', timedelta(0)):
+            dispatcher.add(self._get_record('large'))
+        mock_process.delay.assert_any_call('small', [record])
+
+    def test_claimed_records_queued_on_error(self, mock_process, *args):
+        record = self._get_record('small')
+
+        def iter_records(*args):
+            yield record
+            raise Boom()
+
+        with patch('corehq.motech.repeaters.tasks._iter_due_repeat_records', iter_records):
+            with self.assertRaises(Boom):
+                check_repeaters_in_partition(0)
+        mock_process.delay.assert_called_once_with('small', [record])
+
+
+class Boom(Exception):
+    pass
+
+
 def fromisoformat(isoformat):
     """
     Return a datetime from a string in ISO 8601 date time format
@@ -13,6 +13,7 @@ from corehq.apps.case_search.const import (
 )
 from corehq.apps.case_search.exceptions import CaseSearchNotEnabledException
 from corehq.apps.case_search.models import case_search_enabled_domains
+from corehq.apps.case_search.result_cache import get_case_search_result_cache
 from corehq.apps.change_feed import topics
 from corehq.apps.change_feed.consumer.feed import (
     KafkaChangeFeed,
@@ -103,12 +104,19 @@ class CaseSearchPillowProcessor(ElasticProcessor):
         if change.metadata is not None:
             # Comes from KafkaChangeFeed (i.e. running pillowtop)
             domain = change.metadata.domain
+            case_type = change.metadata.document_subtype
         else:
             # comes from ChangeProvider (i.e reindexing)
-            domain = change.get_document()['domain']
+            doc = change.get_document()
+            domain = doc['domain']
+            case_type = doc.get('type')
 
         if domain and domain_needs_search_index(domain):
             super(CaseSearchPillowProcessor, self).process_change(change)
+            if case_type:
+                result_cache = get_case_search_result_cache()
+                if result_cache is not None:
+                    result_cache.invalidate(domain, case_type)
 
 
 def get_case_search_processor():
@@ -0,0 +1,50 @@
+import timeit
+import uuid
+
+from django.core.management.base import BaseCommand
+
+from dimagi.utils.chunked import chunked
+
+from corehq.form_processor.backends.sql.dbaccessors import (
+    ShardAccessor,
+    _hash_doc_id,
+    group_doc_ids_by_shard,
+)
+
+
+def route_per_id(doc_ids, part_mask):
+    """Shard routing as done before doc IDs were grouped in a single pass"""
+    doc_ids_by_shard = {}
+    for chunk in chunked(doc_ids, 100):
+        hashes = ShardAccessor.hash_doc_ids_python(chunk)
+        for doc_id, hash_ in hashes.items():
+            doc_ids_by_shard.setdefault(hash_ & part_mask, []).append(doc_id)
+    return doc_ids_by_shard
+
+
+def route_batch_uncached(doc_ids, part_mask):
+    _hash_doc_id.cache_clear()
+    return group_doc_ids_by_shard(doc_ids, part_mask)
+
+
+class Command(BaseCommand):
+    help = "Compare the time taken to route doc IDs to shards per ID and in batches"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--ids', type=int, default=10000, help='Number of doc IDs to route')
+        parser.add_argument('--shards', type=int, default=1024, help='Number of shards (power of 2)')
+        parser.add_argument('--repeat', type=int, default=5)
+
+    def handle(self, ids, shards, repeat, **options):
+        doc_ids = [uuid.uuid4().hex for i in range(ids)]
+        part_mask = shards - 1
+        assert route_per_id(doc_ids, part_mask) == group_doc_ids_by_shard(doc_ids, part_mask)
+
+        for name, route in [
+            ('per id', route_per_id),
+            ('batch', route_batch_uncached),
+            ('batch (cached)', group_doc_ids_by_shard),
+        ]:
+            seconds = min(timeit.repeat(lambda: route(doc_ids, part_mask), number=1, repeat=repeat))
+            self.stdout.write('{:<16}{:>10.2f} ms {:>12.0f} ids/sec'.format(
+                name, seconds * 1000, ids / seconds))
@@ -734,6 +734,43 @@ LIVEQUERY_SYNC = StaticToggle(
     namespaces=[NAMESPACE_DOMAIN],
 )
 
+LIVEQUERY_PARTITIONED_SYNC = StaticToggle(
+    'livequery_partitioned_sync',
+    'Walk the livequery case graph in partitions of owned cases to bound restore memory',
+    TAG_INTERNAL,
+    namespaces=[NAMESPACE_DOMAIN],
+    description="""
+    Restore case XML is written as each partition of owned cases is resolved
+    instead of after the whole case graph has been loaded. Intended for users
+    who own very large numbers of cases.
+    """
+)
+
+LIVEQUERY_OWNER_BLOCK_SYNC = StaticToggle(
+    'livequery_owner_block_sync',
+    'Assemble initial livequery restores from cached per-owner case blocks',
+    TAG_INTERNAL,
+    namespaces=[NAMESPACE_DOMAIN],
+    description="""
+    The live cases reachable from the cases of each owner id are serialized
+    once and reused by all users with that owner id (e.g. users assigned to
+    the same location) until a case in the block changes. Only applies to
+    initial restores in projects that do not use ledgers.
+    """
+)
+
+BULK_FORM_SUBMISSION = StaticToggle(
+    'bulk_form_submission',
+    'Allow submitting many forms in one request to the bulk receiver URL',
+    TAG_INTERNAL,
+    namespaces=[NAMESPACE_DOMAIN],
+    description="""
+    Forms posted together to /receiver/bulk/ are processed in order with a
+    shared case cache, locking each case they update once for the whole
+    batch. Intended for integrations and data migrations.
+    """
+)
+
 NO_VELLUM = StaticToggle(
     'no_vellum',
     'Allow disabling Form Builder per form '
@@ -514,6 +514,27 @@ SHARED_DRIVE_ROOT = None
 RESTORE_PAYLOAD_DIR_NAME = None
 SHARED_TEMP_DIR_NAME = None
 SHARED_BLOB_DIR_NAME = 'blobdb'
+# Local disk cache for blob content read from the blob db, e.g.
+# {"dir": "/opt/blobcache", "max_size": 10 * 1024 ** 3}
+# max_size is in bytes. Disabled when None. Blobs deleted by other hosts are
+# not removed from the cache, see corehq.blobs.cachingdb.CachingBlobDB.
+BLOB_DB_LOCAL_CACHE = None
+
+# Name of a cache in CACHES used to share serialized case XML between
+# restores (e.g. 'redis' or a FileBasedCache). Disabled when None.
+RESTORE_CASE_XML_CACHE = None
+RESTORE_CASE_XML_CACHE_TIMEOUT = 24 * 60 * 60
+# Name of a cache in CACHES used to store the blob db keys of per-owner
+# case blocks for initial restores. See LIVEQUERY_OWNER_BLOCK_SYNC toggle.
+RESTORE_OWNER_BLOCK_CACHE = 'default'
+RESTORE_OWNER_BLOCK_CACHE_TIMEOUT = 24 * 60 * 60
+# Name of a cache in CACHES used to share results between identical case
+# searches (e.g. 'redis'). Disabled when None.
+CASE_SEARCH_RESULT_CACHE = None
+CASE_SEARCH_RESULT_CACHE_TIMEOUT = 60
+# Number of threads a case import uses to submit chunks of caseblocks
+# which do not depend on each other. 1 submits all chunks in order.
+CASE_IMPORTER_SUBMISSION_THREADS = 1
 
 ## django-transfer settings
 # These settings must match the apache / nginx config
@@ -542,6 +563,8 @@ CELERY_PERIODIC_QUEUE = 'celery_periodic'
 CELERY_REMINDER_RULE_QUEUE = 'reminder_rule_queue'
 CELERY_REMINDER_CASE_UPDATE_QUEUE = 'reminder_case_update_queue'
 CELERY_REPEAT_RECORD_QUEUE = 'repeat_record_queue'
+# Number of tasks that split the repeat records due to be sent by repeater
+CHECK_REPEATERS_PARTITION_COUNT = 1
 
 # Will cause a celery task to raise a SoftTimeLimitExceeded exception if
 # time limit is exceeded.
@@ -626,6 +649,11 @@ SMS_QUEUE_DOMAIN_RESTRICTED_RETRY_INTERVAL = 15
 # messages will not be processed.
 SMS_QUEUE_STALE_MESSAGE_DURATION = 7 * 24
 
+# If set, due outgoing SMS are grouped by domain and backend and sent in
+# tasks of up to this many messages (see process_outgoing_sms_batch)
+# instead of one task per message.
+SMS_QUEUE_OUTBOUND_BATCH_SIZE = None
+
 
 ####### Reminders Queue Settings #######
 
@@ -717,6 +745,11 @@ RUN_FORM_META_PILLOW = True
 RUN_CASE_SEARCH_PILLOW = True
 RUN_UNKNOWN_USER_PILLOW = True
 
+# Adapt the batch processing chunk size of these pillows to their processing
+# time and change lag, by pillow name. e.g.
+# {'case-pillow': {'min_size': 10, 'max_size': 1000, 'target_seconds': 10, 'max_wait_seconds': 5}}
+PILLOW_ADAPTIVE_CHUNK_SIZE = {}
+
 # Set to True to remove the `actions` and `xform_id` fields from the
 # ES Case index. These fields contribute high load to the shard
 # databases.